@@ -1,19 +1,7 @@
-import sys
-import os
-import pandas as pd
-import psycopg2
 from psycopg2.extras import RealDictCursor
 import seaborn as sns
 import matplotlib.pyplot as plt
-
-# Config
-DB_HOST = os.getenv("PGHOST", "localhost")
-DB_NAME = os.getenv("PGDATABASE", "nba")
-DB_USER = os.getenv("PGUSER", "nba_user")
-DB_PASS = os.getenv("PGPASSWORD", "nba_pass")
-
-def get_db_conn():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
+from db import get_db_conn, read_frame
 
 def main():
     print("\n--- ANALYZING MODEL FAILURES ---\n")
@@ -48,7 +36,7 @@ def main():
         WHERE ph.actual_home_score IS NOT NULL;
     """
     
-    df = pd.read_sql(sql, conn)
+    df = read_frame(conn, sql)
     conn.close()
 
     if df.empty:
@@ -1,14 +1,22 @@
 import os
+import sys
 import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import pandas as pd
-import psycopg2
-from psycopg2.extras import execute_values
 
 from nba_api.stats.endpoints import leaguegamefinder
 
+import change_sets
+import nba_client
+from game_pairing import pair_home_away
+from games_writer import write_games
+from response_cache import current_season_str
+from db import get_db_conn
+
 
 # -----------------------------
 # Configuration
@@ -17,29 +25,8 @@ SEASONS = ["2022-23", "2023-24", "2024-25"]
 SEASON_TYPE_API = "Regular Season"   # NBA API value
 SEASON_TYPE_DB = "regular"           # what we store in DB
 
-SLEEP_SECONDS = 0.6                  # NBA API rate limiting
-
-
-# -----------------------------
-# Database connection
-# -----------------------------
-def get_db_conn():
-    host = os.getenv("PGHOST", "localhost")
-    port = int(os.getenv("PGPORT", "5432"))
-    dbname = os.getenv("PGDATABASE", "nba")
-    user = os.getenv("PGUSER", "nba_user")
-    password = os.getenv("PGPASSWORD", "nba_pass")
-
-    if not password:
-        raise RuntimeError("PGPASSWORD environment variable is not set")
-
-    return psycopg2.connect(
-        host=host,
-        port=port,
-        dbname=dbname,
-        user=user,
-        password=password,
-    )
+# One season per process; the API rate limit is shared out between them
+DEFAULT_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))
 
 
 # -----------------------------
@@ -50,13 +37,12 @@ def fetch_team_game_rows(season: str) -> pd.DataFrame:
     Fetch one row per TEAM per GAME from NBA API.
     """
     print(f"Fetching {season} ({SEASON_TYPE_API})...")
-    lgf = leaguegamefinder.LeagueGameFinder(
+    lgf = nba_client.fetch(
+        leaguegamefinder.LeagueGameFinder,
         season_nullable=season,
         season_type_nullable=SEASON_TYPE_API,
     )
-    df = lgf.get_data_frames()[0]
-    time.sleep(SLEEP_SECONDS)
-    return df
+    return lgf.get_data_frames()[0]
 
 
 def combine_home_away(df: pd.DataFrame) -> pd.DataFrame:
@@ -64,45 +50,8 @@ def combine_home_away(df: pd.DataFrame) -> pd.DataFrame:
     Convert team-level rows into one row per game:
       game_id, game_date, home_team_id, away_team_id, home_pts, away_pts
     """
-    if df.empty:
-        return df
-
-    df = df.copy()
-    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"]).dt.date
-
-    # Identify home vs away from MATCHUP string
-    df["is_home"] = df["MATCHUP"].str.contains("vs.", regex=False)
-    df["is_away"] = df["MATCHUP"].str.contains("@", regex=False)
-
-    home = (
-        df[df["is_home"]]
-        .loc[:, ["GAME_ID", "GAME_DATE", "TEAM_ID", "PTS"]]
-        .rename(
-            columns={
-                "GAME_ID": "game_id",
-                "GAME_DATE": "game_date",
-                "TEAM_ID": "home_team_id",
-                "PTS": "home_pts",
-            }
-        )
-    )
-
-    away = (
-        df[df["is_away"]]
-        .loc[:, ["GAME_ID", "TEAM_ID", "PTS"]]
-        .rename(
-            columns={
-                "GAME_ID": "game_id",
-                "TEAM_ID": "away_team_id",
-                "PTS": "away_pts",
-            }
-        )
-    )
-
-    games = home.merge(away, on="game_id", how="inner")
-    games = games.drop_duplicates(subset=["game_id"])
-
-    return games
+    games = pair_home_away(df)
+    return games[games["home_pts"].notna() & games["away_pts"].notna()]
 
 
 # -----------------------------
@@ -112,75 +61,116 @@ def upsert_games(conn, games_df: pd.DataFrame) -> int:
     if games_df.empty:
         return 0
 
-    rows = []
-    for _, r in games_df.iterrows():
-        rows.append(
-            (
-                str(r["game_id"]),
-                r["game_date"],                 # satisfies NOT NULL game_date
-                r["game_date"],                 # game_date_et (same date)
-                int(r["home_team_id"]),
-                int(r["away_team_id"]),
-                int(r["home_pts"]),
-                int(r["away_pts"]),
-                "final",
-                SEASON_TYPE_DB,
-            )
-        )
-
-    sql = """
-        INSERT INTO games (
-            game_id,
-            game_date,
-            game_date_et,
-            home_team_id,
-            away_team_id,
-            home_pts,
-            away_pts,
-            status,
-            season_type
-        )
-        VALUES %s
-        ON CONFLICT (game_id) DO UPDATE
-        SET
-            game_date     = EXCLUDED.game_date,
-            game_date_et  = EXCLUDED.game_date_et,
-            home_team_id  = EXCLUDED.home_team_id,
-            away_team_id  = EXCLUDED.away_team_id,
-            home_pts      = EXCLUDED.home_pts,
-            away_pts      = EXCLUDED.away_pts,
-            status        = EXCLUDED.status,
-            season_type   = EXCLUDED.season_type;
-    """
+    games_df = games_df.assign(
+        game_date_et=games_df["game_date"],   # game_date_et (same date)
+        status="final",
+        season_type=SEASON_TYPE_DB,
+    )
+    count = write_games(conn, games_df, [
+        "game_id",
+        "game_date",                          # satisfies NOT NULL game_date
+        "game_date_et",
+        "home_team_id",
+        "away_team_id",
+        "home_pts",
+        "away_pts",
+        "status",
+        "season_type",
+    ])
+
+    change_sets.emit_games(conn, "backfill_finals", games_df)
+    conn.commit()
+    return count
 
-    with conn.cursor() as cur:
-        execute_values(cur, sql, rows, page_size=1000)
 
-    conn.commit()
-    return len(rows)
+# -----------------------------
+# Season workers
+# -----------------------------
+def season_range(first: str, last: str) -> List[str]:
+    """"1996-97", "1998-99" -> ["1996-97", "1997-98", "1998-99"]"""
+    start, end = int(first[:4]), int(last[:4])
+    return [f"{y}-{(y + 1) % 100:02d}" for y in range(start, end + 1)]
+
+
+def init_worker(rate: float, burst: int):
+    # Each process has its own client; split the rate so the pool as a
+    # whole stays under the stats.nba.com limit.
+    nba_client.configure(rate=rate, burst=burst)
+
+
+def backfill_season(season: str) -> Tuple[str, int, float, float]:
+    """Fetch, pair and upsert one season. Returns (season, games, fetch_s, write_s)."""
+    t0 = time.perf_counter()
+    team_rows = fetch_team_game_rows(season)
+    games_df = combine_home_away(team_rows)
+    t1 = time.perf_counter()
+
+    conn = get_db_conn()
+    try:
+        count = upsert_games(conn, games_df)
+    finally:
+        conn.close()
+    return season, count, t1 - t0, time.perf_counter() - t1
 
 
 # -----------------------------
 # Main
 # -----------------------------
-def main(seasons: Optional[List[str]] = None):
+def main(seasons: Optional[List[str]] = None, workers: int = DEFAULT_WORKERS):
     seasons = seasons or SEASONS
+    workers = max(1, min(workers, len(seasons)))
+
     conn = get_db_conn()
+    change_sets.ensure_table(conn)
+    conn.close()
 
+    print(f"Backfilling {len(seasons)} seasons ({seasons[0]} -> {seasons[-1]}) with {workers} processes...")
+    started = time.perf_counter()
     total = 0
-    try:
-        for season in seasons:
-            team_rows = fetch_team_game_rows(season)
-            games_df = combine_home_away(team_rows)
-            count = upsert_games(conn, games_df)
+    failed = []
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(nba_client.RATE_PER_SECOND / workers, max(1, nba_client.BURST // workers)),
+    ) as pool:
+        futures = {pool.submit(backfill_season, s): s for s in seasons}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            season = futures[fut]
+            try:
+                _, count, fetch_s, write_s = fut.result()
+            except Exception as e:
+                failed.append(season)
+                print(f"[{done}/{len(seasons)}] {season}: FAILED -> {e}")
+                continue
             total += count
-            print(f"{season}: upserted {count} regular-season final games")
-
-        print(f"\nBackfill complete. Total games upserted: {total}")
+            elapsed = time.perf_counter() - started
+            print(
+                f"[{done}/{len(seasons)}] {season}: upserted {count} final games "
+                f"(fetch {fetch_s:.1f}s, write {write_s:.1f}s) | "
+                f"{total} games in {elapsed:.0f}s, {total / elapsed:.0f} games/s"
+            )
 
-    finally:
-        conn.close()
+    elapsed = time.perf_counter() - started
+    print(f"\nBackfill complete. Total games upserted: {total} in {elapsed:.1f}s "
+          f"({total / elapsed if elapsed else 0:.0f} games/s)")
+    if failed:
+        print(f"Failed seasons (re-run with --seasons): {' '.join(sorted(failed))}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Backfill final games for a range of seasons.")
+    parser.add_argument("--from", dest="first", help="first season, e.g. 1996-97")
+    parser.add_argument("--to", dest="last", help="last season (default: the current one)")
+    parser.add_argument("--seasons", nargs="+", help="explicit list of seasons instead of a range")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="worker processes")
+    args = parser.parse_args()
+
+    if args.seasons:
+        seasons = args.seasons
+    elif args.first:
+        seasons = season_range(args.first, args.last or current_season_str())
+    else:
+        seasons = SEASONS
+    main(seasons, args.workers)
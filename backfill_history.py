@@ -1,27 +1,14 @@
-import sys
-import os
 import joblib
 import pandas as pd
-import psycopg2
 from psycopg2.extras import RealDictCursor
 from datetime import datetime, timedelta
+from db import get_db_conn
 
 # Config
-DB_HOST = os.getenv("PGHOST", "localhost")
-DB_NAME = os.getenv("PGDATABASE", "nba")
-DB_USER = os.getenv("PGUSER", "nba_user")
-DB_PASS = os.getenv("PGPASSWORD", "nba_pass")
-
 MODEL_WIN_PATH = "models/win_model.joblib"     
 MODEL_MARGIN_PATH = "models/margin_model.joblib"
 MODEL_TOTAL_PATH = "models/total_model.joblib"
 
-def get_db_conn():
-    if not DB_PASS:
-        print("Error: PGPASSWORD not set.")
-        sys.exit(1)
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
-
 def fetch_games_for_date(conn, game_date_et):
     # This query fetches inputs exactly as the main script does
     sql = """
@@ -1,35 +1,18 @@
 import sys
-import os
 import joblib
 import pandas as pd
 import numpy as np
-import psycopg2
 from psycopg2.extras import RealDictCursor
 from datetime import datetime, timedelta
+from db import get_db_conn
 
 # -------------------------------------------------------------------
 # Config
 # -------------------------------------------------------------------
-DB_HOST = os.getenv("PGHOST", "localhost")
-DB_NAME = os.getenv("PGDATABASE", "nba")
-DB_USER = os.getenv("PGUSER", "nba_user")
-DB_PASS = os.getenv("PGPASSWORD")
-
 MODEL_WIN_PATH = "models/win_model.joblib"     
 MODEL_MARGIN_PATH = "models/margin_model.joblib"
 MODEL_TOTAL_PATH = "models/total_model.joblib"
 
-# -------------------------------------------------------------------
-# DB Connection
-# -------------------------------------------------------------------
-def get_db_conn():
-    if not DB_PASS:
-        print("Error: PGPASSWORD environment variable not set.")
-        sys.exit(1)
-    return psycopg2.connect(
-        host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS
-    )
-
 # -------------------------------------------------------------------
 # Data Fetching (Matches predict_scores_v2.1.py)
 # -------------------------------------------------------------------
@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+# Ingestors the harness can drive end to end. Each is run as its own
+# process, exactly as run_daily.py / the task scheduler would run it.
+BENCH_SCRIPTS = {
+    "fetch_player_logs": ["fetch_player_logs.py"],
+    "ingest_boxscores": ["ingest_boxscores.py"],
+    "ingest_results_et": ["ingest_results_et.py"],
+    "backfill_finals": ["backfill_finals.py"],
+}
+
+
+def run_script(name, extra_args, env):
+    cmd = [sys.executable] + BENCH_SCRIPTS[name] + extra_args
+    print(f"\n=== {name}: {' '.join(cmd[1:])} ===")
+    t0 = time.perf_counter()
+    result = subprocess.run(cmd, env=env)
+    elapsed = time.perf_counter() - t0
+    return elapsed, result.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run ingestors against recorded nba_api fixtures (or record them) and time each one."
+    )
+    parser.add_argument("scripts", nargs="*", help=f"any of {', '.join(BENCH_SCRIPTS)} (default: all)")
+    parser.add_argument("--record", action="store_true",
+                        help="hit stats.nba.com and save responses as fixtures instead of replaying")
+    parser.add_argument("--fixtures", default=None, help="fixture directory (default: fixtures/nba_api)")
+    parser.add_argument("--latency", type=float, default=0.25, help="mean simulated seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument("--rate", type=float, default=None, help="override NBA_API_RATE (requests/second)")
+    parser.add_argument("--workers", type=int, default=None, help="override NBA_API_WORKERS")
+    parser.add_argument("--seed", default="0", help="seed for simulated latency/errors")
+    parser.add_argument("--et-window", nargs=2, metavar=("START", "END"), default=None,
+                        help="ET date window for ingest_results_et (YYYY-MM-DD YYYY-MM-DD)")
+    args = parser.parse_args()
+    unknown = [s for s in args.scripts if s not in BENCH_SCRIPTS]
+    if unknown:
+        parser.error(f"unknown scripts: {', '.join(unknown)}")
+
+    env = dict(os.environ)
+    env["NBA_API_REPLAY"] = "record" if args.record else "replay"
+    env["NBA_API_REPLAY_LATENCY"] = str(args.latency)
+    env["NBA_API_REPLAY_ERROR_RATE"] = str(args.error_rate)
+    env["NBA_API_REPLAY_SEED"] = args.seed
+    if args.fixtures:
+        env["NBA_API_FIXTURES"] = args.fixtures
+    if args.rate is not None:
+        env["NBA_API_RATE"] = str(args.rate)
+    if args.workers is not None:
+        env["NBA_API_WORKERS"] = str(args.workers)
+
+    mode = env["NBA_API_REPLAY"]
+    print(f"Mode: {mode} | latency {args.latency}s | error rate {args.error_rate:.0%} | "
+          f"rate {env.get('NBA_API_RATE', 'default')} req/s | workers {env.get('NBA_API_WORKERS', 'default')}")
+
+    results = []
+    for name in args.scripts or list(BENCH_SCRIPTS):
+        extra = list(args.et_window) if name == "ingest_results_et" and args.et_window else []
+        elapsed, code = run_script(name, extra, env)
+        results.append((name, elapsed, code))
+
+    print("\n--- Benchmark Summary ---")
+    print(f"{'script':<20} {'seconds':>10} {'exit':>6}")
+    for name, elapsed, code in results:
+        print(f"{name:<20} {elapsed:>10.2f} {code:>6}")
+
+    if any(code != 0 for _, _, code in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
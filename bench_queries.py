@@ -0,0 +1,188 @@
+import sys
+import time
+import argparse
+import statistics
+
+from dotenv import load_dotenv
+
+from fetch_player_logs import LOG_COLUMNS, ensure_log_partitions, logs_table_ddl
+from migrate_partitions import index_games
+from seasons import SEASON_START_MONTH, season_from_date
+from db import get_db_conn
+
+load_dotenv()
+
+# Everything is built in a scratch schema from the latest season in
+# public.player_logs / public.games, copied N times with dates shifted back
+# a year per copy, so query times can be read off as history grows.
+SCHEMA = "bench"
+
+# The props and training reads, the delta watermark, and the games filters
+# every feature view applies. {logs} / {games} is the table under test.
+QUERIES = {
+    "props_last20": "SELECT game_date, pts, reb, ast, min FROM {logs} "
+                    "WHERE player_id = %(player_id)s ORDER BY game_date DESC LIMIT 20",
+    "watermark": "SELECT MAX(game_date) FROM {logs}",
+    "train_window": "SELECT player_id, AVG(pts), AVG(reb), AVG(ast) FROM {logs} "
+                    "WHERE game_date >= %(since)s GROUP BY player_id",
+    "games_status": "SELECT game_id, home_team_id, away_team_id FROM {games} "
+                    "WHERE status = %(status)s AND game_date_et >= %(recent)s",
+    "games_on_date": "SELECT game_id FROM {games} WHERE game_date_et = %(day)s",
+}
+
+# -----------------------------
+# Setup
+# -----------------------------
+def create_tables(cur):
+    """The old layout (flat, PK only) next to the migrated one."""
+    cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cur.execute(f"CREATE SCHEMA {SCHEMA}")
+    cur.execute(f"SET search_path TO {SCHEMA}, public")
+    cur.execute("CREATE TABLE logs_flat (LIKE public.player_logs INCLUDING DEFAULTS, PRIMARY KEY (game_id, player_id))")
+    cur.execute(logs_table_ddl("logs_part"))
+    cur.execute("CREATE TABLE games_flat (LIKE public.games INCLUDING DEFAULTS, PRIMARY KEY (game_id))")
+    cur.execute("CREATE TABLE games_indexed (LIKE public.games INCLUDING DEFAULTS, PRIMARY KEY (game_id))")
+    index_games(cur, "games_indexed")
+
+def latest_season(cur):
+    cur.execute("SELECT MAX(game_date) FROM public.player_logs")
+    last = cur.fetchone()[0]
+    if last is None:
+        raise RuntimeError("public.player_logs is empty: nothing to replicate")
+    year = season_from_date(last)
+    return year, f"{year}-{SEASON_START_MONTH:02d}-01", f"{year + 1}-{SEASON_START_MONTH:02d}-01"
+
+def shifted_games_columns(cur, copy, shift):
+    """public.games' select list with the id made unique and the dates shifted."""
+    cur.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = 'games' ORDER BY ordinal_position
+    """)
+    exprs = []
+    for (col,) in cur.fetchall():
+        if col == "game_id":
+            exprs.append(f"'B{copy:02d}' || game_id")
+        elif col in ("game_date", "game_date_et"):
+            exprs.append(f"({col} - {shift})::date")
+        else:
+            exprs.append(col)
+    return ", ".join(exprs)
+
+def add_season(cur, copy, season):
+    """Append one more season of history: the latest season shifted `copy` years back."""
+    year, start, end = season
+    shift = f"INTERVAL '{copy} years'"
+    ensure_log_partitions(cur, [year - copy], table="logs_part")
+    cols = ", ".join(c for c in LOG_COLUMNS if c not in ("game_id", "game_date"))
+    for table in ("logs_flat", "logs_part"):
+        cur.execute(f"""
+            INSERT INTO {table} (game_id, game_date, {cols})
+            SELECT 'B{copy:02d}' || game_id, (game_date - {shift})::date, {cols}
+            FROM public.player_logs WHERE game_date >= %s AND game_date < %s
+        """, (start, end))
+    games_cols = shifted_games_columns(cur, copy, shift)
+    for table in ("games_flat", "games_indexed"):
+        cur.execute(f"""
+            INSERT INTO {table}
+            SELECT {games_cols} FROM public.games WHERE game_date_et >= %s AND game_date_et < %s
+        """, (start, end))
+    for table in ("logs_flat", "logs_part", "games_flat", "games_indexed"):
+        cur.execute(f"ANALYZE {table}")
+
+def sample_params(cur, season, players):
+    year, start, end = season
+    cur.execute("""
+        SELECT player_id FROM public.player_logs
+        WHERE game_date >= %s GROUP BY player_id ORDER BY COUNT(*) DESC LIMIT %s
+    """, (start, players))
+    player_ids = [r[0] for r in cur.fetchall()]
+    cur.execute("SELECT status, COUNT(*) FROM public.games GROUP BY status ORDER BY 2 DESC LIMIT 1")
+    status = cur.fetchone()[0]
+    cur.execute("SELECT MAX(game_date_et) FROM public.games WHERE game_date_et >= %s AND game_date_et < %s", (start, end))
+    last_day = cur.fetchone()[0]
+    return player_ids, {
+        "since": start, "status": status, "day": last_day,
+        "recent": f"{year + 1}-03-01",
+    }
+
+# -----------------------------
+# Timing
+# -----------------------------
+def time_query(cur, sql, param_sets, repeat):
+    """Median ms per execution over `repeat` rounds (after one warm-up round)."""
+    rounds = []
+    for i in range(repeat + 1):
+        t0 = time.perf_counter()
+        for params in param_sets:
+            cur.execute(sql, params)
+            cur.fetchall()
+        if i:
+            rounds.append((time.perf_counter() - t0) * 1000 / len(param_sets))
+    return statistics.median(rounds)
+
+def run_queries(cur, player_ids, params, repeat):
+    results = {}
+    for name, sql in QUERIES.items():
+        if name == "props_last20":
+            param_sets = [{"player_id": p} for p in player_ids]
+        else:
+            param_sets = [params]
+        before = sql.format(logs="logs_flat", games="games_flat")
+        after = sql.format(logs="logs_part", games="games_indexed")
+        results[name] = (time_query(cur, before, param_sets, repeat), time_query(cur, after, param_sets, repeat))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the props / training / watermark / games queries on the old and the "
+                    "partitioned + indexed layouts as history grows (scratch schema, real data shape)."
+    )
+    parser.add_argument("--seasons", type=int, nargs="+", default=[1, 5, 10, 20],
+                        help="history sizes to measure at, in seasons (default: 1 5 10 20)")
+    parser.add_argument("--players", type=int, default=50, help="players sampled for the props query")
+    parser.add_argument("--repeat", type=int, default=5, help="timed rounds per query")
+    parser.add_argument("--keep", action="store_true", help=f"keep the {SCHEMA} schema afterwards")
+    args = parser.parse_args()
+
+    conn = get_db_conn()
+    conn.autocommit = True
+    rows = []
+    try:
+        with conn.cursor() as cur:
+            season = latest_season(cur)
+            print(f"Replicating season {season[0]} up to {max(args.seasons)} seasons of history...")
+            create_tables(cur)
+            player_ids, params = sample_params(cur, season, args.players)
+
+            built = 0
+            for target in sorted(set(args.seasons)):
+                while built < target:
+                    add_season(cur, built, season)
+                    built += 1
+                cur.execute("SELECT COUNT(*) FROM logs_flat")
+                n_logs = cur.fetchone()[0]
+                print(f"{target} seasons: {n_logs} player_logs rows")
+                for name, (before, after) in run_queries(cur, player_ids, params, args.repeat).items():
+                    rows.append((target, name, before, after))
+
+            if not args.keep:
+                cur.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+    except Exception as e:
+        print(f"Benchmark failed: {e}")
+        sys.exit(1)
+    finally:
+        # the connection goes back to the pool; don't leave it pointed at the scratch schema
+        if not conn.closed:
+            with conn.cursor() as cur:
+                cur.execute("RESET search_path")
+        conn.close()
+
+    print("\n--- Query Benchmark (median ms per query) ---")
+    print(f"{'seasons':>7} {'query':<14} {'before':>10} {'after':>10} {'speedup':>8}")
+    for target, name, before, after in rows:
+        speedup = before / after if after else float("inf")
+        print(f"{target:>7} {name:<14} {before:>10.2f} {after:>10.2f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
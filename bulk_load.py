@@ -0,0 +1,86 @@
+import io
+from typing import List, Optional
+
+import pandas as pd
+
+
+def frame_to_csv(df: pd.DataFrame, columns: List[str]) -> io.StringIO:
+    """
+    Serialise `columns` of df as headerless CSV for COPY. Missing values are
+    written as empty unquoted fields, which COPY ... (FORMAT csv) reads as NULL.
+    Integer columns that can hold NULLs should be cast to pandas' nullable
+    "Int64" first so they are not written as floats ("12.0").
+    """
+    buf = io.StringIO()
+    df.to_csv(buf, columns=columns, index=False, header=False, na_rep="")
+    buf.seek(0)
+    return buf
+
+
+def copy_from_buffer(cur, sql: str, buf: io.StringIO):
+    """Run COPY ... FROM STDIN on either a psycopg2 or a psycopg 3 cursor."""
+    if hasattr(cur, "copy_expert"):
+        cur.copy_expert(sql, buf)
+    else:
+        with cur.copy(sql) as copy:
+            copy.write(buf.getvalue())
+
+
+def copy_frame(cur, table: str, df: pd.DataFrame, columns: List[str]):
+    cols = ", ".join(columns)
+    copy_from_buffer(cur, f"COPY {table} ({cols}) FROM STDIN WITH (FORMAT csv)", frame_to_csv(df, columns))
+
+
+def merge_frame(
+    conn,
+    df: pd.DataFrame,
+    target: str,
+    columns: List[str],
+    key_cols: List[str],
+    update_cols: Optional[List[str]] = None,
+    stage: Optional[str] = None,
+    temp: bool = False,
+    extra_set: Optional[List[str]] = None,
+    conflict_where: Optional[str] = None,
+) -> int:
+    """
+    Bulk upsert df into `target`:
+      1. COPY the rows into a staging table shaped like the target
+         (UNLOGGED, or session-local TEMP when temp=True)
+      2. INSERT ... SELECT DISTINCT ON (keys) ... ON CONFLICT DO UPDATE once
+
+    extra_set adds raw assignments to the update (e.g. "updated_at = now()");
+    conflict_where guards it (e.g. "games.status <> 'final'").
+
+    Runs inside the caller's transaction; the caller commits.
+    Returns the number of rows inserted or updated.
+    """
+    if df.empty:
+        return 0
+
+    stage = stage or f"{target}_stage"
+    update_cols = update_cols if update_cols is not None else [c for c in columns if c not in key_cols]
+
+    cols = ", ".join(columns)
+    keys = ", ".join(key_cols)
+    assignments = [f"{c} = EXCLUDED.{c}" for c in update_cols] + (extra_set or [])
+    if assignments:
+        on_conflict = "DO UPDATE SET " + ", ".join(assignments)
+        if conflict_where:
+            on_conflict += f" WHERE {conflict_where}"
+    else:
+        on_conflict = "DO NOTHING"
+
+    kind = "TEMP" if temp else "UNLOGGED"
+    with conn.cursor() as cur:
+        cur.execute(f"CREATE {kind} TABLE IF NOT EXISTS {stage} (LIKE {target} INCLUDING DEFAULTS)")
+        cur.execute(f"TRUNCATE {stage}")
+        copy_frame(cur, stage, df, columns)
+        cur.execute(f"""
+            INSERT INTO {target} ({cols})
+            SELECT DISTINCT ON ({keys}) {cols} FROM {stage}
+            ON CONFLICT ({keys}) {on_conflict};
+        """)
+        merged = cur.rowcount
+        cur.execute(f"TRUNCATE {stage}")
+    return merged
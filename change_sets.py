@@ -0,0 +1,118 @@
+from datetime import date
+from typing import Iterable, List, NamedTuple, Optional
+
+import pandas as pd
+
+
+# -----------------------------
+# Schema
+# -----------------------------
+CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS ingestion_changes (
+        change_id    BIGSERIAL PRIMARY KEY,
+        source       TEXT NOT NULL,
+        game_ids     TEXT[] NOT NULL,
+        team_ids     INTEGER[] NOT NULL,
+        date_from    DATE,
+        date_to      DATE,
+        created_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+        consumed_at  TIMESTAMPTZ
+    );
+    CREATE INDEX IF NOT EXISTS idx_ingestion_changes_pending
+        ON ingestion_changes(change_id) WHERE consumed_at IS NULL;
+"""
+
+
+class ChangeSet(NamedTuple):
+    change_ids: List[int]
+    game_ids: List[str]
+    team_ids: List[int]
+    date_from: Optional[date]
+    date_to: Optional[date]
+
+
+def ensure_table(conn):
+    with conn.cursor() as cur:
+        cur.execute(CREATE_SQL)
+    conn.commit()
+
+
+# -----------------------------
+# Emit (ingestors)
+# -----------------------------
+def emit(conn, source: str, game_ids: Iterable[str], team_ids: Iterable[int],
+         date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """
+    Record which games/teams an ingestor just wrote. Runs on the caller's
+    connection so it commits (or rolls back) together with the rows it
+    describes. Empty change sets are not recorded.
+    """
+    game_ids = sorted({str(g) for g in game_ids})
+    team_ids = sorted({int(t) for t in team_ids})
+    if not game_ids and not team_ids:
+        return
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO ingestion_changes (source, game_ids, team_ids, date_from, date_to)
+            VALUES (%s, %s, %s, %s, %s)
+            """,
+            (source, game_ids, team_ids, date_from, date_to),
+        )
+
+
+def emit_games(conn, source: str, games: pd.DataFrame, date_col: str = "game_date"):
+    """emit() for a frame with game_id / home_team_id / away_team_id / <date_col>."""
+    if games.empty:
+        return
+    dates = pd.to_datetime(games[date_col])
+    emit(
+        conn,
+        source,
+        games["game_id"],
+        pd.concat([games["home_team_id"], games["away_team_id"]]),
+        dates.min().date(),
+        dates.max().date(),
+    )
+
+
+# -----------------------------
+# Consume (feature refresh)
+# -----------------------------
+def claim_pending(conn) -> Optional[ChangeSet]:
+    """
+    Lock every unconsumed change set and merge them into one. Rows stay
+    locked until the caller's transaction ends, so two refreshes cannot
+    consume the same change; call mark_consumed() before committing.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT change_id, game_ids, team_ids, date_from, date_to
+            FROM ingestion_changes
+            WHERE consumed_at IS NULL
+            ORDER BY change_id
+            FOR UPDATE SKIP LOCKED
+            """
+        )
+        rows = cur.fetchall()
+    if not rows:
+        return None
+
+    dates_from = [r[3] for r in rows if r[3] is not None]
+    dates_to = [r[4] for r in rows if r[4] is not None]
+    return ChangeSet(
+        change_ids=[r[0] for r in rows],
+        game_ids=sorted({g for r in rows for g in r[1]}),
+        team_ids=sorted({t for r in rows for t in r[2]}),
+        date_from=min(dates_from) if dates_from else None,
+        date_to=max(dates_to) if dates_to else None,
+    )
+
+
+def mark_consumed(conn, change_ids: List[int]):
+    with conn.cursor() as cur:
+        cur.execute(
+            "UPDATE ingestion_changes SET consumed_at = now() WHERE change_id = ANY(%s)",
+            (change_ids,),
+        )
@@ -1,12 +1,13 @@
 import sys
-import time
 import pandas as pd
 from nba_api.stats.endpoints import boxscoresummaryv2
 from nba_api.stats.endpoints import leaguegamelog
 
+import nba_client
+
 # 1. Get a list of Game IDs for Mondays vs Saturdays
 print("Fetching Game Log...")
-log = leaguegamelog.LeagueGameLog(season='2025-26', player_or_team_abbreviation='T')
+log = nba_client.fetch(leaguegamelog.LeagueGameLog, season='2025-26', player_or_team_abbreviation='T')
 games = log.get_data_frames()[0]
 
 # Convert date string to datetime
@@ -21,38 +22,33 @@ sat_games = unique_games[unique_games['DAY_OF_WEEK'] == 5]['GAME_ID'].tolist()[:
 
 print(f"Sampling {len(mon_games)} Monday games and {len(sat_games)} Saturday games...")
 
-def get_attendance(game_id):
-    try:
-        # boxscoresummaryv2 returns a dataset called 'GameInfo' (index 4 or similar)
-        summary = boxscoresummaryv2.BoxScoreSummaryV2(game_id=game_id)
-        # GameInfo is usually the 2nd dataframe returned (index 1)
-        # Columns: GAME_DATE, ATTENDANCE, GAME_TIME
-        game_info = summary.game_info.get_data_frame()
-        if not game_info.empty:
-            return game_info['ATTENDANCE'].iloc[0]
-    except Exception as e:
-        return None
+def get_attendance(summary):
+    # boxscoresummaryv2 returns a dataset called 'GameInfo' (index 4 or similar)
+    # Columns: GAME_DATE, ATTENDANCE, GAME_TIME
+    game_info = summary.game_info.get_data_frame()
+    if not game_info.empty:
+        return game_info['ATTENDANCE'].iloc[0]
     return None
 
+def check_days(day, game_ids):
+    param_list = [{"game_id": gid} for gid in game_ids]
+    for params, summary, err in nba_client.fetch_many(boxscoresummaryv2.BoxScoreSummaryV2, param_list):
+        if err is not None:
+            continue
+        att = get_attendance(summary)
+        if att:
+            print(f"Game {params['game_id']}: {att:,}")
+            data.append({'Day': day, 'Attendance': att})
+
 data = []
 
 # Loop Monday
 print("\n--- Checking MONDAY Attendance ---")
-for gid in mon_games:
-    att = get_attendance(gid)
-    if att:
-        print(f"Game {gid}: {att:,}")
-        data.append({'Day': 'Monday', 'Attendance': att})
-    time.sleep(0.6)
+check_days('Monday', mon_games)
 
 # Loop Saturday
 print("\n--- Checking SATURDAY Attendance ---")
-for gid in sat_games:
-    att = get_attendance(gid)
-    if att:
-        print(f"Game {gid}: {att:,}")
-        data.append({'Day': 'Saturday', 'Attendance': att})
-    time.sleep(0.6)
+check_days('Saturday', sat_games)
 
 # Final Verdict
 df = pd.DataFrame(data)
@@ -23,24 +23,11 @@ def main():
     run_script("fetch_schedule.py")     
     run_script("fetch_latest_games.py") 
     run_script("fetch_player_logs.py")  
+    run_script("ingest_team_stats.py")   # whole season's team stats in 2 calls
 
     # 2. Update Officiating Intelligence
-   # print("\n>>> Patching Referee Metadata...")
-   # run_script("backfill_officials.py") 
-   # run_script("patch_player_fouls.py")
-   # run_script("patch_games_period_fouls.py") 
-
-    # 3. Refresh the Master Ref Profiles View
-  #  try:
-   #     from db_config import get_db_connection
-   #     conn = get_db_connection()
-   #     with conn.cursor() as cur:
-   #         print(">>> Refreshing Ref Master Profiles View...")
-   ##         cur.execute("REFRESH MATERIALIZED VIEW mv_ref_master_profiles;")
-   #         conn.commit()
-   #     conn.close()
-   # except Exception as e:
-   #     print(f"⚠️ Warning: Could not refresh ref view: {e}")
+    #    (bulk-loads game_officials and refreshes mv_ref_master_profiles when new rows land)
+    run_script("ingest_officials.py", ["--limit", "500"])
 
     # 4. Retrain Models
     models = ["train_advanced_win.py", "train_advanced_margin.py", "train_advanced_total.py"]
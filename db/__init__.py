@@ -0,0 +1,42 @@
+"""
+Shared database access: one bounded connection pool per process, with
+settings from db_config.py.
+
+    from db import get_db_conn, connection, read_frame, read_frame_binary
+
+    conn = get_db_conn()          # conn.close() returns it to the pool
+    with connection() as conn:    # same, scoped; rolls back on error
+        df = read_frame(conn, sql)  # server-side cursor, streamed in batches
+        df = read_frame_binary(conn, sql)  # binary COPY, decoded into NumPy
+"""
+from db.pool import (
+    ConnectionPool,
+    PooledConnection,
+    aconnection,
+    close_pool,
+    configure,
+    connection,
+    get_db_conn,
+    get_engine,
+    get_pool,
+)
+from db.binary_copy import read_arrow, read_columns, read_frame_binary
+from db.stream import iter_batches, iter_frames, read_frame
+
+__all__ = [
+    "ConnectionPool",
+    "PooledConnection",
+    "aconnection",
+    "close_pool",
+    "configure",
+    "connection",
+    "get_db_conn",
+    "get_engine",
+    "get_pool",
+    "iter_batches",
+    "iter_frames",
+    "read_arrow",
+    "read_columns",
+    "read_frame",
+    "read_frame_binary",
+]
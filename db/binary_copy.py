@@ -0,0 +1,315 @@
+import os
+import struct
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from psycopg2 import extensions
+
+
+SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+TRAILER = b"\xff\xff"
+
+# Fixed-width types and their big-endian wire layout
+WIRE_DTYPES = {
+    16: "?",                    # bool
+    21: ">i2", 23: ">i4", 20: ">i8",
+    700: ">f4", 701: ">f8",
+    1082: ">i4",                # date: days since 2000-01-01
+    1114: ">i8", 1184: ">i8",   # timestamp(tz): microseconds since 2000-01-01
+}
+FLOAT_OIDS = {700, 701}
+INT_OIDS = {20, 21, 23}
+BOOL_OID = 16
+NUMERIC_OID = 1700
+DATE_OID = 1082
+TIMESTAMPTZ_OID = 1184
+
+# Stand-ins for NULL in fixed-width columns; a separate flag column marks them.
+# Typed, so COALESCE keeps the column's own width (a bare 0 would widen int2 to int4).
+NULL_FILL = {
+    16: "false", 20: "0::int8", 21: "0::int2", 23: "0::int4",
+    1082: "'2000-01-01'::date",
+    1114: "'2000-01-01'::timestamp",
+    1184: "'2000-01-01'::timestamptz",
+}
+PG_EPOCH_DAY = np.datetime64("2000-01-01", "D")
+PG_EPOCH_US = np.datetime64("2000-01-01T00:00:00", "us")
+
+# Raw COPY bytes buffered before the complete rows in them are decoded
+CHUNK_BYTES = int(os.getenv("DB_COPY_CHUNK_BYTES", str(8 * 1024 * 1024)))
+
+Columns = Dict[str, np.ndarray]
+_field_len = struct.Struct(">i").unpack_from
+
+
+# -----------------------------
+# Query rewrite
+# -----------------------------
+def _describe(cur, sql: str):
+    cur.execute(f"SELECT * FROM ({sql}) q LIMIT 0")
+    return [(d.name, d.type_code) for d in cur.description]
+
+
+def _plan(cur, described):
+    """
+    The COPY select list and how to read it back. NUMERIC goes over the
+    wire as float8, fixed-width columns never carry a NULL (floats use
+    NaN, the rest a fill value plus an `IS NULL` flag), so every row's
+    fixed-width block has the same size. Anything else is sent as text,
+    after all fixed-width fields.
+    """
+    fixed, var = [], []
+    for name, oid in described:
+        col = f"q.{extensions.quote_ident(name, cur)}"
+        if oid == NUMERIC_OID:
+            col, oid = f"{col}::float8", 701
+        if oid in FLOAT_OIDS:
+            fixed.append((name, oid, f"COALESCE({col}, 'NaN')", None))
+        elif oid in WIRE_DTYPES:
+            fixed.append((name, oid, f"COALESCE({col}, {NULL_FILL[oid]})", f"{col} IS NULL"))
+        else:
+            var.append((name, f"{col}::text"))
+    return fixed, var
+
+
+def _copy_sql(sql: str, fixed, var) -> str:
+    select = []
+    for _, _, value, flag in fixed:
+        select.append(value)
+        if flag:
+            select.append(flag)
+    select += [expr for _, expr in var]
+    return f"COPY (SELECT {', '.join(select)} FROM ({sql}) q) TO STDOUT (FORMAT binary)"
+
+
+# -----------------------------
+# Decode
+# -----------------------------
+def _row_dtype(fixed) -> np.dtype:
+    """One row's fixed-width block: field count, then (length, value) per field."""
+    fields = [("n", ">i2")]
+    for i, (_, oid, _, flag) in enumerate(fixed):
+        fields += [(f"l{i}", ">i4"), (f"v{i}", WIRE_DTYPES[oid])]
+        if flag:
+            fields += [(f"fl{i}", ">i4"), (f"f{i}", "?")]
+    return np.dtype(fields)
+
+
+def _header_size(buf: memoryview) -> int:
+    if buf[:len(SIGNATURE)] != SIGNATURE:
+        raise ValueError("not a binary COPY stream")
+    (ext,) = _field_len(buf, len(SIGNATURE) + 4)
+    return len(SIGNATURE) + 8 + ext
+
+
+def _split_rows(buf: memoryview, row_size: int, n_var: int):
+    """
+    Walk the complete rows at the start of buf once: where each starts,
+    its variable-width fields (which always trail the fixed-width block)
+    and where the last one ends. Stops at the trailer or at a row the end
+    of the buffer cuts off.
+    """
+    starts: List[int] = []
+    values: List[list] = [[] for _ in range(n_var)]
+    pos, end = 0, len(buf)
+    while pos + row_size <= end and buf[pos:pos + len(TRAILER)] != TRAILER:
+        row_end, fields = pos + row_size, []
+        for _ in range(n_var):
+            if row_end + 4 > end:
+                break
+            (size,) = _field_len(buf, row_end)
+            row_end += 4
+            if size < 0:
+                fields.append(None)
+            elif row_end + size > end:
+                break
+            else:
+                fields.append(buf[row_end:row_end + size])
+                row_end += size
+        if len(fields) < n_var:
+            break
+        starts.append(pos)
+        for out, value in zip(values, fields):
+            out.append(value)
+        pos = row_end
+    return np.asarray(starts, dtype=np.int64), values, pos
+
+
+def _gather(buf: memoryview, starts: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """The fixed-width block of every row, copied into one structured array."""
+    if not len(starts):
+        return np.empty(0, dtype=dtype)
+    raw = np.frombuffer(buf, dtype=np.uint8)
+    block = np.empty((len(starts), dtype.itemsize), dtype=np.uint8)
+    for j in range(dtype.itemsize):
+        block[:, j] = raw[starts + j]
+    return block.view(dtype).reshape(-1)
+
+
+def _fixed_column(rows: np.ndarray, i: int, oid: int, flagged: bool) -> np.ndarray:
+    """
+    One decoded column, always a fresh array (never a view of the COPY
+    bytes). Timestamptz stays naive UTC here; read_columns localizes it.
+    """
+    values = rows[f"v{i}"]
+    nulls = rows[f"f{i}"] if flagged else None
+    has_nulls = nulls is not None and nulls.any()
+    if oid in FLOAT_OIDS:
+        return values.astype(np.float64)
+    if oid in INT_OIDS:
+        if has_nulls:                                   # NULLs -> NaN, like read_sql
+            out = values.astype(np.float64)
+            out[nulls] = np.nan
+            return out
+        return values.astype(np.int64)
+    if oid == BOOL_OID:
+        if has_nulls:
+            out = values.astype(object)
+            out[nulls] = None
+            return out
+        return values.astype(bool)
+    if oid == DATE_OID:
+        out = (PG_EPOCH_DAY + values.astype("timedelta64[D]")).astype("datetime64[ns]")
+    else:
+        out = (PG_EPOCH_US + values.astype("timedelta64[us]")).astype("datetime64[ns]")
+    if has_nulls:
+        out[nulls] = np.datetime64("NaT")
+    return out
+
+
+def _text_column(values: list, encoding: str) -> np.ndarray:
+    out = np.empty(len(values), dtype=object)
+    out[:] = [str(v, encoding) if v is not None else None for v in values]
+    return out
+
+
+class _ChunkDecoder:
+    """
+    File-like sink for copy_expert(). Holds at most about chunk_bytes of
+    the COPY stream: whenever that fills up, the complete rows in it are
+    decoded into column arrays and their bytes dropped, so a large result
+    never sits in memory as raw COPY data next to its decoded columns.
+    """
+
+    def __init__(self, fixed, var, encoding: str, chunk_bytes: int = CHUNK_BYTES):
+        self.fixed = fixed
+        self.var = var
+        self.encoding = encoding
+        self.chunk_bytes = chunk_bytes
+        self.dtype = _row_dtype(fixed)
+        self.buf = bytearray()
+        self.header_done = False
+        self.parts: List[List[np.ndarray]] = []    # per chunk, one array per column
+
+    def write(self, data) -> int:
+        self.buf += data
+        if len(self.buf) >= self.chunk_bytes:
+            self._decode()
+        return len(data)
+
+    def _decode(self):
+        if not self.header_done:
+            if len(self.buf) < len(SIGNATURE) + 8:
+                return
+            size = _header_size(memoryview(self.buf))
+            if len(self.buf) < size:
+                return
+            del self.buf[:size]
+            self.header_done = True
+        view = memoryview(self.buf)
+        columns, end = self._decode_rows(view)
+        view.release()
+        if end:
+            self.parts.append(columns)
+            del self.buf[:end]
+
+    def _decode_rows(self, buf: memoryview):
+        """The complete rows at the start of buf as column arrays, and the bytes they used."""
+        row_size = self.dtype.itemsize
+        if self.var:
+            starts, var_values, end = _split_rows(buf, row_size, len(self.var))
+            rows = _gather(buf, starts, self.dtype)
+        else:
+            # Every row is the same size; the 2-byte trailer never makes a whole one
+            count = len(buf) // row_size
+            end = count * row_size
+            rows = np.frombuffer(buf, dtype=self.dtype, count=count) if count else np.empty(0, dtype=self.dtype)
+            var_values = []
+
+        for i, (_, oid, _, _) in enumerate(self.fixed):
+            if len(rows) and (rows[f"l{i}"] != np.dtype(WIRE_DTYPES[oid]).itemsize).any():
+                raise ValueError("binary COPY rows do not match the expected layout")
+        columns = [_fixed_column(rows, i, oid, bool(flag)) for i, (_, oid, _, flag) in enumerate(self.fixed)]
+        columns += [_text_column(values, self.encoding) for values in var_values]
+        return columns, end
+
+    def columns(self) -> Columns:
+        """Decode what is left and join the chunks: {column: ndarray}, fixed-width columns first."""
+        self._decode()
+        if not self.header_done:
+            raise ValueError("not a binary COPY stream")
+        if self.buf != TRAILER:
+            raise ValueError("binary COPY stream is truncated")
+        if not self.parts:
+            # No rows: one empty chunk still gives every column its dtype
+            self.parts.append(self._decode_rows(memoryview(b""))[0])
+
+        names = [name for name, _, _, _ in self.fixed] + [name for name, _ in self.var]
+        oids = [oid for _, oid, _, _ in self.fixed] + [None] * len(self.var)
+        out = {}
+        for j, (name, oid) in enumerate(zip(names, oids)):
+            arrays = [part[j] for part in self.parts]
+            column = arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+            if oid == TIMESTAMPTZ_OID:
+                column = pd.DatetimeIndex(column).tz_localize("UTC")
+            out[name] = column
+        self.parts.clear()
+        return out
+
+
+# -----------------------------
+# Public
+# -----------------------------
+def read_columns(conn, sql: str, params=None) -> Columns:
+    """
+    Run `sql` through COPY ... TO STDOUT (FORMAT binary) and decode the
+    stream straight into {column: ndarray}, in the query's column order.
+
+    NUMERIC arrives as float8, so no Decimal is ever built. The stream is
+    decoded every CHUNK_BYTES as it arrives, so memory stays bounded by the
+    decoded columns plus one chunk of COPY bytes. Fixed-width chunks
+    (numbers, booleans, dates, timestamps) are one np.frombuffer each; text
+    columns cost one Python step per row to find the row boundaries, and
+    their values are decoded to str. Integers with NULLs become float64
+    (NaN) and dates / timestamps datetime64[ns] (NaT).
+
+    Column names must be unique: alias duplicates in the query.
+    Reads in conn's current transaction; nothing is committed.
+    """
+    with conn.cursor() as cur:
+        sql = sql.strip().rstrip(";")
+        if params is not None:
+            sql = cur.mogrify(sql, params).decode(extensions.encodings[conn.encoding])
+        described = _describe(cur, sql)
+        names = [name for name, _ in described]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"duplicate column names in query (alias them): {', '.join(duplicates)}")
+        fixed, var = _plan(cur, described)
+        sink = _ChunkDecoder(fixed, var, extensions.encodings[conn.encoding])
+        cur.copy_expert(_copy_sql(sql, fixed, var), sink)
+
+    out = sink.columns()
+    return {name: out[name] for name in names}
+
+
+def read_frame_binary(conn, sql: str, params=None) -> pd.DataFrame:
+    """read_columns() as a DataFrame: a faster pd.read_sql for wide numeric results."""
+    return pd.DataFrame(read_columns(conn, sql, params), copy=False)
+
+
+def read_arrow(conn, sql: str, params=None):
+    """read_columns() as a pyarrow.Table (needs pyarrow)."""
+    import pyarrow as pa
+    return pa.table(read_columns(conn, sql, params))
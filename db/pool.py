@@ -0,0 +1,182 @@
+import os
+import atexit
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+
+from psycopg2 import extensions
+from psycopg2 import pool as pg_pool
+
+import db_config
+
+
+MIN_CONNECTIONS = int(os.getenv("DB_POOL_MIN", "1"))
+MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX", "8"))
+CHECKOUT_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "60"))   # seconds to wait for a free connection
+
+
+class PooledConnection(extensions.connection):
+    """
+    A psycopg2 connection whose close() hands it back to its pool, so the
+    usual `conn = get_db_conn() ... conn.close()` pattern reuses backends.
+    """
+    _owner = None
+
+    def close(self):
+        owner, self._owner = self._owner, None
+        if owner is None or self.closed:
+            return super().close()
+        owner.release(self)
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool. When all `maxconn` connections are checked
+    out, callers wait (up to `timeout`) instead of failing, so any number of
+    worker threads share a fixed set of backend connections.
+    """
+
+    def __init__(self, minconn: int = MIN_CONNECTIONS, maxconn: int = MAX_CONNECTIONS,
+                 timeout: float = CHECKOUT_TIMEOUT, **params):
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._pool = pg_pool.ThreadedConnectionPool(
+            minconn, maxconn, connection_factory=PooledConnection, **params
+        )
+
+    def acquire(self) -> PooledConnection:
+        if not self._slots.acquire(timeout=self.timeout):
+            raise pg_pool.PoolError(f"no database connection free after {self.timeout:.0f}s")
+        try:
+            conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+        conn._owner = self
+        return conn
+
+    def release(self, conn: PooledConnection):
+        """
+        Return a connection. Uncommitted work is rolled back (as a real
+        close() would) and autocommit is reset; broken connections are
+        discarded and replaced on a later checkout.
+        """
+        if self._pool.closed:   # shutting down: just drop it
+            extensions.connection.close(conn)
+            self._slots.release()
+            return
+        try:
+            status = extensions.TRANSACTION_STATUS_UNKNOWN if conn.closed else conn.get_transaction_status()
+            broken = status == extensions.TRANSACTION_STATUS_UNKNOWN
+            if not broken:
+                if status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                conn.autocommit = False
+            self._pool.putconn(conn, close=broken)
+        except Exception:
+            self._pool.putconn(conn, close=True)
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        self._pool.closeall()
+
+
+# -----------------------------
+# Process-wide pool
+# -----------------------------
+_lock = threading.Lock()
+_pool: Optional[ConnectionPool] = None
+_pool_pid: Optional[int] = None
+
+
+def get_pool() -> ConnectionPool:
+    """The process's pool, created on first use. A forked child gets its own."""
+    global _pool, _pool_pid
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ConnectionPool(**db_config.connection_params())
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def configure(**kwargs) -> ConnectionPool:
+    """
+    Replace the process's pool, e.g. configure(maxconn=2 * workers + 1)
+    before starting threads that each hold one connection and may check
+    out a second.
+    """
+    global _pool, _pool_pid
+    with _lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close_all()
+        _pool = ConnectionPool(**{**db_config.connection_params(), **kwargs})
+        _pool_pid = os.getpid()
+        return _pool
+
+
+def close_pool():
+    global _pool
+    with _lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close_all()
+        _pool = None
+
+
+atexit.register(close_pool)
+
+
+# -----------------------------
+# Checkout
+# -----------------------------
+def get_db_conn() -> PooledConnection:
+    """Check out a connection; conn.close() returns it to the pool."""
+    return get_pool().acquire()
+
+
+@contextmanager
+def connection():
+    """
+    `with connection() as conn:` checks out a connection for this thread,
+    rolls back on error and always returns it. The caller commits.
+    """
+    conn = get_db_conn()
+    try:
+        yield conn
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+@asynccontextmanager
+async def aconnection():
+    """Async checkout: waiting for a free connection does not block the event loop."""
+    conn = await asyncio.to_thread(get_db_conn)
+    try:
+        yield conn
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+_engine = None
+
+
+def get_engine():
+    """
+    SQLAlchemy engine drawing from the same pool (NullPool on the SQLAlchemy
+    side, so connections are not pooled twice).
+    """
+    global _engine
+    if _engine is None:
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import NullPool
+        _engine = create_engine("postgresql+psycopg2://", creator=get_db_conn, poolclass=NullPool)
+    return _engine
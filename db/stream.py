@@ -0,0 +1,93 @@
+import itertools
+import os
+from typing import Dict, Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+from psycopg2 import extensions
+
+
+BATCH_ROWS = int(os.getenv("DB_STREAM_BATCH_ROWS", "50000"))
+
+# Postgres type OIDs that come back as numbers
+INT_OIDS = {20, 21, 23}            # int8, int2, int4
+FLOAT_OIDS = {700, 701, 1700}      # float4, float8, numeric
+BOOL_OID = 16
+
+# NUMERIC -> float instead of Decimal, on streaming cursors only
+DEC2FLOAT = extensions.new_type(
+    extensions.DECIMAL.values, "DEC2FLOAT",
+    lambda value, cur: float(value) if value is not None else None,
+)
+
+Columns = Dict[str, np.ndarray]
+_cursor_ids = itertools.count()
+
+
+def _column(values: Sequence, oid: int) -> np.ndarray:
+    if oid in FLOAT_OIDS:
+        return np.array(values, dtype=np.float64)           # None -> NaN
+    if oid in INT_OIDS:
+        if None in values:
+            return np.array(values, dtype=np.float64)       # NULLs -> NaN, like read_sql
+        return np.array(values, dtype=np.int64)
+    if oid == BOOL_OID and None not in values:
+        return np.array(values, dtype=bool)
+    out = np.empty(len(values), dtype=object)
+    out[:] = values
+    return out
+
+
+def _stream(conn, sql: str, params, batch_size: int):
+    """Yields the column names first, then one {column: ndarray} per batch."""
+    with conn.cursor(name=f"stream_{os.getpid()}_{next(_cursor_ids)}") as cur:
+        extensions.register_type(DEC2FLOAT, cur)
+        cur.itersize = batch_size
+        # DECLARE ... CURSOR FOR <sql> does not accept a trailing semicolon
+        cur.execute(sql.strip().rstrip(";"), params)
+        rows = cur.fetchmany(batch_size)
+        # a named cursor's description is only set after the first fetch
+        names = [d.name for d in cur.description]
+        oids = [d.type_code for d in cur.description]
+        yield names
+        while rows:
+            cols = list(zip(*rows))
+            del rows
+            yield {name: _column(values, oid) for name, values, oid in zip(names, cols, oids)}
+            rows = cur.fetchmany(batch_size)
+
+
+def iter_batches(conn, sql: str, params=None, batch_size: int = BATCH_ROWS) -> Iterator[Columns]:
+    """
+    Run `sql` on a server-side (named) cursor and yield {column: ndarray}
+    batches of up to batch_size rows. Only one batch of Python row tuples
+    exists at a time. Numbers come back as int64/float64 arrays and
+    booleans as bool arrays; everything else is an object array.
+
+    Named cursors live inside a transaction, so conn must not be in
+    autocommit mode. Nothing is committed.
+    """
+    stream = _stream(conn, sql, params, batch_size)
+    next(stream)
+    yield from stream
+
+
+def iter_frames(conn, sql: str, params=None, batch_size: int = BATCH_ROWS) -> Iterator[pd.DataFrame]:
+    """iter_batches() as DataFrames, for consumers that process chunk by chunk."""
+    for batch in iter_batches(conn, sql, params, batch_size):
+        yield pd.DataFrame(batch, copy=False)
+
+
+def read_frame(conn, sql: str, params=None, batch_size: int = BATCH_ROWS) -> pd.DataFrame:
+    """
+    Drop-in for pd.read_sql(sql, conn) with bounded peak memory: the
+    result is streamed in batches and each column is concatenated from
+    typed arrays, never held as one list of Python rows.
+    """
+    stream = _stream(conn, sql, params, batch_size)
+    names = next(stream)
+    batches = list(stream)
+    if not batches:
+        return pd.DataFrame(columns=names)
+    data = {name: np.concatenate([b.pop(name) for b in batches]) for name in names}
+    return pd.DataFrame(data, copy=False)
@@ -7,15 +7,23 @@ from dotenv import load_dotenv
 # 1. Load the variables from .env into Python's memory
 load_dotenv()
 
+# 2. One place for connection settings. DB_* wins, then the libpq PG*
+#    variables some scripts used, then the docker-compose defaults.
+def _env(name, pg_name, default):
+    return os.getenv(name) or os.getenv(pg_name) or default
+
+def connection_params():
+    return {
+        "host": _env("DB_HOST", "PGHOST", "localhost"),
+        "port": int(_env("DB_PORT", "PGPORT", "5432")),
+        "dbname": _env("DB_NAME", "PGDATABASE", "nba"),
+        "user": _env("DB_USER", "PGUSER", "nba_user"),
+        "password": _env("DB_PASSWORD", "PGPASSWORD", "nba_pass"),
+    }
+
 def get_db_connection():
     try:
-        conn = psycopg2.connect(
-            host=os.getenv('DB_HOST'),
-            port=os.getenv('DB_PORT'),
-            database=os.getenv('DB_NAME'),
-            user=os.getenv('DB_USER'),
-            password=os.getenv('DB_PASSWORD')
-        )
+        conn = psycopg2.connect(**connection_params())
         # This allows us to access columns by name (row['performance_score'])
         # instead of index (row[5]), matching the logic we wrote earlier.
         return conn
@@ -25,4 +33,4 @@ def get_db_connection():
 
 def get_cursor(conn):
     # Returns a cursor that acts like a dictionary
-    return conn.cursor(cursor_factory=RealDictCursor)
\ No newline at end of file
+    return conn.cursor(cursor_factory=RealDictCursor)
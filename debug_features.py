@@ -1,19 +1,5 @@
-import sys
-import os
-import psycopg2
 from psycopg2.extras import RealDictCursor
-
-# Config
-DB_HOST = os.getenv("PGHOST", "localhost")
-DB_NAME = os.getenv("PGDATABASE", "nba")
-DB_USER = os.getenv("PGUSER", "nba_user")
-DB_PASS = os.getenv("PGPASSWORD")
-
-def get_db_conn():
-    if not DB_PASS:
-        print("Error: PGPASSWORD environment variable not set.")
-        sys.exit(1)
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
+from db import get_db_conn
 
 def main():
     print("\n--- DEBUGGING FEATURE INPUTS ---\n")
@@ -1,20 +1,7 @@
-import os
 import sys
 import pandas as pd
-import psycopg2
 from psycopg2.extras import RealDictCursor
-
-# Config
-DB_HOST = os.getenv("PGHOST", "localhost")
-DB_NAME = os.getenv("PGDATABASE", "nba")
-DB_USER = os.getenv("PGUSER", "nba_user")
-DB_PASS = os.getenv("PGPASSWORD")
-
-def get_db_conn():
-    if not DB_PASS:
-        print("Error: PGPASSWORD not set.")
-        sys.exit(1)
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
+from db import get_db_conn
 
 def main():
     days = 7
@@ -1,93 +1,69 @@
-import os
-import sys
 import pandas as pd
-import psycopg2
 from datetime import datetime
 from dotenv import load_dotenv
 from nba_api.stats.endpoints import leaguegamefinder
 
-load_dotenv()
+import change_sets
+import nba_client
+import watermarks
+from game_pairing import pair_home_away
+from games_writer import write_games
+from db import get_db_conn
 
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "nba")
-DB_USER = os.getenv("DB_USER", "nba_user")
-DB_PASS = os.getenv("DB_PASSWORD")
+load_dotenv()
 
-def get_db_conn():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
+SEASON = '2025-26'
+WATERMARK_KEY = ('fetch_latest_games', 'leaguegamefinder')
+LATEST_COLUMNS = [
+    'game_id', 'game_date', 'game_date_et', 'home_team_id', 'away_team_id',
+    'home_pts', 'away_pts', 'status',
+]
 
 def update_games():
     print("--- Updating Game Scores ---")
     
-    # 1. Fetch all games for this season (2025-26)
+    conn = get_db_conn()
+    watermarks.ensure_table(conn)
+    change_sets.ensure_table(conn)
+    wm = watermarks.get_watermark(conn, *WATERMARK_KEY)
+
+    # 1. Fetch this season's games from the watermark day onwards
+    #    (the whole season on the first run)
+    params = {'season_nullable': SEASON, 'league_id_nullable': '00'}
+    if wm and wm.last_game_date:
+        params['date_from_nullable'] = watermarks.api_date(wm.last_game_date)
+        print(f"Watermark: {wm.last_game_date} ({wm.last_game_id}). Fetching delta...")
     try:
-        gamefinder = leaguegamefinder.LeagueGameFinder(season_nullable='2025-26', league_id_nullable='00')
+        gamefinder = nba_client.fetch(leaguegamefinder.LeagueGameFinder, **params)
         df = gamefinder.get_data_frames()[0]
     except Exception as e:
         print(f"Error fetching from NBA API: {e}")
+        conn.close()
         return
 
-    conn = get_db_conn()
-    cur = conn.cursor()
-    
-    games_by_id = df.groupby('GAME_ID')
-    
-    new_count = 0
-    error_count = 0
-    
-    print(f"Processing {len(games_by_id)} games from API...")
-
-    for game_id, rows in games_by_id:
-        if len(rows) != 2:
-            continue 
-            
-        row1 = rows.iloc[0]
-        row2 = rows.iloc[1]
-        
-        # Identify Home vs Away
-        if '@' in row1['MATCHUP']:
-            away_row, home_row = row1, row2
-        else:
-            home_row, away_row = row1, row2
-            
-        try:
-            # FIX: We insert into BOTH game_date and game_date_et
-            sql = """
-                INSERT INTO games (
-                    game_id, game_date, game_date_et, home_team_id, away_team_id, 
-                    home_pts, away_pts, status
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (game_id) DO UPDATE SET
-                    home_pts = EXCLUDED.home_pts,
-                    away_pts = EXCLUDED.away_pts,
-                    status = EXCLUDED.status,
-                    game_date = EXCLUDED.game_date; 
-            """
-            
-            # The API gives date as YYYY-MM-DD
-            g_date = home_row['GAME_DATE']
+    games = pair_home_away(df)
+    games = games[games['home_pts'].notna() & games['away_pts'].notna()]
+    print(f"Processing {len(games)} games from API...")
 
-            cur.execute(sql, (
-                game_id,
-                g_date, # Fills 'game_date' (Required)
-                g_date, # Fills 'game_date_et' (For consistency)
-                int(home_row['TEAM_ID']),
-                int(away_row['TEAM_ID']),
-                int(home_row['PTS']),
-                int(away_row['PTS']),
-                'Final'
-            ))
-            
-            conn.commit()
-            new_count += 1
-            
-        except Exception as e:
-            conn.rollback() # Important: Reset if one fails so others can continue
-            print(f"Error inserting game {game_id}: {e}")
-            error_count += 1
+    # FIX: We insert into BOTH game_date and game_date_et
+    games = games.assign(game_date_et=games['game_date'], status='Final')
+    try:
+        # One staged upsert + change set + watermark, committed together
+        count = write_games(
+            conn, games, LATEST_COLUMNS,
+            update_cols=['home_pts', 'away_pts', 'status', 'game_date'],
+        )
+        change_sets.emit_games(conn, 'fetch_latest_games', games)
+        watermarks.advance_from_frame(conn, *WATERMARK_KEY, games, 'game_date', 'game_id')
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        conn.close()
+        print(f"Error writing games: {e}")
+        return
 
     conn.close()
-    print(f"Processed. Success: {new_count}, Errors: {error_count}")
+    print(f"Processed. Upserted: {count}")
 
 if __name__ == "__main__":
     update_games()
\ No newline at end of file
@@ -6,18 +6,31 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from nba_api.stats.endpoints import leaguegamelog
 
-load_dotenv()
+import nba_client
+import nba_parse
+import watermarks
+from bulk_load import merge_frame
+from seasons import SEASON_START_MONTH, season_from_date
+from db import get_db_conn
 
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "nba")
-DB_USER = os.getenv("DB_USER", "nba_user")
-DB_PASS = os.getenv("DB_PASSWORD")
+load_dotenv()
 
 # Config
 SEASONS_TO_TRACK = ['2023-24', '2024-25', '2025-26'] 
+WATERMARK_KEY = ('fetch_player_logs', 'leaguegamelog_p')
 
-def get_db_conn():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
+LOG_COLUMNS = [
+    'game_id', 'player_id', 'game_date', 'matchup', 'wl', 'min',
+    'pts', 'reb', 'ast', 'stl', 'blk', 'tov',
+    'fgm', 'fga', 'fg3m', 'fg3a', 'ftm', 'fta', 'plus_minus',
+]
+INT_COLUMNS = [
+    'player_id', 'pts', 'reb', 'ast', 'stl', 'blk', 'tov',
+    'fgm', 'fga', 'fg3m', 'fg3a', 'ftm', 'fta', 'plus_minus',
+]
+# Only these LeagueGameLog columns are parsed out of the response
+API_COLUMNS = [c.upper() for c in LOG_COLUMNS]
+API_DTYPES = {c.upper(): 'float' for c in INT_COLUMNS}   # None -> NaN, cast to Int64 on upsert
 
 def get_latest_log_date():
     """Finds the latest game date currently in the DB."""
@@ -35,12 +48,14 @@ def get_latest_log_date():
         conn.close()
     return latest
 
-def create_logs_table_if_not_exists():
-    conn = get_db_conn()
-    cur = conn.cursor()
-    # Same schema as before
-    sql = """
-        CREATE TABLE IF NOT EXISTS player_logs (
+# player_logs is range-partitioned by season on game_date, so the primary
+# key has to carry game_date too. Partitions are keyed by
+# seasons.season_from_date and bounded on its Oct 1 boundary.
+LOG_KEYS = ['game_id', 'player_id', 'game_date']
+
+def logs_table_ddl(table='player_logs'):
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
             game_id TEXT,
             player_id INT,
             game_date DATE,
@@ -60,125 +75,158 @@ def create_logs_table_if_not_exists():
             ftm INT,
             fta INT,
             plus_minus INT,
-            PRIMARY KEY (game_id, player_id)
-        );
+            PRIMARY KEY (game_id, player_id, game_date)
+        ) PARTITION BY RANGE (game_date);
+        CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT;
+        -- props: WHERE player_id = ? ORDER BY game_date DESC LIMIT 20, index-only
+        CREATE INDEX IF NOT EXISTS idx_{table}_player_date
+            ON {table} (player_id, game_date DESC) INCLUDE (pts, reb, ast, min);
+        -- delta watermark MAX(game_date) and date windows
+        CREATE INDEX IF NOT EXISTS idx_{table}_date ON {table} (game_date);
     """
-    cur.execute(sql)
+
+def ensure_log_partitions(cur, years, table='player_logs'):
+    """
+    One partition per season start year. Must run before rows for a new
+    season are written: a partition cannot be attached over rows that
+    already landed in the default partition.
+    """
+    for year in sorted(set(years)):
+        cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table}_{year} PARTITION OF {table}
+            FOR VALUES FROM ('{year}-{SEASON_START_MONTH:02d}-01') TO ('{year + 1}-{SEASON_START_MONTH:02d}-01')
+        """)
+
+def logs_table_kind(cur, table='player_logs'):
+    """'p' partitioned, 'r' a plain table (pre-partitioning), None if missing."""
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+def create_logs_table_if_not_exists():
+    conn = get_db_conn()
+    cur = conn.cursor()
+    if logs_table_kind(cur) == 'r':
+        conn.close()
+        raise RuntimeError("player_logs is not partitioned yet: run migrate_partitions.py first")
+    cur.execute(logs_table_ddl())
+    ensure_log_partitions(cur, [int(s[:4]) for s in SEASONS_TO_TRACK])
     conn.commit()
     conn.close()
 
-def parse_minutes(min_val):
-    """Handles minutes formats like '24:15' or 24.25"""
-    if not min_val:
-        return 0.0
-    min_str = str(min_val)
-    if ':' in min_str:
-        try:
-            m, s = min_str.split(':')
-            return float(m) + float(s)/60
-        except:
-            return 0.0
-    try:
-        return float(min_str)
-    except:
-        return 0.0
+def parse_minutes(min_col):
+    """Vectorized minutes parser: handles '24:15', 24.25 and blanks (-> 0.0)."""
+    if pd.api.types.is_numeric_dtype(min_col):
+        return min_col.astype(float).fillna(0.0)
+    parts = min_col.astype(str).str.split(':', n=1, expand=True)
+    minutes = pd.to_numeric(parts[0], errors='coerce')
+    if parts.shape[1] > 1:
+        seconds = pd.to_numeric(parts[1], errors='coerce').fillna(0.0)
+        minutes = minutes + seconds / 60
+    return minutes.fillna(0.0)
 
 def upsert_logs(df):
+    """
+    Bulk path: COPY the whole LeagueGameLog frame into an unlogged staging
+    table and merge it into player_logs with a single statement.
+    """
     if df.empty:
         return 0
-        
+
+    logs = pd.DataFrame({col: df[col.upper()] for col in LOG_COLUMNS})
+    logs['game_id'] = logs['game_id'].astype(str)
+    logs['game_date'] = pd.to_datetime(logs['game_date']).dt.date
+    logs['min'] = parse_minutes(df['MIN'])
+    for col in INT_COLUMNS:
+        logs[col] = pd.to_numeric(logs[col], errors='coerce').round().astype('Int64')
+
     conn = get_db_conn()
-    cur = conn.cursor()
-    
-    sql = """
-        INSERT INTO player_logs 
-        (game_id, player_id, game_date, matchup, wl, min, pts, reb, ast, stl, blk, tov, fgm, fga, fg3m, fg3a, ftm, fta, plus_minus)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (game_id, player_id) DO UPDATE SET
-            pts = EXCLUDED.pts,
-            min = EXCLUDED.min,
-            reb = EXCLUDED.reb,
-            ast = EXCLUDED.ast; 
-    """
-    
-    count = 0
-    # Process in batch transaction
-    for _, row in df.iterrows():
-        try:
-            cur.execute(sql, (
-                row['GAME_ID'],
-                row['PLAYER_ID'],
-                row['GAME_DATE'],
-                row['MATCHUP'],
-                row['WL'],
-                parse_minutes(row['MIN']),
-                row['PTS'],
-                row['REB'],
-                row['AST'],
-                row['STL'],
-                row['BLK'],
-                row['TOV'],
-                row['FGM'],
-                row['FGA'],
-                row['FG3M'],
-                row['FG3A'],
-                row['FTM'],
-                row['FTA'],
-                row['PLUS_MINUS']
-            ))
-            count += 1
-        except Exception as e:
-            print(f"Skipping row error: {e}")
-            
-    conn.commit()
-    conn.close()
+    try:
+        with conn.cursor() as cur:
+            ensure_log_partitions(cur, {season_from_date(d) for d in logs['game_date'].dropna()})
+        count = merge_frame(conn, logs, 'player_logs', LOG_COLUMNS, key_cols=LOG_KEYS)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
     return count
 
+def advance_watermark(df):
+    """Called only after upsert_logs has committed the rows it describes."""
+    conn = get_db_conn()
+    try:
+        watermarks.advance_from_frame(conn, *WATERMARK_KEY, df, 'GAME_DATE', 'GAME_ID')
+        conn.commit()
+    finally:
+        conn.close()
+
 def fetch_delta():
     print("--- Smart Player Log Scraper ---")
     create_logs_table_if_not_exists()
     
     # 1. Determine Date Strategy
-    latest_date = get_latest_log_date()
+    conn = get_db_conn()
+    try:
+        watermarks.ensure_table(conn)
+        wm = watermarks.get_watermark(conn, *WATERMARK_KEY)
+    finally:
+        conn.close()
+
+    # Fall back to the table itself the first time the watermark is used
+    latest_date = wm.last_game_date if wm else get_latest_log_date()
     
     if latest_date:
-        start_date_obj = latest_date + timedelta(days=1)
-        date_from = start_date_obj.strftime("%m/%d/%Y")
-        print(f"Latest DB Date: {latest_date}. Fetching delta from {date_from}...")
-        
-        # FIXED: Don't hardcode '2024-25'. Use the global config.
-        # This ensures we check 2025-26 even if we only have 2024-25 data so far.
-        target_seasons = SEASONS_TO_TRACK 
+        # Re-request the watermark day itself: late finals and stat
+        # corrections land there, and the merge is idempotent.
+        date_from = watermarks.api_date(latest_date)
+        # Only seasons that can still have rows on/after the watermark
+        target_seasons = watermarks.seasons_since(latest_date, SEASONS_TO_TRACK)
+        print(f"Watermark: {latest_date}. Fetching delta from {date_from} for {target_seasons}...")
     else:
         print("Table empty (or force refresh). Fetching FULL history...")
         date_from = None 
         target_seasons = SEASONS_TO_TRACK
 
     total_added = 0
+    ingested = []   # (GAME_DATE, GAME_ID) of every season written, for the watermark
+    failed = []
 
     # 2. Fetch League-Wide Logs
     for season in target_seasons:
         print(f"Fetching {season}...", end=" ")
         try:
-            logs = leaguegamelog.LeagueGameLog(
+            payload = nba_client.fetch_json(
+                leaguegamelog.LeagueGameLog,
                 player_or_team_abbreviation='P', 
                 season=season, 
                 date_from_nullable=date_from
             )
-            df = logs.get_data_frames()[0]
+            df = pd.DataFrame(nba_parse.result_set(payload, columns=API_COLUMNS, dtypes=API_DTYPES))
             
             if not df.empty:
                 print(f"Got {len(df)} rows. Inserting...")
                 added = upsert_logs(df)
                 total_added += added
                 print(f"Inserted {added} rows.")
+                ingested.append(df[['GAME_DATE', 'GAME_ID']])
             else:
                 print("No new games found.")
                 
         except Exception as e:
+            failed.append(season)
             print(f"Error fetching {season}: {e}")
 
     print("-" * 30)
+    # 3. Advance only when every target season made it: a later season's
+    # dates would otherwise carry the watermark past a failed one's gaps.
+    if failed:
+        raise RuntimeError(
+            f"Failed seasons: {' '.join(failed)}. Added {total_added} log entries; watermark not advanced."
+        )
+    if ingested:
+        advance_watermark(pd.concat(ingested, ignore_index=True))
     print(f"SUCCESS: Process finished. Added {total_added} new log entries.")
 
 if __name__ == "__main__":
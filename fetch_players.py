@@ -1,87 +1,150 @@
-import os
-import sys
-import time
 import pandas as pd
-import psycopg2
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
-from nba_api.stats.endpoints import commonteamroster
+from nba_api.stats.endpoints import playerindex
 
-load_dotenv()
+import nba_client
+from db import get_db_conn
 
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "nba")
-DB_USER = os.getenv("DB_USER", "nba_user")
-DB_PASS = os.getenv("DB_PASSWORD")
+load_dotenv()
 
-def get_db_conn():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
+SEASON = '2025-26'
 
-def get_team_ids():
-    conn = get_db_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT team_id, team_abbr FROM teams")
-    teams = cur.fetchall()
-    conn.close()
-    return teams
-
-def upsert_players(players_data, team_id):
-    if not players_data:
-        return 0
-    conn = get_db_conn()
-    cur = conn.cursor()
-    
-    # Force update the team_id
+def create_roster_changes_table_if_not_exists(conn):
+    # Trade / signing / release feed written by each sync
     sql = """
-        INSERT INTO players (id, name, position, current_status, team_id)
-        VALUES (%s, %s, %s, %s, %s)
-        ON CONFLICT (id) DO UPDATE 
-        SET 
-            name = EXCLUDED.name,
-            position = EXCLUDED.position,
-            current_status = EXCLUDED.current_status,
-            team_id = EXCLUDED.team_id; 
+        CREATE TABLE IF NOT EXISTS roster_changes (
+            change_id BIGSERIAL PRIMARY KEY,
+            player_id INT NOT NULL,
+            player_name TEXT,
+            change_type TEXT NOT NULL,   -- signed | traded | released | updated
+            old_team_id INT,
+            new_team_id INT,
+            detected_at TIMESTAMPTZ DEFAULT now()
+        );
+        CREATE INDEX IF NOT EXISTS idx_roster_changes_detected ON roster_changes(detected_at);
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql)
+    conn.commit()
+
+def get_team_abbrs(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT team_id, team_abbr FROM teams")
+        return dict(cur.fetchall())
+
+def fetch_league_roster():
+    """Every player currently on a roster, from one league-wide PlayerIndex call."""
+    index = nba_client.fetch(playerindex.PlayerIndex, season=SEASON)
+    df = index.get_data_frames()[0]
+    df = df[pd.to_numeric(df['TEAM_ID'], errors='coerce').fillna(0) > 0]
+    return pd.DataFrame({
+        'id': df['PERSON_ID'].astype(int),
+        'name': (df['PLAYER_FIRST_NAME'].str.strip() + ' ' + df['PLAYER_LAST_NAME'].str.strip()).str.strip(),
+        'position': df['POSITION'].fillna(''),
+        'team_id': df['TEAM_ID'].astype(int),
+    }).drop_duplicates('id')
+
+def load_current_players(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT id, name, position, current_status, team_id FROM players")
+        rows = cur.fetchall()
+    return pd.DataFrame(rows, columns=['id', 'name', 'position', 'current_status', 'team_id'])
+
+def diff_rosters(current, league):
+    """
+    Compare the players table with the league roster in memory.
+    Returns one row per player that needs a write, tagged with change_type.
     """
-    
-    count = 0
-    for p in players_data:
-        try:
-            cur.execute(sql, (
-                p['PLAYER_ID'], 
-                p['PLAYER'], 
-                p['POSITION'], 
-                'Active',
-                team_id 
-            ))
-            count += 1
-        except Exception as e:
-            pass
-            
+    merged = league.merge(current, on='id', how='outer', suffixes=('', '_db'), indicator=True)
+    on_roster = merged['_merge'] != 'right_only'
+    active_in_db = (merged['current_status'] == 'Active') & merged['team_id_db'].notna()
+
+    signed = on_roster & ~active_in_db
+    traded = on_roster & active_in_db & (merged['team_id'] != merged['team_id_db'])
+    updated = on_roster & active_in_db & ~traded & (
+        (merged['name'] != merged['name_db']) | (merged['position'] != merged['position_db'])
+    )
+    released = ~on_roster & active_in_db
+
+    merged['change_type'] = None
+    merged.loc[updated, 'change_type'] = 'updated'
+    merged.loc[signed, 'change_type'] = 'signed'
+    merged.loc[traded, 'change_type'] = 'traded'
+    merged.loc[released, 'change_type'] = 'released'
+    return merged[merged['change_type'].notna()]
+
+def apply_changes(conn, changes):
+    """Upsert roster moves, retire released players and log the feed, in one transaction."""
+    on_roster = changes[changes['change_type'] != 'released']
+    released = changes[changes['change_type'] == 'released']
+
+    upserts = [
+        (int(r.id), r.name, r.position, 'Active', int(r.team_id))
+        for r in on_roster.itertuples(index=False)
+    ]
+    feed = [
+        (
+            int(r.id),
+            r.name if isinstance(r.name, str) else r.name_db,
+            r.change_type,
+            None if pd.isna(r.team_id_db) else int(r.team_id_db),
+            None if pd.isna(r.team_id) else int(r.team_id),
+        )
+        for r in changes.itertuples(index=False)
+    ]
+
+    with conn.cursor() as cur:
+        if upserts:
+            execute_values(cur, """
+                INSERT INTO players (id, name, position, current_status, team_id)
+                VALUES %s
+                ON CONFLICT (id) DO UPDATE
+                SET
+                    name = EXCLUDED.name,
+                    position = EXCLUDED.position,
+                    current_status = EXCLUDED.current_status,
+                    team_id = EXCLUDED.team_id;
+            """, upserts)
+        if not released.empty:
+            cur.execute(
+                "UPDATE players SET current_status = 'Inactive', team_id = NULL WHERE id = ANY(%s)",
+                ([int(i) for i in released['id']],),
+            )
+        execute_values(cur, """
+            INSERT INTO roster_changes (player_id, player_name, change_type, old_team_id, new_team_id)
+            VALUES %s
+        """, feed)
     conn.commit()
-    conn.close()
-    return count
 
 def main():
-    print("--- Fetching Active Players & Teams ---")
-    teams = get_team_ids()
-    print(f"Found {len(teams)} teams. Updating rosters...")
-    
-    total = 0
-    for team_id, team_abbr in teams:
-        try:
-            # Fetch official roster for 2025-26
-            roster = commonteamroster.CommonTeamRoster(team_id=team_id, season='2025-26')
-            df = roster.get_data_frames()[0]
-            
-            # Insert into DB with the TEAM ID
-            inserted = upsert_players(df.to_dict('records'), team_id)
-            print(f"  {team_abbr}: Updated {inserted} players.")
-            total += inserted
-            
-            time.sleep(0.5) # Avoid API rate limits
-        except Exception as e:
-            print(f"  Error fetching {team_abbr}: {e}")
-
-    print(f"\nSUCCESS: Updated {total} players with Team IDs.")
+    print("--- Syncing League Rosters ---")
+    conn = get_db_conn()
+    try:
+        create_roster_changes_table_if_not_exists(conn)
+        abbrs = get_team_abbrs(conn)
+
+        league = fetch_league_roster()
+        current = load_current_players(conn)
+        print(f"League: {len(league)} rostered players. DB: {len(current)} players.")
+
+        changes = diff_rosters(current, league)
+        if changes.empty:
+            print("Rosters unchanged.")
+            return
+
+        apply_changes(conn, changes)
+    finally:
+        conn.close()
+
+    for r in changes[changes['change_type'] != 'updated'].itertuples(index=False):
+        name = r.name if isinstance(r.name, str) else r.name_db
+        old = abbrs.get(r.team_id_db, '-') if pd.notna(r.team_id_db) else '-'
+        new = abbrs.get(r.team_id, '-') if pd.notna(r.team_id) else '-'
+        print(f"  {r.change_type.upper():<8} {name}: {old} -> {new}")
+
+    counts = changes['change_type'].value_counts().to_dict()
+    print(f"\nSUCCESS: Applied {len(changes)} roster changes {counts}.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
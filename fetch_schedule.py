@@ -1,25 +1,17 @@
-import os
-import time
-import sys
 from datetime import datetime, timedelta
-import psycopg2
 from dotenv import load_dotenv
 from nba_api.stats.endpoints import scoreboardv2
 
+import change_sets
+import nba_client
+from db import get_db_conn
+
 # Load Environment Variables
 load_dotenv()
 
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "nba")
-DB_USER = os.getenv("DB_USER", "nba_user")
-DB_PASS = os.getenv("DB_PASSWORD")
-
 # Config
 DAYS_AHEAD = 7
 
-def get_db_conn():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
-
 def fetch_schedule():
     print(f"--- Fetching Schedule for next {DAYS_AHEAD} days ---")
     
@@ -29,9 +21,11 @@ def fetch_schedule():
     print(f"Window: {start_date} to {end_date}")
 
     conn = get_db_conn()
+    change_sets.ensure_table(conn)
     cur = conn.cursor()
     
     total_upserted = 0
+    inserted_ids, team_ids = [], []
 
     # Loop through each day
     current_date = start_date
@@ -42,7 +36,7 @@ def fetch_schedule():
         print(f"Checking {db_date_str}...", end=" ")
         
         try:
-            sb = scoreboardv2.ScoreboardV2(game_date=date_str)
+            sb = nba_client.fetch(scoreboardv2.ScoreboardV2, game_date=date_str)
             games = sb.game_header.get_data_frame()
             
             if games is not None and not games.empty:
@@ -66,6 +60,9 @@ def fetch_schedule():
                             home_id, 
                             away_id
                         ))
+                        if cur.rowcount:
+                            inserted_ids.append(game_id)
+                            team_ids += [home_id, away_id]
                         count += 1
                         conn.commit() # Commit each successful row
                     except Exception as inner_e:
@@ -76,14 +73,15 @@ def fetch_schedule():
                 total_upserted += count
             else:
                 print("No games.")
-
-            time.sleep(0.5)
             
         except Exception as e:
             print(f"Error: {e}")
 
         current_date += timedelta(days=1)
 
+    # Only newly inserted games change the schedule features
+    change_sets.emit(conn, "fetch_schedule", inserted_ids, team_ids, start_date, end_date)
+    conn.commit()
     conn.close()
     print(f"\nSUCCESS: Schedule updated. Added/Verified {total_upserted} games.")
 
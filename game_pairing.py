@@ -0,0 +1,55 @@
+from typing import List
+
+import pandas as pd
+
+
+# LeagueGameLog / LeagueGameFinder MATCHUP strings:
+#   "LAL vs. BOS"  -> LAL is the home team
+#   "LAL @ BOS"    -> LAL is the away team
+HOME_MARKER = "vs."
+AWAY_MARKER = "@"
+
+# game_id digit 3 encodes the game type: 0012500001 preseason, 0022500001 regular...
+SEASON_TYPES = {"1": "preseason", "2": "regular", "4": "playoffs", "5": "playin"}
+
+GAME_COLUMNS = ["game_id", "game_date", "home_team_id", "away_team_id", "home_pts", "away_pts"]
+
+
+def pair_home_away(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Collapse team-level rows (two per game) into one row per game.
+
+    Uses a boolean mask on MATCHUP and a single merge, so a full season of
+    LeagueGameLog rows pairs in milliseconds. Games missing either side are
+    dropped. Output columns (GAME_COLUMNS) are typed for bulk insert:
+      game_id str, game_date datetime.date, home/away_team_id int64,
+      home/away_pts nullable Int64 (NA until the game is played)
+    """
+    if df.empty:
+        return pd.DataFrame(columns=GAME_COLUMNS)
+
+    matchup = df["MATCHUP"].astype(str)
+    is_home = matchup.str.contains(HOME_MARKER, regex=False)
+    is_away = matchup.str.contains(AWAY_MARKER, regex=False) & ~is_home
+
+    home = df.loc[is_home, ["GAME_ID", "GAME_DATE", "TEAM_ID", "PTS"]].drop_duplicates("GAME_ID")
+    away = df.loc[is_away, ["GAME_ID", "TEAM_ID", "PTS"]].drop_duplicates("GAME_ID")
+    games = home.merge(away, on="GAME_ID", how="inner", suffixes=("_HOME", "_AWAY"))
+
+    return pd.DataFrame({
+        "game_id": games["GAME_ID"].astype(str).to_numpy(),
+        "game_date": pd.to_datetime(games["GAME_DATE"]).dt.date.to_numpy(),
+        "home_team_id": games["TEAM_ID_HOME"].astype("int64").to_numpy(),
+        "away_team_id": games["TEAM_ID_AWAY"].astype("int64").to_numpy(),
+        "home_pts": pd.to_numeric(games["PTS_HOME"], errors="coerce").round().astype("Int64").array,
+        "away_pts": pd.to_numeric(games["PTS_AWAY"], errors="coerce").round().astype("Int64").array,
+    })
+
+
+def to_rows(games: pd.DataFrame, columns: List[str]) -> List[tuple]:
+    """
+    Row tuples of plain Python values (NA -> None) for execute_values / execute.
+    psycopg2 cannot adapt numpy scalars, so go through object arrays.
+    """
+    cols = [games[c].astype(object).where(games[c].notna(), None).tolist() for c in columns]
+    return list(zip(*cols))
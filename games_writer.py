@@ -0,0 +1,59 @@
+from typing import List, Optional
+
+import pandas as pd
+
+from bulk_load import merge_frame
+
+
+# Columns any writer may send; every batch must include game_id and, for
+# rows that may be new, the NOT NULL game_date / home_team_id / away_team_id / status
+GAMES_COLUMNS = [
+    "game_id", "game_date", "game_date_et", "season", "home_team_id", "away_team_id",
+    "status", "home_pts", "away_pts", "season_type",
+]
+INT_COLUMNS = ["season", "home_team_id", "away_team_id", "home_pts", "away_pts"]
+
+
+def write_games(
+    conn,
+    games: pd.DataFrame,
+    columns: List[str],
+    update_cols: Optional[List[str]] = None,
+    extra_set: Optional[List[str]] = None,
+    keep_finals: bool = False,
+) -> int:
+    """
+    Upsert a batch of games with one COPY into a session-local temp staging
+    table and one INSERT ... SELECT ... ON CONFLICT (game_id).
+
+    update_cols defaults to every non-key column in `columns`; updated_at is
+    always refreshed. keep_finals=True leaves rows already marked final alone
+    (schedule writers must not reopen finished games).
+
+    Runs inside the caller's transaction; the caller commits. Returns the
+    number of rows inserted or updated.
+    """
+    unknown = set(columns) - set(GAMES_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown games columns: {sorted(unknown)}")
+    if games.empty:
+        return 0
+
+    batch = games[columns].copy()
+    for c in INT_COLUMNS:
+        if c in batch.columns:
+            # Nullable ints so COPY does not see "112.0"
+            batch[c] = pd.to_numeric(batch[c], errors="coerce").round().astype("Int64")
+
+    return merge_frame(
+        conn,
+        batch,
+        "games",
+        columns,
+        key_cols=["game_id"],
+        update_cols=update_cols,
+        stage="games_stage",
+        temp=True,
+        extra_set=["updated_at = now()"] + (extra_set or []),
+        conflict_where="lower(games.status) <> 'final'" if keep_finals else None,
+    )
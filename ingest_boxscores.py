@@ -1,179 +1,314 @@
-import sys
-import os
-import time
-import psycopg2
-from psycopg2.extras import execute_values
+import asyncio
+import argparse
 from nba_api.stats.endpoints import boxscoreadvancedv3
+import numpy as np
 import pandas as pd
-from requests.exceptions import ReadTimeout, ConnectionError
+
+import nba_client
+import nba_parse
+import ingestion_state
+from bulk_load import merge_frame
+from db import get_db_conn
 
 # Config
-DB_HOST = "localhost"
-DB_NAME = "nba"
-DB_USER = "nba_user"
-DB_PASS = "nba_pass"
 
-def get_db_conn():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
+CONCURRENCY = 4          # in-flight requests; the shared client enforces the rate
+BATCH_SIZE = 50          # games per upsert + state update
+INGESTOR = "ingest_boxscores"
+
+# boxScoreAdvanced team "statistics" key -> team_game_stats column
+TEAM_STATS = {
+    "pace": "pace_est",
+    "offensiveRating": "ortg",
+    "defensiveRating": "drtg",
+    "offensiveReboundPercentage": "oreb_pct",
+    "defensiveReboundPercentage": "dreb_pct",
+}
+STATS_COLUMNS = ["game_id", "team_id", "is_home"] + list(TEAM_STATS.values())
+# Keep netrtg = ortg - drtg when official ratings land (0 means missing;
+# ingest_team_stats then fills both from the box line)
+TEAM_EXTRA_SET = [
+    "netrtg = COALESCE(NULLIF(EXCLUDED.ortg, 0) - NULLIF(EXCLUDED.drtg, 0), team_game_stats.netrtg)"
+]
 
-def get_game_home_map(conn):
-    sql = "SELECT game_id, home_team_id FROM games"
+# boxScoreAdvanced player "statistics" key -> player_game_advanced column
+PLAYER_STATS = {
+    "minutes": "minutes",
+    "usagePercentage": "usg_pct",
+    "trueShootingPercentage": "ts_pct",
+    "effectiveFieldGoalPercentage": "efg_pct",
+    "offensiveRating": "ortg",
+    "defensiveRating": "drtg",
+    "netRating": "net_rtg",
+    "assistPercentage": "ast_pct",
+    "reboundPercentage": "reb_pct",
+    "turnoverRatio": "tov_ratio",
+    "pace": "pace",
+    "possessions": "poss",
+    "PIE": "pie",
+}
+PLAYER_COLUMNS = ["game_id", "player_id", "team_id", "is_home"] + list(PLAYER_STATS.values())
+
+def create_player_table_if_not_exists(conn):
+    sql = """
+        CREATE TABLE IF NOT EXISTS player_game_advanced (
+            game_id TEXT NOT NULL,
+            player_id INT NOT NULL,
+            team_id INT NOT NULL,
+            is_home BOOLEAN NOT NULL,
+            minutes FLOAT,
+            usg_pct FLOAT,
+            ts_pct FLOAT,
+            efg_pct FLOAT,
+            ortg FLOAT,
+            drtg FLOAT,
+            net_rtg FLOAT,
+            ast_pct FLOAT,
+            reb_pct FLOAT,
+            tov_ratio FLOAT,
+            pace FLOAT,
+            poss FLOAT,
+            pie FLOAT,
+            PRIMARY KEY (game_id, player_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_pga_player ON player_game_advanced(player_id);
+    """
     with conn.cursor() as cur:
         cur.execute(sql)
-        return {str(row[0]): int(row[1]) for row in cur.fetchall()}
-
-def fetch_with_retry(game_id, retries=3):
-    for attempt in range(retries):
-        try:
-            box = boxscoreadvancedv3.BoxScoreAdvancedV3(game_id=game_id, timeout=15)
-            return box.get_data_frames()
-        except (ReadTimeout, ConnectionError) as e:
-            if attempt < retries - 1:
-                time.sleep(2)
-            else:
-                return None
-        except Exception as e:
-            return None
-    return None
-
-def standardize_columns(df):
-    df.columns = [c.upper() for c in df.columns]
-    mappings = {
-        'TEAMID': 'TEAM_ID',
-        'OFFENSIVERATING': 'OFF_RATING',
-        'DEFENSIVERATING': 'DEF_RATING',
-        'OFF_RATING': 'OFF_RATING', 
-        'DEF_RATING': 'DEF_RATING',
-        'PACE': 'PACE',
-        'OREB_PCT': 'OREB_PCT',
-        'DREB_PCT': 'DREB_PCT'
+    conn.commit()
+
+def extract_team_frame(game_id, frames):
+    """
+    team_game_stats rows (without is_home) from landed BoxScoreAdvancedV3
+    frames; the caller flags home teams for the whole batch at once.
+    """
+    teams = next((df for df in frames if "teamId" in df.columns and "personId" not in df.columns), None)
+    if teams is None:
+        raise ValueError("no team frame in response")
+    out = pd.DataFrame({
+        "game_id": str(game_id),
+        "team_id": teams["teamId"].astype(int).to_numpy(),
+    })
+    for key, col in TEAM_STATS.items():
+        values = teams[key] if key in teams.columns else pd.Series(np.nan, index=teams.index)
+        out[col] = pd.to_numeric(values, errors="coerce").fillna(0.0).to_numpy()
+    return out.drop_duplicates("team_id")
+
+def extract_player_frame(game_id, frames):
+    """player_game_advanced rows (without is_home) from landed BoxScoreAdvancedV3 frames."""
+    players = next((df for df in frames if "personId" in df.columns), None)
+    if players is None:
+        raise ValueError("no player frame in response")
+    out = pd.DataFrame({
+        "game_id": str(game_id),
+        "player_id": players["personId"].astype(int).to_numpy(),
+        "team_id": players["teamId"].astype(int).to_numpy(),
+    })
+    for key, col in PLAYER_STATS.items():
+        values = players[key].tolist() if key in players.columns else [None] * len(players)
+        out[col] = nba_parse.clock_minutes(values) if key == "minutes" else pd.to_numeric(values, errors="coerce")
+    return out[out["minutes"] > 0]
+
+def parse_team_columns(game_id, payload):
+    """
+    Team rows straight from the BoxScoreAdvancedV3 JSON as column arrays.
+    Home/away comes from the payload itself, so no games lookup is needed.
+    """
+    cols = nba_parse.v3_teams(payload, "boxScoreAdvanced", list(TEAM_STATS))
+    out = {
+        "game_id": np.full(len(cols["teamId"]), str(game_id), dtype=object),
+        "team_id": cols["teamId"],
+        "is_home": cols["isHome"],
+    }
+    for key, col in TEAM_STATS.items():
+        out[col] = np.nan_to_num(cols[key], nan=0.0)
+    return out
+
+def parse_player_columns(game_id, payload):
+    """
+    Player rows from the same response. Players who did not play (no
+    minutes) are dropped so they don't drag rolling usage towards zero.
+    """
+    cols = nba_parse.v3_players(payload, "boxScoreAdvanced", list(PLAYER_STATS))
+    played = cols["minutes"] > 0
+    out = {
+        "game_id": np.full(int(played.sum()), str(game_id), dtype=object),
+        "player_id": cols["personId"][played],
+        "team_id": cols["teamId"][played],
+        "is_home": cols["isHome"][played],
     }
-    new_cols = {}
-    for col in df.columns:
-        if col in mappings:
-            new_cols[col] = mappings[col]
-    return df.rename(columns=new_cols)
+    for key, col in PLAYER_STATS.items():
+        out[col] = cols[key][played]
+    return out
+
+def parse_game(game_id, payload):
+    return parse_team_columns(game_id, payload), parse_player_columns(game_id, payload)
+
+def concat_columns(parts, columns):
+    return pd.DataFrame({col: np.concatenate([p[col] for p in parts]) for col in columns})
+
+def upsert_parsed(conn, parsed):
+    """
+    COPY + merge a batch of parse_game() results into team_game_stats and
+    player_game_advanced. Caller commits. Returns team rows written.
+    """
+    if not parsed:
+        return 0
+    teams = concat_columns([t for t, _ in parsed], STATS_COLUMNS)
+    players = concat_columns([p for _, p in parsed], PLAYER_COLUMNS)
+    count = merge_frame(conn, teams, "team_game_stats", STATS_COLUMNS, key_cols=["game_id", "team_id"],
+                        stage="team_game_stats_stage", temp=True, extra_set=TEAM_EXTRA_SET)
+    merge_frame(conn, players, "player_game_advanced", PLAYER_COLUMNS, key_cols=["game_id", "player_id"],
+                stage="player_game_advanced_stage", temp=True)
+    return count
+
+def seed_state(conn):
+    """
+    Register every final game that has no state row yet. An anti-join on
+    the state table's primary key, so it also picks up finals written
+    later with old dates (backfill_finals --from, rebuild_from_landing).
+    Games that already have rebound data and player rows start out done.
+    """
+    sql = """
+        INSERT INTO ingestion_state (ingestor, game_id, game_date, status)
+        SELECT %(ingestor)s, g.game_id, g.game_date,
+               CASE WHEN EXISTS (
+                   SELECT 1 FROM team_game_stats tgs
+                   WHERE tgs.game_id = g.game_id AND tgs.oreb_pct <> 0
+               ) AND EXISTS (
+                   SELECT 1 FROM player_game_advanced pga WHERE pga.game_id = g.game_id
+               ) THEN 'done' ELSE 'pending' END
+        FROM games g
+        WHERE lower(g.status) = 'final'
+          AND NOT EXISTS (
+              SELECT 1 FROM ingestion_state s
+              WHERE s.ingestor = %(ingestor)s AND s.game_id = g.game_id
+          )
+        ON CONFLICT (ingestor, game_id) DO NOTHING
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql, {"ingestor": INGESTOR})
+        seeded = cur.rowcount
+    conn.commit()
+    return seeded
+
+def get_missing_game_ids(conn):
+    """Games due for a fetch, from the state table's pending index."""
+    ingestion_state.ensure_table(conn)
+    create_player_table_if_not_exists(conn)
+    seed_state(conn)
+    return ingestion_state.pending(conn, INGESTOR)
+
+def ingest_game(conn, game_id):
+    """Fetch and upsert a single game's team and player rows (one work-queue task)."""
+    try:
+        payload = nba_client.fetch_json(boxscoreadvancedv3.BoxScoreAdvancedV3, game_id=game_id, timeout=15)
+        parsed = parse_game(game_id, payload)
+    except Exception as e:
+        ingestion_state.mark_failed(conn, INGESTOR, game_id, str(e))
+        conn.commit()
+        raise
+    ingestion_state.mark_done(conn, INGESTOR, [game_id])
+    count = upsert_parsed(conn, [parsed])
+    conn.commit()   # the rows and the state together
+    return count
+
+async def fetch_game(game_id, sem):
+    """Returns (game_id, (team, player) columns, error); errors are reported, not swallowed."""
+    try:
+        async with sem:
+            payload = await asyncio.to_thread(
+                nba_client.fetch_json, boxscoreadvancedv3.BoxScoreAdvancedV3, game_id=game_id, timeout=15
+            )
+        return game_id, parse_game(game_id, payload), None
+    except Exception as e:
+        return game_id, None, e
+
+async def backfill(conn, missing_ids):
+    """
+    Fetch box scores concurrently and stream them into team_game_stats
+    and player_game_advanced.
+    Every BATCH_SIZE games are upserted and marked done in one transaction,
+    so an interrupted run resumes where the last commit ended. Failures are
+    recorded per game with a backoff (see ingestion_state.py).
+    """
+    sem = asyncio.Semaphore(CONCURRENCY)
+    tasks = [asyncio.create_task(fetch_game(game_id, sem)) for game_id in missing_ids]
+    total = len(tasks)
+
+    batch_data, batch_games = [], []
+    done, failed = 0, 0
+
+    def flush():
+        ingestion_state.mark_done(conn, INGESTOR, batch_games)
+        upsert_parsed(conn, batch_data)
+        conn.commit()   # the rows and the state together
+        batch_data.clear()
+        batch_games.clear()
+
+    for i, fut in enumerate(asyncio.as_completed(tasks)):
+        game_id, parsed, err = await fut
+        if err is not None:
+            failed += 1
+            print(f"\n{game_id}: fetch failed -> {err}")
+            ingestion_state.mark_failed(conn, INGESTOR, game_id, str(err))
+            conn.commit()
+            continue
+
+        batch_data.append(parsed)
+        batch_games.append(game_id)
+        done += 1
+        print(f"[{i+1}/{total}] Fetched {game_id}...", end="\r")
+
+        if len(batch_games) >= BATCH_SIZE:
+            flush()
+
+    if batch_games:
+        flush()
+    return done, failed
+
+def show_dead_letters(conn):
+    dead = ingestion_state.dead_letters(conn, INGESTOR)
+    print(f"{len(dead)} games gave up after {ingestion_state.MAX_ATTEMPTS} attempts:")
+    for d in dead:
+        print(f"  {d.game_id} ({d.game_date}) x{d.attempts}: {d.last_error}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Ingest advanced team box scores into team_game_stats.")
+    parser.add_argument("--dead-letters", action="store_true", help="list games that exhausted their retries")
+    parser.add_argument("--retry-failed", action="store_true", help="give dead-lettered games a fresh retry budget")
+    args = parser.parse_args()
+
     print("\n--- INGESTING ADVANCED STATS (v4.1 Rebounding) ---\n")
     conn = get_db_conn()
-    home_map = get_game_home_map(conn)
-    
+    ingestion_state.ensure_table(conn)
+
+    if args.dead_letters:
+        show_dead_letters(conn)
+        conn.close()
+        return
+    if args.retry_failed:
+        print(f"Re-queued {ingestion_state.retry_failed(conn, INGESTOR)} dead-lettered games.")
+        conn.commit()
+
     print("Checking for games with missing Rebound Data...")
-    sql_missing = """
-        SELECT DISTINCT g.game_id 
-        FROM games g
-        LEFT JOIN team_game_stats tgs ON g.game_id = tgs.game_id
-        WHERE (tgs.game_id IS NULL OR tgs.oreb_pct = 0)
-          AND g.status = 'Final'
-    """
-    with conn.cursor() as cur:
-        cur.execute(sql_missing)
-        # FIX: Ensure uniqueness just in case
-        missing_ids = list(set([row[0] for row in cur.fetchall()]))
+    missing_ids = get_missing_game_ids(conn)
+    state = ingestion_state.counts(conn, INGESTOR)
         
-    print(f"Found {len(missing_ids)} games needing update.")
+    print(f"Found {len(missing_ids)} games due ({state.get('done', 0)} done, "
+          f"{state.get('pending', 0)} pending, {state.get('failed', 0)} dead-lettered).")
     
     if not missing_ids:
         print("All caught up!")
+        conn.close()
         return
 
-    total = len(missing_ids)
-    batch_data = []
-    
-    for i, game_id in enumerate(missing_ids):
-        print(f"[{i+1}/{total}] Fetching {game_id}...", end="\r")
-        frames = fetch_with_retry(game_id)
-        if not frames: continue
-            
-        target_df = None
-        for df in frames:
-            df = standardize_columns(df)
-            if 'TEAM_ID' in df.columns:
-                if len(df) <= 2: 
-                    target_df = df
-                    break
-        
-        if target_df is None:
-            for df in frames:
-                df = standardize_columns(df)
-                if 'TEAM_ID' in df.columns:
-                    target_df = df
-                    break
-
-        if target_df is None: continue
-            
-        try:
-            # We use a set to track team_ids within this specific game loop
-            # to prevent adding the same team twice for one game (rare API bug)
-            seen_teams = set()
-            
-            for _, row in target_df.iterrows():
-                current_team_id = int(row['TEAM_ID'])
-                
-                if current_team_id in seen_teams:
-                    continue
-                seen_teams.add(current_team_id)
-
-                home_id_for_game = home_map.get(str(game_id))
-                is_home = (current_team_id == home_id_for_game)
-                
-                pace = row.get('PACE', 0.0)
-                if pd.isna(pace): pace = 0.0
-                
-                ortg = row.get('OFF_RATING', 0.0)
-                if pd.isna(ortg): ortg = 0.0
-                
-                drtg = row.get('DEF_RATING', 0.0)
-                if pd.isna(drtg): drtg = 0.0
-                
-                oreb = row.get('OREB_PCT', 0.0)
-                if pd.isna(oreb): oreb = 0.0
-                
-                dreb = row.get('DREB_PCT', 0.0)
-                if pd.isna(dreb): dreb = 0.0
-
-                batch_data.append((
-                    str(game_id),
-                    current_team_id,
-                    is_home,
-                    float(pace),
-                    float(ortg),
-                    float(drtg),
-                    float(oreb),
-                    float(dreb)
-                ))
-        except Exception as e:
-            continue
-
-        time.sleep(0.6) 
+    try:
+        done, failed = asyncio.run(backfill(conn, missing_ids))
+    finally:
+        conn.close()
 
-        if len(batch_data) >= 20:
-            insert_batch(conn, batch_data)
-            batch_data = []
-
-    if batch_data:
-        insert_batch(conn, batch_data)
-
-    print(f"\nDone! Stats updated.")
-    conn.close()
-
-def insert_batch(conn, data):
-    sql = """
-        INSERT INTO team_game_stats 
-        (game_id, team_id, is_home, pace_est, ortg, drtg, oreb_pct, dreb_pct)
-        VALUES %s
-        ON CONFLICT (game_id, team_id) DO UPDATE SET
-            is_home = EXCLUDED.is_home,
-            pace_est = EXCLUDED.pace_est,
-            ortg = EXCLUDED.ortg,
-            drtg = EXCLUDED.drtg,
-            oreb_pct = EXCLUDED.oreb_pct,
-            dreb_pct = EXCLUDED.dreb_pct;
-    """
-    with conn.cursor() as cur:
-        execute_values(cur, sql, data)
-    conn.commit()
+    print(f"\nDone! Stats updated for {done} games, {failed} failed (retried with backoff).")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
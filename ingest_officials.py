@@ -0,0 +1,144 @@
+import argparse
+from datetime import datetime
+
+import pandas as pd
+import psycopg2
+from dotenv import load_dotenv
+from nba_api.stats.endpoints import boxscoresummaryv3
+
+import nba_client
+from bulk_load import merge_frame
+from db import get_db_conn
+
+load_dotenv()
+
+BATCH_SIZE = 100          # games per bulk upsert
+OFFICIAL_COLUMNS = ["game_id", "official_id", "first_name", "last_name", "jersey_num", "assignment"]
+REF_VIEW = "mv_ref_master_profiles"
+
+def create_officials_table_if_not_exists(conn):
+    sql = """
+        CREATE TABLE IF NOT EXISTS game_officials (
+            game_id TEXT NOT NULL,
+            official_id INT NOT NULL,
+            first_name TEXT,
+            last_name TEXT,
+            jersey_num TEXT,
+            assignment TEXT,
+            PRIMARY KEY (game_id, official_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_game_officials_official ON game_officials(official_id);
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql)
+    conn.commit()
+
+def get_games_missing_officials(conn, since=None, limit=None):
+    sql = """
+        SELECT g.game_id
+        FROM games g
+        WHERE lower(g.status) = 'final'
+          AND (%s::date IS NULL OR g.game_date >= %s::date)
+          AND NOT EXISTS (SELECT 1 FROM game_officials o WHERE o.game_id = g.game_id)
+        ORDER BY g.game_date DESC
+        LIMIT %s
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql, (since, since, limit))
+        return [row[0] for row in cur.fetchall()]
+
+def parse_officials(game_id, payload):
+    """Officials list from a BoxScoreSummaryV3 payload -> list of row dicts."""
+    officials = payload.get("boxScoreSummary", {}).get("officials") or []
+    return [
+        {
+            "game_id": str(game_id),
+            "official_id": int(ref["personId"]),
+            "first_name": ref.get("firstName"),
+            "last_name": ref.get("familyName"),
+            "jersey_num": str(ref.get("jerseyNum") or "").strip() or None,
+            "assignment": ref.get("assignment"),
+        }
+        for ref in officials
+        if ref.get("personId")
+    ]
+
+def upsert_officials(conn, rows):
+    if not rows:
+        return 0
+    df = pd.DataFrame(rows, columns=OFFICIAL_COLUMNS)
+    df["official_id"] = df["official_id"].astype("Int64")
+    count = merge_frame(conn, df, "game_officials", OFFICIAL_COLUMNS, key_cols=["game_id", "official_id"])
+    conn.commit()
+    return count
+
+def refresh_ref_profiles(conn):
+    """
+    Recompute the whole view: Postgres has no incremental matview refresh,
+    and the view is defined outside this repo. Callers only refresh when
+    new assignments landed. REFRESH CONCURRENTLY keeps the view readable
+    while it rebuilds, but needs a unique index on it; fall back to a plain
+    refresh when there is none.
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {REF_VIEW};")
+        conn.commit()
+    except psycopg2.errors.UndefinedTable:
+        conn.rollback()
+        print(f"{REF_VIEW} does not exist yet; skipping refresh.")
+        return
+    except psycopg2.Error:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute(f"REFRESH MATERIALIZED VIEW {REF_VIEW};")
+        conn.commit()
+    print(f"Refreshed {REF_VIEW}.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest game officials from BoxScoreSummaryV3.")
+    parser.add_argument("--since", help="only games on/after this date (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=None, help="at most this many games (newest first)")
+    args = parser.parse_args()
+    since = datetime.strptime(args.since, "%Y-%m-%d").date() if args.since else None
+
+    print("--- Ingesting Game Officials ---")
+    conn = get_db_conn()
+    try:
+        create_officials_table_if_not_exists(conn)
+        game_ids = get_games_missing_officials(conn, since, args.limit)
+        print(f"Found {len(game_ids)} final games without officials.")
+        if not game_ids:
+            return
+
+        total, empty, failed = 0, 0, 0
+        batch = []
+        results = nba_client.fetch_many_json(boxscoresummaryv3.BoxScoreSummaryV3, [{"game_id": g} for g in game_ids])
+        for i, (params, payload, err) in enumerate(results, start=1):
+            if err is not None:
+                failed += 1
+                print(f"\n{params['game_id']}: fetch failed -> {err}")
+                continue
+            rows = parse_officials(params["game_id"], payload)
+            if not rows:
+                empty += 1
+                # Summaries are cached for good; don't let an empty crew stick
+                nba_client.evict(boxscoresummaryv3.BoxScoreSummaryV3, **params)
+            batch.extend(rows)
+            print(f"[{i}/{len(game_ids)}] Fetched {params['game_id']}...", end="\r")
+
+            if i % BATCH_SIZE == 0:
+                total += upsert_officials(conn, batch)
+                batch = []
+        total += upsert_officials(conn, batch)
+
+        print(f"\nUpserted {total} official assignments "
+              f"({empty} games without officials, {failed} failed; both retried next run).")
+        # The view only changes when assignments land
+        if total:
+            refresh_ref_profiles(conn)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,23 @@
-import os
-import time
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 from dotenv import load_dotenv
-import psycopg
 
 from nba_api.stats.endpoints import boxscoretraditionalv2
 
-load_dotenv()
+import nba_client
+import change_sets
+import response_cache
+from db import connection
 
-DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
-DB_PORT = int(os.getenv("DB_PORT", "5432"))
-DB_NAME = os.getenv("DB_NAME", "nba")
-DB_USER = os.getenv("DB_USER", "nba_user")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "nba_pass")
+load_dotenv()
 
 ET = ZoneInfo("America/New_York")
 
-API_SLEEP_SECONDS = 0.7  # be polite to NBA API
-
-def get_conn():
-    return psycopg.connect(
-        host=DB_HOST,
-        port=DB_PORT,
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        autocommit=True,
-    )
-
 def get_games_pending_results():
     today_et = datetime.now(ET).date()
 
-    with get_conn() as conn, conn.cursor() as cur:
+    with connection() as conn, conn.cursor() as cur:
         cur.execute(
             """
             SELECT
@@ -58,14 +42,27 @@ def ingest_results():
 
     print(f"Ingesting results for {len(pending_games)} games...")
 
-    with get_conn() as conn, conn.cursor() as cur:
-        for game_id, home_team_id, away_team_id in pending_games:
-            try:
-                bs = boxscoretraditionalv2.BoxScoreTraditionalV2(
-                    game_id=game_id
-                )
+    teams_by_game = {
+        game_id: (home_team_id, away_team_id)
+        for game_id, home_team_id, away_team_id in pending_games
+    }
+    param_list = [{"game_id": game_id} for game_id in teams_by_game]
+    # These games are not known to be final yet: an empty (postponed) or
+    # partial (in progress) box score must be re-requested next run.
+    results = nba_client.fetch_many(
+        boxscoretraditionalv2.BoxScoreTraditionalV2, param_list, cache_ttl=response_cache.NO_CACHE
+    )
+
+    finals = []
 
-                time.sleep(API_SLEEP_SECONDS)
+    with connection() as conn, conn.cursor() as cur:
+        change_sets.ensure_table(conn)
+        for params, bs, err in results:
+            game_id = params["game_id"]
+            home_team_id, away_team_id = teams_by_game[game_id]
+            try:
+                if err is not None:
+                    raise err
 
                 team_stats = bs.team_stats.get_data_frame()
                 if team_stats is None or team_stats.empty:
@@ -95,6 +92,7 @@ def ingest_results():
                     (home_pts, away_pts, game_id)
                 )
 
+                finals.append((game_id, home_team_id, away_team_id))
                 print(
                     f"{game_id}: FINAL {home_pts}-{away_pts}"
                 )
@@ -102,6 +100,14 @@ def ingest_results():
             except Exception as e:
                 print(f"{game_id}: error ingesting result -> {e}")
 
+        change_sets.emit(
+            conn,
+            "ingest_results",
+            [g for g, _, _ in finals],
+            [t for _, h, a in finals for t in (h, a)],
+        )
+        conn.commit()
+
     print("Results ingestion complete.")
 
 if __name__ == "__main__":
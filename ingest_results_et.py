@@ -1,26 +1,18 @@
-import os
 import sys
-import time
 from datetime import datetime, date
 from zoneinfo import ZoneInfo
 
-import psycopg2
 import pandas as pd
 
 from nba_api.stats.endpoints import leaguegamelog
 
-ET = ZoneInfo("America/New_York")
-
+import nba_client
+import change_sets
+from game_pairing import pair_home_away
+from games_writer import write_games
+from db import get_db_conn
 
-def get_db_conn():
-    host = os.getenv("PGHOST", "localhost")
-    port = int(os.getenv("PGPORT", "5432"))
-    dbname = os.getenv("PGDATABASE", "nba")
-    user = os.getenv("PGUSER", "nba_user")
-    password = os.getenv("PGPASSWORD", "nba_pass")
-    if not password:
-        raise RuntimeError("PGPASSWORD not set. In PowerShell: $env:PGPASSWORD='your_password'")
-    return psycopg2.connect(host=host, port=port, dbname=dbname, user=user, password=password)
+ET = ZoneInfo("America/New_York")
 
 
 def season_str_from_et_date(d: date) -> str:
@@ -29,43 +21,15 @@ def season_str_from_et_date(d: date) -> str:
     return f"{start}-{end:02d}"
 
 
-def upsert_game_final(conn, game: dict):
-    sql = """
-    INSERT INTO games (
-        game_id,
-        game_date,
-        game_date_et,
-        home_team_id,
-        away_team_id,
-        status,
-        home_pts,
-        away_pts,
-        season_type
-    )
-    VALUES (
-        %(game_id)s,
-        %(game_date_et)s,
-        %(game_date_et)s,
-        %(home_team_id)s,
-        %(away_team_id)s,
-        %(status)s,
-        %(home_pts)s,
-        %(away_pts)s,
-        %(season_type)s
-    )
-    ON CONFLICT (game_id) DO UPDATE
-    SET
-        game_date = EXCLUDED.game_date,
-        game_date_et = EXCLUDED.game_date_et,
-        home_team_id = EXCLUDED.home_team_id,
-        away_team_id = EXCLUDED.away_team_id,
-        status = EXCLUDED.status,
-        home_pts = EXCLUDED.home_pts,
-        away_pts = EXCLUDED.away_pts,
-        season_type = EXCLUDED.season_type;
-    """
-    with conn.cursor() as cur:
-        cur.execute(sql, game)
+FINAL_COLUMNS = [
+    "game_id", "game_date", "game_date_et", "home_team_id", "away_team_id",
+    "status", "home_pts", "away_pts", "season_type",
+]
+
+
+def upsert_game_finals(conn, games: pd.DataFrame) -> int:
+    # One staged INSERT ... SELECT ... ON CONFLICT for the whole window
+    return write_games(conn, games.assign(game_date=games["game_date_et"]), FINAL_COLUMNS)
 
 
 def fetch_leaguegamelog_df(start_et: date, end_et: date) -> pd.DataFrame:
@@ -73,67 +37,70 @@ def fetch_leaguegamelog_df(start_et: date, end_et: date) -> pd.DataFrame:
     date_from = start_et.strftime("%m/%d/%Y")
     date_to = end_et.strftime("%m/%d/%Y")
 
-    last_err = None
-    for attempt in range(3):
-        try:
-            lg = leaguegamelog.LeagueGameLog(
-                season=season,
-                season_type_all_star="Regular Season",
-                date_from_nullable=date_from,
-                date_to_nullable=date_to,
-                league_id="00",
-                timeout=60,
-            )
-            return lg.get_data_frames()[0]
-        except Exception as e:
-            last_err = e
-            time.sleep(1.5 * (attempt + 1))
-    raise RuntimeError(f"LeagueGameLog failed after retries: {last_err}")
-
-
-def build_final_games_from_lg(df: pd.DataFrame) -> list[dict]:
-    if df.empty:
-        return []
-
-    # Only completed rows (WL present) with points
-    df = df[df["WL"].notna() & df["PTS"].notna()].copy()
-    if df.empty:
-        return []
-
-    df["GAME_DATE_PARSED"] = pd.to_datetime(df["GAME_DATE"], errors="coerce").dt.date
-    df = df[df["GAME_DATE_PARSED"].notna()].copy()
-
-    finals = []
-
-    for game_id, g in df.groupby("GAME_ID"):
-        if len(g) < 2:
-            continue
-
-        home_row = None
-        away_row = None
-
-        for _, r in g.iterrows():
-            matchup = str(r["MATCHUP"])
-            if "vs." in matchup:
-                home_row = r
-            elif "@" in matchup:
-                away_row = r
-
-        if home_row is None or away_row is None:
-            continue
-
-        finals.append({
-            "game_id": str(game_id),
-            "game_date_et": home_row["GAME_DATE_PARSED"],
-            "home_team_id": int(home_row["TEAM_ID"]),
-            "away_team_id": int(away_row["TEAM_ID"]),
-            "home_pts": int(home_row["PTS"]),
-            "away_pts": int(away_row["PTS"]),
-            "status": "final",
-            "season_type": "regular",
-        })
-
-    return finals
+    try:
+        lg = nba_client.fetch(
+            leaguegamelog.LeagueGameLog,
+            season=season,
+            season_type_all_star="Regular Season",
+            date_from_nullable=date_from,
+            date_to_nullable=date_to,
+            league_id="00",
+            timeout=60,
+        )
+    except Exception as e:
+        raise RuntimeError(f"LeagueGameLog failed after retries: {e}")
+    return lg.get_data_frames()[0]
+
+
+def build_final_games_from_lg(df: pd.DataFrame) -> pd.DataFrame:
+    if not df.empty:
+        # Only completed rows (WL present) with points
+        df = df[df["WL"].notna() & df["PTS"].notna()]
+
+    games = pair_home_away(df)
+    games = games.rename(columns={"game_date": "game_date_et"})
+    games["status"] = "final"
+    games["season_type"] = "regular"
+    return games
+
+
+def diff_finals(conn, finals: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare the window's finals with `games` and keep only rows that need a write:
+      new      - not in the table yet
+      final    - in the table but not marked final
+      rescored - already final with a different score (stat corrections)
+    """
+    if finals.empty:
+        return finals.assign(change=pd.Series(dtype=object))
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT game_id, lower(status), home_pts, away_pts
+            FROM games
+            WHERE game_id = ANY(%s)
+            """,
+            (finals["game_id"].tolist(),),
+        )
+        existing = pd.DataFrame(
+            cur.fetchall(),
+            columns=["game_id", "db_status", "db_home_pts", "db_away_pts"],
+        )
+
+    merged = finals.merge(existing, on="game_id", how="left")
+    is_new = merged["db_status"].isna()
+    newly_final = ~is_new & (merged["db_status"] != "final")
+    # Plain floats on both sides, so a missing stored score counts as changed
+    pts = lambda c: pd.to_numeric(merged[c], errors="coerce").astype(float)
+    rescored = ~is_new & ~newly_final & (
+        (pts("db_home_pts") != pts("home_pts")) | (pts("db_away_pts") != pts("away_pts"))
+    )
+
+    merged["change"] = None
+    merged.loc[is_new, "change"] = "new"
+    merged.loc[newly_final, "change"] = "final"
+    merged.loc[rescored, "change"] = "rescored"
+    return merged.loc[merged["change"].notna(), list(finals.columns) + ["change"]]
 
 
 def ingest_results_window_et(start_et: date, end_et: date):
@@ -141,21 +108,30 @@ def ingest_results_window_et(start_et: date, end_et: date):
     finals = build_final_games_from_lg(df)
 
     conn = get_db_conn()
+    change_sets.ensure_table(conn)
     conn.autocommit = False
     try:
-        for g in finals:
-            upsert_game_final(conn, g)
+        # Only games that are new, newly final or rescored: re-emitting the
+        # whole window would make refresh_features recompute most teams daily.
+        changes = diff_finals(conn, finals)
+        upsert_game_finals(conn, changes)
+        change_sets.emit(
+            conn,
+            "ingest_results_et",
+            changes["game_id"],
+            pd.concat([changes["home_team_id"], changes["away_team_id"]]),
+            start_et,
+            end_et,
+        )
         conn.commit()
 
-        counts = {}
-        for g in finals:
-            counts[g["game_date_et"]] = counts.get(g["game_date_et"], 0) + 1
+        counts = changes["game_date_et"].value_counts().sort_index()
 
         print(f"Ingested ET window: {start_et} -> {end_et}")
-        if counts:
-            for d in sorted(counts.keys()):
-                print(f"ET {d}: upserted {counts[d]} FINAL games")
-        print(f"Done. Total FINAL games upserted: {len(finals)}")
+        for d, n in counts.items():
+            print(f"ET {d}: upserted {n} FINAL games")
+        print(f"Done. FINAL games upserted: {len(changes)} of {len(finals)} "
+              f"({changes['change'].value_counts().to_dict()})")
     except Exception:
         conn.rollback()
         raise
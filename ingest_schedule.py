@@ -1,42 +1,37 @@
-import os
-import time
-from datetime import datetime, timedelta, date
+import argparse
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
 from dotenv import load_dotenv
-import psycopg
+import pandas as pd
 
-from nba_api.stats.endpoints import scoreboardv2
+from nba_api.stats.endpoints import scoreboardv2, scheduleleaguev2
 
-load_dotenv()
+import nba_client
+import change_sets
+from game_pairing import SEASON_TYPES
+from seasons import season_from_date, season_label
+from games_writer import write_games
+from db import connection
 
-DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
-DB_PORT = int(os.getenv("DB_PORT", "5432"))
-DB_NAME = os.getenv("DB_NAME", "nba")
-DB_USER = os.getenv("DB_USER", "nba_user")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "nba_pass")
+load_dotenv()
 
 # Schedule window
 DAYS_BACK = 3
 DAYS_AHEAD = 7
 
+WINDOW_COLUMNS = [
+    "game_id", "game_date", "season", "home_team_id", "away_team_id",
+    "status", "home_pts", "away_pts", "game_date_et",
+]
+SEASON_COLUMNS = [
+    "game_id", "game_date", "season", "home_team_id", "away_team_id",
+    "status", "game_date_et", "season_type",
+]
+
 ET = ZoneInfo("America/New_York")
 AEDT = ZoneInfo("Australia/Sydney")
 
-def get_conn():
-    return psycopg.connect(
-        host=DB_HOST,
-        port=DB_PORT,
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        autocommit=True,
-    )
-
-def season_from_date(d: date) -> int:
-    # Season label by starting year, e.g., 2025-26 -> 2025
-    return d.year if d.month >= 10 else d.year - 1
-
 def to_int_or_none(x):
     if x is None:
         return None
@@ -55,14 +50,16 @@ def ingest_schedule():
     all_games = []
     days_total = (end_et - start_et).days + 1
 
-    for i in range(days_total):
-        game_date_et = start_et + timedelta(days=i)
-        date_str = game_date_et.strftime("%m/%d/%Y")
+    param_list = [
+        {"game_date": (start_et + timedelta(days=i)).strftime("%m/%d/%Y")}
+        for i in range(days_total)
+    ]
 
-        sb = scoreboardv2.ScoreboardV2(game_date=date_str)
-
-        # Be polite to the stats API
-        time.sleep(0.6)
+    for params, sb, err in nba_client.fetch_many(scoreboardv2.ScoreboardV2, param_list):
+        if err is not None:
+            print(f"{params['game_date']}: error fetching scoreboard -> {err}")
+            continue
+        game_date_et = datetime.strptime(params["game_date"], "%m/%d/%Y").date()
 
         gh = sb.game_header.get_data_frame()
         if gh is None or gh.empty:
@@ -88,43 +85,149 @@ def ingest_schedule():
         print("No scheduled games found in the requested window.")
         return
 
-    with get_conn() as conn, conn.cursor() as cur:
-        for g in all_games:
-            cur.execute(
-                """
-                INSERT INTO games (
-                    game_id,
-                    game_date,
-                    season,
-                    home_team_id,
-                    away_team_id,
-                    status,
-                    home_pts,
-                    away_pts,
-                    game_date_et
-                )
-                VALUES (%s, %s, %s, %s, %s, 'scheduled', NULL, NULL, %s)
-                ON CONFLICT (game_id) DO UPDATE
-                SET game_date = EXCLUDED.game_date,
-                    season = EXCLUDED.season,
-                    home_team_id = EXCLUDED.home_team_id,
-                    away_team_id = EXCLUDED.away_team_id,
-                    status = 'scheduled',
-                    game_date_et = EXCLUDED.game_date_et,
-                    updated_at = now();
-                """,
-                (
-                    g["game_id"],
-                    # Keep game_date aligned with ET for now (canonical “NBA day”)
-                    g["game_date_et"],
-                    season_from_date(g["game_date_et"]),
-                    g["home_team_id"],
-                    g["away_team_id"],
-                    g["game_date_et"],
-                )
+    # The scoreboard has no postponement flag: a listed game is on
+    games = pd.DataFrame(all_games).drop_duplicates("game_id").assign(postponed=False)
+
+    with connection() as conn:
+        change_sets.ensure_table(conn)
+        # Only games that are new or moved: emitting the whole window would
+        # make refresh_features recompute every team on every run.
+        changes = diff_schedule(conn, games)
+        if changes.empty:
+            print(f"Schedule unchanged ({len(games)} games in window).")
+            return
+
+        changes = changes.assign(
+            # Keep game_date aligned with ET for now (canonical “NBA day”)
+            game_date=changes["game_date_et"],
+            season=changes["game_date_et"].map(season_from_date),
+            home_pts=None,
+            away_pts=None,
+        )
+        with conn:   # one transaction: commit, or roll back on error
+            # Scores are left as they are; results ingestion fills them
+            write_games(
+                conn, changes, WINDOW_COLUMNS,
+                update_cols=[c for c in WINDOW_COLUMNS if c not in ("game_id", "home_pts", "away_pts")],
+                keep_finals=True,
             )
+            change_sets.emit_games(conn, "ingest_schedule", changes, date_col="game_date_et")
+
+    counts = changes["change"].value_counts().to_dict()
+    print(f"Upserted {len(changes)} of {len(games)} scheduled games: {counts}")
+
+def fetch_season_schedule(season: str) -> pd.DataFrame:
+    """
+    Whole-season schedule in one request, normalised to one row per game:
+    game_id, game_date_et, home_team_id, away_team_id, status, season_type
+    """
+    sched = nba_client.fetch(scheduleleaguev2.ScheduleLeagueV2, season=season)
+    df = sched.get_data_frames()[0]
+    if df.empty:
+        return df
+
+    status_text = df["gameStatusText"].astype(str) if "gameStatusText" in df.columns else pd.Series("", index=df.index)
+    postponed = status_text.str.contains("PPD|Postponed|Cancel", case=False, regex=True)
+    if "postponedStatus" in df.columns:
+        postponed |= df["postponedStatus"].astype(str).eq("P")
+
+    games = pd.DataFrame({
+        "game_id": df["gameId"].astype(str),
+        "game_date_et": pd.to_datetime(df["gameDateEst"].astype(str).str[:10]).dt.date,
+        "home_team_id": pd.to_numeric(df["homeTeam_teamId"], errors="coerce"),
+        "away_team_id": pd.to_numeric(df["awayTeam_teamId"], errors="coerce"),
+        "postponed": postponed,
+    })
+    # TBD placeholders (e.g. playoff slots) have no teams yet
+    games = games[(games["home_team_id"] > 0) & (games["away_team_id"] > 0)].copy()
+    games["home_team_id"] = games["home_team_id"].astype(int)
+    games["away_team_id"] = games["away_team_id"].astype(int)
+    games["season_type"] = games["game_id"].str[2].map(SEASON_TYPES)
+    return games
+
+def diff_schedule(conn, games: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare the API schedule with `games` and keep only rows that need a write:
+      new        - not in the table yet
+      moved      - date or teams changed (or un-postponed) for a game that
+                   has not finished
+      postponed  - flagged PPD/cancelled by the league
+    Finals are never touched here; results ingestion owns them.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT game_id, game_date_et, home_team_id, away_team_id, lower(status)
+            FROM games
+            WHERE game_id = ANY(%s)
+            """,
+            (games["game_id"].tolist(),),
+        )
+        existing = pd.DataFrame(
+            cur.fetchall(),
+            columns=["game_id", "db_date", "db_home", "db_away", "db_status"],
+        )
+
+    merged = games.merge(existing, on="game_id", how="left")
+    is_new = merged["db_status"].isna()
+    open_game = ~is_new & (merged["db_status"] != "final")
+    moved = open_game & (
+        (merged["db_date"] != merged["game_date_et"])
+        | (merged["db_home"] != merged["home_team_id"])
+        | (merged["db_away"] != merged["away_team_id"])
+        | ((merged["db_status"] == "postponed") & ~merged["postponed"])
+    )
+    postponed = open_game & merged["postponed"] & (merged["db_status"] != "postponed")
+
+    merged["change"] = None
+    merged.loc[is_new, "change"] = "new"
+    merged.loc[moved, "change"] = "moved"
+    merged.loc[postponed, "change"] = "postponed"
+    merged["status"] = merged["postponed"].map({True: "postponed", False: "scheduled"})
+    return merged[merged["change"].notna()]
+
+def ingest_season_schedule(season: str):
+    games = fetch_season_schedule(season)
+    print(f"Season {season}: {len(games)} games in league schedule.")
+    if games.empty:
+        return
+
+    with connection() as conn:
+        change_sets.ensure_table(conn)
+        changes = diff_schedule(conn, games)
+        if changes.empty:
+            print("Schedule unchanged.")
+            return
+
+        changes = changes.assign(
+            game_date=changes["game_date_et"],   # game_date mirrors ET (canonical “NBA day”)
+            season=changes["game_date_et"].map(season_from_date),
+        )
+        with conn:
+            write_games(
+                conn, changes, SEASON_COLUMNS,
+                update_cols=[c for c in SEASON_COLUMNS if c not in ("game_id", "season_type")],
+                extra_set=["season_type = COALESCE(games.season_type, EXCLUDED.season_type)"],
+                keep_finals=True,
+            )
+            change_sets.emit_games(conn, "ingest_schedule", changes, date_col="game_date_et")
+
+    counts = changes["change"].value_counts().to_dict()
+    print(f"Applied {len(changes)} schedule changes: {counts}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest the NBA schedule into games.")
+    parser.add_argument(
+        "--season", nargs="?", const=season_label(datetime.now(ET).date()),
+        help="import the whole season schedule in one request and write only "
+             "new, moved or postponed games (default season: current)",
+    )
+    args = parser.parse_args()
 
-    print(f"Upserted {len(all_games)} scheduled games.")
+    if args.season:
+        ingest_season_schedule(args.season)
+    else:
+        ingest_schedule()
 
 if __name__ == "__main__":
-    ingest_schedule()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,172 @@
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from nba_api.stats.endpoints import leaguegamelog
+
+import nba_client
+import nba_parse
+from bulk_load import merge_frame
+from game_pairing import HOME_MARKER
+from response_cache import current_season_str
+from db import get_db_conn
+
+load_dotenv()
+
+# One team-mode LeagueGameLog per season type covers every team-game
+SEASON_TYPES_API = ["Regular Season", "Playoffs"]
+
+LOG_COLUMNS = [
+    "GAME_ID", "TEAM_ID", "MATCHUP", "MIN", "PTS",
+    "FGM", "FGA", "FG3M", "FTM", "FTA", "OREB", "DREB", "TOV",
+]
+NUMERIC_COLUMNS = ["MIN", "PTS", "FGM", "FGA", "FG3M", "FTM", "FTA", "OREB", "DREB", "TOV"]
+
+STATS_COLUMNS = [
+    "game_id", "team_id", "is_home", "pts", "opp_pts",
+    "poss_est", "ortg", "drtg", "netrtg", "pace_est",
+    "efg_pct", "tov_pct", "orb_pct", "ftr",
+]
+# Box-score derived; always refreshed
+DERIVED_COLUMNS = ["is_home", "pts", "opp_pts", "poss_est", "efg_pct", "tov_pct", "orb_pct", "ftr"]
+# ingest_boxscores writes the official values for these (0 when missing);
+# only fill them where it has not.
+KEEP_OFFICIAL = ["ortg", "drtg", "pace_est"]
+
+def kept(col):
+    return f"COALESCE(NULLIF(team_game_stats.{col}, 0), EXCLUDED.{col})"
+
+# netrtg follows whichever ortg / drtg are kept, so it always equals ortg - drtg
+KEEP_SET = [f"{c} = {kept(c)}" for c in KEEP_OFFICIAL] + [f"netrtg = {kept('ortg')} - {kept('drtg')}"]
+
+# -----------------------------
+# Fetch
+# -----------------------------
+def fetch_team_logs(season):
+    """Every team's box line for a season: one request per season type."""
+    frames = []
+    for season_type in SEASON_TYPES_API:
+        payload = nba_client.fetch_json(
+            leaguegamelog.LeagueGameLog,
+            season=season,
+            season_type_all_star=season_type,
+            player_or_team_abbreviation="T",
+        )
+        cols = nba_parse.result_set(payload, columns=LOG_COLUMNS, dtypes={c: "float" for c in NUMERIC_COLUMNS})
+        frames.append(pd.DataFrame(cols))
+    return pd.concat(frames, ignore_index=True)
+
+# -----------------------------
+# Derive
+# -----------------------------
+def team_game_stats(logs):
+    """
+    One row per team-game with possessions, ratings, pace and the Four
+    Factors, computed column-wise from the team's and opponent's lines.
+
+      poss  = mean of both teams' FGA - OREB + TOV + 0.44 * FTA
+      ortg  = 100 * PTS / poss,  drtg = 100 * OPP_PTS / poss
+      pace  = 48 * poss / (MIN / 5)
+      efg   = (FGM + 0.5 * FG3M) / FGA
+      tov   = TOV / (FGA + 0.44 * FTA + TOV)
+      orb   = OREB / (OREB + OPP_DREB)
+      ftr   = FTA / FGA
+    """
+    logs = logs.drop_duplicates(["GAME_ID", "TEAM_ID"])
+    pairs = logs.merge(logs, on="GAME_ID", suffixes=("", "_OPP"))
+    t = pairs[pairs["TEAM_ID"] != pairs["TEAM_ID_OPP"]].reset_index(drop=True)
+    if t.empty:
+        return pd.DataFrame(columns=STATS_COLUMNS)
+
+    def est_poss(sfx):
+        return t["FGA" + sfx] - t["OREB" + sfx] + t["TOV" + sfx] + 0.44 * t["FTA" + sfx]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        poss = (est_poss("") + est_poss("_OPP")) / 2
+        ortg = 100 * t["PTS"] / poss
+        drtg = 100 * t["PTS_OPP"] / poss
+        stats = pd.DataFrame({
+            "game_id": t["GAME_ID"].astype(str).to_numpy(),
+            "team_id": t["TEAM_ID"].astype("int64").to_numpy(),
+            "is_home": t["MATCHUP"].astype(str).str.contains(HOME_MARKER, regex=False).to_numpy(),
+            "pts": t["PTS"].round().astype("Int64").array,
+            "opp_pts": t["PTS_OPP"].round().astype("Int64").array,
+            "poss_est": poss.to_numpy(),
+            "ortg": ortg.to_numpy(),
+            "drtg": drtg.to_numpy(),
+            "netrtg": (ortg - drtg).to_numpy(),
+            "pace_est": (48 * poss / (t["MIN"] / 5)).to_numpy(),
+            "efg_pct": ((t["FGM"] + 0.5 * t["FG3M"]) / t["FGA"]).to_numpy(),
+            "tov_pct": (t["TOV"] / (t["FGA"] + 0.44 * t["FTA"] + t["TOV"])).to_numpy(),
+            "orb_pct": (t["OREB"] / (t["OREB"] + t["DREB_OPP"])).to_numpy(),
+            "ftr": (t["FTA"] / t["FGA"]).to_numpy(),
+        })
+    # 0/0 and x/0 from empty box lines -> NULL
+    numeric = stats.columns[5:]
+    stats[numeric] = stats[numeric].replace([np.inf, -np.inf], np.nan)
+    return stats
+
+# -----------------------------
+# Write
+# -----------------------------
+def known_games(conn, game_ids):
+    """team_game_stats references games; only write rows whose game exists."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT game_id FROM games WHERE game_id = ANY(%s)", (list(game_ids),))
+        return {row[0] for row in cur.fetchall()}
+
+def upsert_team_stats(conn, stats):
+    """COPY + merge into team_game_stats. Caller commits."""
+    stats = stats[stats["game_id"].isin(known_games(conn, stats["game_id"].unique()))]
+    return merge_frame(
+        conn, stats, "team_game_stats", STATS_COLUMNS, key_cols=["game_id", "team_id"],
+        update_cols=DERIVED_COLUMNS, extra_set=KEEP_SET, stage="team_game_stats_stage", temp=True,
+    )
+
+def ingest_season(conn, season):
+    t0 = time.perf_counter()
+    stats = team_game_stats(fetch_team_logs(season))
+    fetch_s = time.perf_counter() - t0
+    count = upsert_team_stats(conn, stats)
+    conn.commit()
+    print(f"{season}: {count} team-games from {len(stats)} log rows "
+          f"(fetch {fetch_s:.1f}s, write {time.perf_counter() - t0 - fetch_s:.1f}s)")
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Derive team_game_stats from season-level team game logs.")
+    parser.add_argument("seasons", nargs="*", help="seasons, e.g. 2024-25 (default: the current one)")
+    parser.add_argument("--from", dest="first", help="first season of a range, e.g. 1996-97")
+    parser.add_argument("--to", dest="last", help="last season of the range (default: the current one)")
+    args = parser.parse_args()
+
+    if args.first:
+        from backfill_finals import season_range
+        seasons = season_range(args.first, args.last or current_season_str())
+    else:
+        seasons = args.seasons or [current_season_str()]
+
+    print(f"--- TEAM STATS FROM LEAGUE GAME LOGS ({seasons[0]} -> {seasons[-1]}) ---")
+    conn = get_db_conn()
+    total, failed = 0, []
+    try:
+        for season in seasons:
+            try:
+                total += ingest_season(conn, season)
+            except Exception as e:
+                conn.rollback()
+                failed.append(season)
+                print(f"{season}: FAILED -> {e}")
+    finally:
+        conn.close()
+
+    print(f"Done. {total} team-games upserted.")
+    if failed:
+        print(f"Failed seasons: {' '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
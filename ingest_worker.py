@@ -0,0 +1,214 @@
+import os
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from dotenv import load_dotenv
+
+import db
+import work_queue
+from db import get_db_conn
+
+load_dotenv()
+
+ET = ZoneInfo("America/New_York")
+
+# Threads draining the queue. They share this process's nba_client, so
+# the API rate limit holds no matter how many there are.
+WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+IDLE_POLL_SECONDS = 30
+
+# -----------------------------
+# Task handlers (kind -> callable(conn, payload))
+# -----------------------------
+# Imported lazily so the worker only loads the ingestors it actually runs.
+def run_results(conn, payload):
+    import ingest_results_et
+    start = datetime.strptime(payload["start"], "%Y-%m-%d").date()
+    end = datetime.strptime(payload["end"], "%Y-%m-%d").date()
+    ingest_results_et.ingest_results_window_et(start, end)
+
+def run_schedule(conn, payload):
+    import ingest_schedule
+    if payload.get("season"):
+        ingest_schedule.ingest_season_schedule(payload["season"])
+    else:
+        ingest_schedule.ingest_schedule()
+
+def run_rosters(conn, payload):
+    import fetch_players
+    fetch_players.main()
+
+def run_player_logs(conn, payload):
+    import fetch_player_logs
+    fetch_player_logs.fetch_delta()
+
+def run_boxscore(conn, payload):
+    import ingest_boxscores
+    ingest_boxscores.ingest_game(conn, payload["game_id"])
+
+def run_season_games(conn, payload):
+    import backfill_finals
+    backfill_finals.backfill_season(payload["season"])
+
+def boxscore_retry(conn, payload):
+    # ingest_game records the failure in ingestion_state; follow its backoff
+    import ingest_boxscores
+    import ingestion_state
+    return ingestion_state.retry_state(conn, ingest_boxscores.INGESTOR, payload["game_id"])
+
+HANDLERS = {
+    "results": run_results,
+    "schedule": run_schedule,
+    "rosters": run_rosters,
+    "player_logs": run_player_logs,
+    "boxscore": run_boxscore,
+    "season_games": run_season_games,
+}
+
+# kind -> callable(conn, payload) returning (status, next_retry_at) from the
+# ingestor's own retry bookkeeping, or None to retry straight away
+RETRY_POLICIES = {
+    "boxscore": boxscore_retry,
+}
+
+# -----------------------------
+# Producers
+# -----------------------------
+def enqueue_daily(conn):
+    """The morning pipeline's fetches, ahead of anything already queued."""
+    today = datetime.now(ET).date()
+    window = {"start": str(today - timedelta(days=1)), "end": str(today)}
+    added = [
+        work_queue.enqueue(conn, "results", window, work_queue.PRIORITY_FINALS),
+        work_queue.enqueue(conn, "schedule", {}, work_queue.PRIORITY_SCHEDULE),
+        work_queue.enqueue(conn, "rosters", {}, work_queue.PRIORITY_ROSTERS),
+        work_queue.enqueue(conn, "player_logs", {}, work_queue.PRIORITY_LOGS),
+    ]
+    return sum(added)
+
+def enqueue_boxscores(conn):
+    import ingest_boxscores
+    game_ids = sorted(ingest_boxscores.get_missing_game_ids(conn))
+    return work_queue.enqueue_many(conn, "boxscore", [{"game_id": g} for g in game_ids])
+
+def enqueue_seasons(conn, first, last):
+    import backfill_finals
+    seasons = backfill_finals.season_range(first, last)
+    return work_queue.enqueue_many(conn, "season_games", [{"season": s} for s in seasons])
+
+# -----------------------------
+# Worker
+# -----------------------------
+def worker_loop(name, forever, stop):
+    conn = get_db_conn()
+    done = 0
+    try:
+        while not stop.is_set():
+            task = work_queue.claim(conn)
+            if task is None:
+                if not forever:
+                    break
+                stop.wait(IDLE_POLL_SECONDS)
+                continue
+
+            handler = HANDLERS.get(task.kind)
+            try:
+                if handler is None:
+                    raise ValueError(f"unknown task kind {task.kind!r}")
+                handler(conn, task.payload)
+                work_queue.complete(conn, task)
+                done += 1
+                print(f"[{name}] done    p{task.priority} {task.kind} {task.payload}")
+            except (Exception, SystemExit) as e:
+                # Scripts reused as handlers may sys.exit(); that fails the task, not the worker
+                error = f"exited with status {e.code}" if isinstance(e, SystemExit) else str(e)
+                conn.rollback()
+                policy = RETRY_POLICIES.get(task.kind)
+                state = policy(conn, task.payload) if policy else None
+                if state is None:
+                    work_queue.fail(conn, task, error)
+                else:
+                    status, next_retry_at = state
+                    work_queue.fail(conn, task, error, retry_at=next_retry_at, give_up=status == "failed")
+                print(f"[{name}] failed  p{task.priority} {task.kind} {task.payload} (attempt {task.attempts}) -> {error}")
+    finally:
+        # Session locks outlive rollback: never hand a locked connection back to the pool
+        if not conn.closed:
+            work_queue.release_locks(conn)
+        conn.close()
+    return done
+
+def run(workers, forever):
+    # Each thread holds a connection and its handler may check out another
+    db.configure(maxconn=2 * workers + 1)
+    conn = get_db_conn()
+    try:
+        work_queue.ensure_table(conn)
+        stale = work_queue.requeue_stale(conn)
+        if stale:
+            print(f"Re-queued {stale} tasks left running by a dead worker.")
+        print(f"Pending: {work_queue.pending_counts(conn) or 'none'}")
+    finally:
+        conn.close()
+
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=worker_loop, args=(f"w{i}", forever, stop), daemon=True)
+        for i in range(workers)
+    ]
+    for t in threads:
+        t.start()
+    try:
+        while any(t.is_alive() for t in threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nStopping after in-flight tasks...")
+        stop.set()
+        for t in threads:
+            t.join()
+
+def main():
+    parser = argparse.ArgumentParser(description="Priority-ordered ingestion work queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="drain the queue, most urgent first")
+    p_run.add_argument("--workers", type=int, default=WORKERS)
+    p_run.add_argument("--forever", action="store_true", help="keep polling for new tasks when the queue is empty")
+
+    p_enq = sub.add_parser("enqueue", help="queue a batch of tasks")
+    p_enq.add_argument("what", choices=["daily", "boxscores", "seasons"])
+    p_enq.add_argument("--from", dest="first", help="first season for 'seasons', e.g. 1996-97")
+    p_enq.add_argument("--to", dest="last", help="last season for 'seasons'")
+
+    sub.add_parser("status", help="pending tasks by kind")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run(args.workers, args.forever)
+        return
+
+    conn = get_db_conn()
+    try:
+        work_queue.ensure_table(conn)
+        if args.command == "status":
+            print(work_queue.pending_counts(conn) or "Queue empty.")
+            return
+
+        if args.what == "daily":
+            added = enqueue_daily(conn)
+        elif args.what == "boxscores":
+            added = enqueue_boxscores(conn)
+        else:
+            if not args.first or not args.last:
+                parser.error("enqueue seasons needs --from and --to")
+            added = enqueue_seasons(conn, args.first, args.last)
+        conn.commit()
+        print(f"Queued {added} new {args.what} tasks.")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
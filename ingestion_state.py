@@ -0,0 +1,158 @@
+from datetime import date, datetime
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+
+MAX_ATTEMPTS = 5
+RETRY_BASE = "1 hour"        # doubles per attempt: 1h, 2h, 4h, 8h ...
+RETRY_CAP = "7 days"
+
+
+# -----------------------------
+# Schema
+# -----------------------------
+CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS ingestion_state (
+        ingestor       TEXT NOT NULL,
+        game_id        TEXT NOT NULL,
+        game_date      DATE,
+        status         TEXT NOT NULL DEFAULT 'pending',   -- pending | done | failed
+        attempts       INTEGER NOT NULL DEFAULT 0,
+        last_error     TEXT,
+        next_retry_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+        updated_at     TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (ingestor, game_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_ingestion_state_pending
+        ON ingestion_state(ingestor, next_retry_at) WHERE status = 'pending';
+    CREATE INDEX IF NOT EXISTS idx_ingestion_state_failed
+        ON ingestion_state(ingestor) WHERE status = 'failed';
+"""
+
+
+class DeadLetter(NamedTuple):
+    game_id: str
+    game_date: Optional[date]
+    attempts: int
+    last_error: Optional[str]
+
+
+def ensure_table(conn):
+    with conn.cursor() as cur:
+        cur.execute(CREATE_SQL)
+    conn.commit()
+
+
+# -----------------------------
+# Work lookup
+# -----------------------------
+def pending(conn, ingestor: str, limit: Optional[int] = None) -> List[str]:
+    """Games due for (re)fetching; an index range scan, O(pending)."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT game_id FROM ingestion_state
+            WHERE ingestor = %s AND status = 'pending' AND next_retry_at <= now()
+            ORDER BY next_retry_at, game_id
+            LIMIT %s
+            """,
+            (ingestor, limit),
+        )
+        return [row[0] for row in cur.fetchall()]
+
+
+def retry_state(conn, ingestor: str, game_id: str) -> Optional[Tuple[str, datetime]]:
+    """(status, next_retry_at) for one game, or None if it has no state row."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT status, next_retry_at FROM ingestion_state WHERE ingestor = %s AND game_id = %s",
+            (ingestor, game_id),
+        )
+        return cur.fetchone()
+
+
+def counts(conn, ingestor: str) -> dict:
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT status, count(*) FROM ingestion_state WHERE ingestor = %s GROUP BY status",
+            (ingestor,),
+        )
+        return dict(cur.fetchall())
+
+
+# -----------------------------
+# Outcomes (caller commits)
+# -----------------------------
+def mark_done(conn, ingestor: str, game_ids: Iterable[str]):
+    """Upsert: a game fetched before it was ever seeded still gets its done row."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO ingestion_state (ingestor, game_id, game_date, status, attempts)
+            SELECT %s, ids.game_id, g.game_date, 'done', 1
+            FROM unnest(%s::text[]) AS ids(game_id)
+            LEFT JOIN games g ON g.game_id = ids.game_id
+            ON CONFLICT (ingestor, game_id) DO UPDATE
+            SET status = 'done', attempts = ingestion_state.attempts + 1, last_error = NULL, updated_at = now()
+            """,
+            (ingestor, list(game_ids)),
+        )
+
+
+def mark_failed(conn, ingestor: str, game_id: str, error: str):
+    """
+    Record a failed fetch (inserting the state row if the game was never
+    seeded). Retries back off exponentially; after MAX_ATTEMPTS the game
+    moves to the dead-letter state ('failed') and costs no more API calls
+    until it is retried by hand.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            INSERT INTO ingestion_state
+                (ingestor, game_id, game_date, status, attempts, last_error, next_retry_at)
+            SELECT %(ingestor)s, %(game_id)s, (SELECT game_date FROM games WHERE game_id = %(game_id)s),
+                   CASE WHEN 1 >= %(max)s THEN 'failed' ELSE 'pending' END,
+                   1, %(error)s, now() + interval '{RETRY_BASE}'
+            ON CONFLICT (ingestor, game_id) DO UPDATE
+            SET attempts = ingestion_state.attempts + 1,
+                last_error = EXCLUDED.last_error,
+                status = CASE WHEN ingestion_state.attempts + 1 >= %(max)s THEN 'failed' ELSE 'pending' END,
+                next_retry_at = now() + LEAST(
+                    interval '{RETRY_BASE}' * power(2, ingestion_state.attempts),
+                    interval '{RETRY_CAP}'
+                ),
+                updated_at = now()
+            """,
+            {"ingestor": ingestor, "game_id": game_id, "error": error[:2000], "max": MAX_ATTEMPTS},
+        )
+
+
+# -----------------------------
+# Dead letters
+# -----------------------------
+def dead_letters(conn, ingestor: str) -> List[DeadLetter]:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT game_id, game_date, attempts, last_error
+            FROM ingestion_state
+            WHERE ingestor = %s AND status = 'failed'
+            ORDER BY game_date, game_id
+            """,
+            (ingestor,),
+        )
+        return [DeadLetter(*row) for row in cur.fetchall()]
+
+
+def retry_failed(conn, ingestor: str) -> int:
+    """Put every dead-lettered game back in the queue with a fresh budget."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE ingestion_state
+            SET status = 'pending', attempts = 0, next_retry_at = now(), updated_at = now()
+            WHERE ingestor = %s AND status = 'failed'
+            """,
+            (ingestor,),
+        )
+        return cur.rowcount
@@ -1,86 +1,53 @@
 import sys
-import os
-import psycopg2
-from psycopg2.extras import execute_values
 from nba_api.stats.endpoints import leaguegamelog
 import pandas as pd
 from datetime import datetime
 
-# Config
-DB_HOST = os.getenv("PGHOST", "localhost")
-DB_NAME = os.getenv("PGDATABASE", "nba")
-DB_USER = os.getenv("PGUSER", "nba_user")
-DB_PASS = os.getenv("PGPASSWORD", "nba_pass")
+import change_sets
+import nba_client
+from game_pairing import pair_home_away
+from games_writer import write_games
+from response_cache import current_season_str
+from db import get_db_conn
 
-def get_db_conn():
-    if not DB_PASS:
-        print("Error: PGPASSWORD not set.")
-        sys.exit(1)
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
-
-def main():
-    print("\n--- INITIALIZING FULL SEASON HISTORY (2025-26) ---\n")
+def main(season: str):
+    print(f"\n--- INITIALIZING FULL SEASON HISTORY ({season}) ---\n")
     conn = get_db_conn()
     
     print("Fetching game logs from NBA API...")
     try:
-        log = leaguegamelog.LeagueGameLog(season='2025-26', player_or_team_abbreviation='T')
+        log = nba_client.fetch(leaguegamelog.LeagueGameLog, season=season, player_or_team_abbreviation='T')
         df = log.get_data_frames()[0]
     except Exception as e:
         print(f"Error fetching data from NBA API: {e}")
         return
     
-    unique_games = df['GAME_ID'].unique()
-    print(f"Found {len(unique_games)} completed games.")
-    
-    games_to_insert = []
+    games = pair_home_away(df)
+    print(f"Found {len(games)} completed games.")
     
-    for game_id in unique_games:
-        rows = df[df['GAME_ID'] == game_id]
-        if len(rows) != 2:
-            continue
-            
-        r0 = rows.iloc[0]
-        if 'vs.' in r0['MATCHUP']:
-            home = r0
-            away = rows.iloc[1]
-        else:
-            away = r0
-            home = rows.iloc[1]
-            
-        game_date = home['GAME_DATE']
-        
-        # FIX: Added 'Final' for the status column
-        games_to_insert.append((
-            str(game_id),
-            game_date,            # game_date_et
-            game_date,            # game_date
-            int(home['TEAM_ID']),
-            int(away['TEAM_ID']),
-            int(home['PTS']),
-            int(away['PTS']),
-            'Final'               # status
-        ))
-        
-    print(f"Prepared {len(games_to_insert)} games for database insertion...")
+    games = games.assign(game_date_et=games['game_date'], status='Final')
+    print(f"Prepared {len(games)} games for database insertion...")
 
-    # FIX: Updated SQL to include 'status'
-    sql = """
-        INSERT INTO games 
-        (game_id, game_date_et, game_date, home_team_id, away_team_id, home_pts, away_pts, status)
-        VALUES %s
-        ON CONFLICT (game_id) DO UPDATE SET
-            home_pts = EXCLUDED.home_pts,
-            away_pts = EXCLUDED.away_pts,
-            status = EXCLUDED.status;
-    """
-    
-    with conn.cursor() as cur:
-        execute_values(cur, sql, games_to_insert)
-        
-    conn.commit()
-    conn.close()
+    change_sets.ensure_table(conn)
+    try:
+        # One staged upsert + change set, committed together
+        write_games(
+            conn, games,
+            ['game_id', 'game_date_et', 'game_date', 'home_team_id', 'away_team_id',
+             'home_pts', 'away_pts', 'status'],
+            update_cols=['home_pts', 'away_pts', 'status'],
+        )
+        change_sets.emit_games(conn, "init_season", games)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Error writing games: {e}")
+        return
+    finally:
+        conn.close()
     print("Success! Full season history loaded.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Usage: python init_season.py [YYYY-YY]   (default: current season)
+    # For many seasons at once use backfill_finals.py --from/--to
+    main(sys.argv[1] if len(sys.argv) > 1 else current_season_str())
\ No newline at end of file
@@ -1,17 +1,8 @@
 import sys
 import os
 import pandas as pd
-import psycopg2
 import matplotlib.pyplot as plt
-
-# Config
-DB_HOST = "localhost"
-DB_NAME = "nba"
-DB_USER = "nba_user"
-DB_PASS = "nba_pass"
-
-def get_db_conn():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
+from db import get_db_conn
 
 def main():
     print("\n--- INVESTIGATING DAY-OF-WEEK TRENDS ---\n")
@@ -0,0 +1,246 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+from dotenv import load_dotenv
+
+import nba_parse
+
+load_dotenv()
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+LANDING_DIR = os.getenv("NBA_API_LANDING_DIR", os.path.join("data", "landing"))
+LANDING_ENABLED = os.getenv("NBA_API_LANDING", "1") != "0"
+READ_WORKERS = int(os.getenv("NBA_API_LANDING_WORKERS", str(os.cpu_count() or 4)))
+
+# Columns added to every landed result set
+META_COLUMNS = ["_request_key", "_params", "_fetched_at", "_result_set", "_result_index"]
+
+
+def request_key(endpoint_name: str, parameters: dict) -> str:
+    blob = json.dumps({"endpoint": endpoint_name, "params": parameters}, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:32]
+
+
+def season_partition(parameters: dict) -> str:
+    """Season from the request, or from the game id for per-game endpoints."""
+    for name in ("Season", "SeasonNullable", "SeasonYear"):
+        if parameters.get(name):
+            return str(parameters[name])
+    game_id = str(parameters.get("GameID") or parameters.get("GameId") or "")
+    if len(game_id) == 10:
+        # 0022500123 -> 2025-26 (two-digit start year at positions 3-4)
+        yy = int(game_id[3:5])
+        start = 1900 + yy if yy >= 46 else 2000 + yy
+        return f"{start}-{(start + 1) % 100:02d}"
+    return "unknown"
+
+
+# -----------------------------
+# Landing zone
+# -----------------------------
+class LandingZone:
+    """
+    Copy of every payload the client fetches.
+
+    Each result set of a parsed response is written to
+      <root>/<endpoint>/season=<season>/date=<fetch date>/<key>-<index>.parquet
+    with the request parameters and fetch time as extra columns, so tables
+    can be re-derived from disk without touching the API. Responses fetched
+    with parse=False (nba_client.fetch_json) never get DataFrames; they are
+    landed as the raw JSON text, <key>.json in the same directory, and
+    turned into frames only when read back. A request fetched again on the
+    same day overwrites its files; readers keep the latest copy.
+    """
+
+    def __init__(self, root: str = LANDING_DIR, enabled: bool = LANDING_ENABLED):
+        self.root = root
+        self.enabled = enabled
+        self._warned = False
+        self._lock = threading.Lock()
+
+    def _warn(self, message: str):
+        with self._lock:
+            if not self._warned:
+                print(f"[landing] {message}")
+                self._warned = True
+
+    def write(self, endpoint):
+        """Land a loaded endpoint. Never raises: landing must not break ingestion."""
+        if not self.enabled:
+            return
+        try:
+            fetched_at = datetime.now(timezone.utc)
+            key = request_key(endpoint.endpoint, endpoint.parameters)
+            part = os.path.join(
+                self.root,
+                endpoint.endpoint,
+                f"season={season_partition(endpoint.parameters)}",
+                f"date={fetched_at.date().isoformat()}",
+            )
+            os.makedirs(part, exist_ok=True)
+            params = json.dumps(endpoint.parameters, sort_keys=True, default=str)
+
+            if getattr(endpoint, "data_sets", None) is None:
+                # Fetched with parse=False: keep it that way
+                self._write_raw(endpoint, os.path.join(part, f"{key}.json"), params, fetched_at)
+                return
+
+            frames = endpoint.get_data_frames()
+            names = list(getattr(endpoint, "expected_data", {}) or {})
+            if len(names) != len(frames):
+                names = [f"set{i}" for i in range(len(frames))]
+
+            for i, (name, df) in enumerate(zip(names, frames)):
+                df = df.assign(
+                    _request_key=key,
+                    _params=params,
+                    _fetched_at=pd.Timestamp(fetched_at),
+                    _result_set=name,
+                    _result_index=i,
+                )
+                path = os.path.join(part, f"{key}-{i}.parquet")
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                df.to_parquet(tmp, index=False)
+                os.replace(tmp, path)
+        except ImportError as e:
+            # No parquet engine installed: switch off rather than fail every fetch
+            self.enabled = False
+            self._warn(f"disabled ({e})")
+        except Exception as e:
+            self._warn(f"could not land {endpoint.endpoint}: {e}")
+
+    @staticmethod
+    def _write_raw(endpoint, path: str, params: str, fetched_at: datetime):
+        # The response text is spliced in as is: no decode / re-encode
+        text = (
+            f'{{"_request_key": {json.dumps(os.path.basename(path)[:-5])}, '
+            f'"_params": {json.dumps(params)}, '
+            f'"_fetched_at": {json.dumps(fetched_at.isoformat())}, '
+            f'"response": {endpoint.nba_response.get_response()}}}'
+        )
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+    # -----------------------------
+    # Readers
+    # -----------------------------
+    def files(self, endpoint_name: str, seasons: Optional[List[str]] = None, result_index: Optional[int] = None,
+              suffix: Optional[str] = None) -> List[str]:
+        season_dirs = [f"season={s}" for s in seasons] if seasons else ["season=*"]
+        if suffix is None:
+            suffix = f"-{result_index}.parquet" if result_index is not None else ".parquet"
+        paths = []
+        for season_dir in season_dirs:
+            paths += glob.glob(os.path.join(self.root, endpoint_name, season_dir, "date=*", f"*{suffix}"))
+        return sorted(paths)
+
+    def read(self, endpoint_name: str, result_index: int = 0, seasons: Optional[List[str]] = None,
+             columns: Optional[List[str]] = None, workers: int = READ_WORKERS) -> pd.DataFrame:
+        """
+        One result set across every landed request, read in parallel and
+        reduced to the latest fetch of each request.
+        """
+        paths = self.files(endpoint_name, seasons, result_index)
+        paths += self.files(endpoint_name, seasons, suffix=".json")
+        if not paths:
+            return pd.DataFrame()
+
+        wanted = columns + META_COLUMNS if columns else None
+
+        def read_one(path):
+            if path.endswith(".json"):
+                df = raw_result_set(path, result_index)
+            else:
+                df = pd.read_parquet(path)
+            return df[[c for c in wanted if c in df.columns]] if wanted else df
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            frames = [df for df in pool.map(read_one, paths) if not df.empty]
+        if not frames:
+            return pd.DataFrame()
+
+        df = pd.concat(frames, ignore_index=True)
+        latest = df.groupby("_request_key")["_fetched_at"].transform("max")
+        return df[df["_fetched_at"] == latest].reset_index(drop=True)
+
+    def responses(self, endpoint_name: str, seasons: Optional[List[str]] = None,
+                  workers: int = READ_WORKERS) -> Iterator[Tuple[dict, List[pd.DataFrame]]]:
+        """
+        (params, frames) per request landed as Parquet, frames in
+        get_data_frames() order with the meta columns dropped: drop-in for
+        parsers written against live endpoint objects. Raw JSON landings
+        are read with payloads().
+        """
+        paths = self.files(endpoint_name, seasons)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(pd.read_parquet, paths))
+
+        by_request = {}
+        for df in frames:
+            if df.empty:
+                continue
+            meta = df.iloc[0]
+            entry = by_request.setdefault(meta["_request_key"], {})
+            idx = int(meta["_result_index"])
+            if idx not in entry or meta["_fetched_at"] > entry[idx].iloc[0]["_fetched_at"]:
+                entry[idx] = df
+
+        for entry in by_request.values():
+            first = next(iter(entry.values()))
+            params = json.loads(first.iloc[0]["_params"])
+            yield params, [
+                entry[i].drop(columns=META_COLUMNS) if i in entry else pd.DataFrame()
+                for i in range(max(entry) + 1)
+            ]
+
+
+    def payloads(self, endpoint_name: str, seasons: Optional[List[str]] = None,
+                 workers: int = READ_WORKERS) -> Iterator[Tuple[dict, dict]]:
+        """
+        (params, response JSON) per request landed as raw JSON, latest
+        fetch of each: drop-in for parsers written against fetch_json().
+        """
+        paths = self.files(endpoint_name, seasons, suffix=".json")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            entries = list(pool.map(read_raw, paths))
+
+        latest = {}
+        for entry in entries:
+            key = entry["_request_key"]
+            if key not in latest or entry["_fetched_at"] > latest[key]["_fetched_at"]:
+                latest[key] = entry
+        for entry in latest.values():
+            yield json.loads(entry["_params"]), entry["response"]
+
+
+def read_raw(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def raw_result_set(path: str, result_index: int = 0) -> pd.DataFrame:
+    """One result set of a raw JSON landing as a frame with the meta columns."""
+    entry = read_raw(path)
+    try:
+        cols = nba_parse.result_set(entry["response"], index=result_index)
+    except (KeyError, IndexError):
+        return pd.DataFrame()
+    return pd.DataFrame(cols).assign(
+        _request_key=entry["_request_key"],
+        _params=entry["_params"],
+        _fetched_at=pd.Timestamp(entry["_fetched_at"]),
+        _result_set=str(result_index),
+        _result_index=result_index,
+    )
@@ -0,0 +1,165 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+import psycopg2
+from dotenv import load_dotenv
+from nba_api.stats.endpoints import scoreboardv2
+
+import nba_client
+import change_sets
+import response_cache
+from games_writer import write_games
+from db import get_db_conn
+
+load_dotenv()
+
+ET = ZoneInfo("America/New_York")
+
+POLL_SECONDS = int(os.getenv("LIVE_POLL_SECONDS", "60"))
+IDLE_POLL_SECONDS = 10 * 60      # before tip-off nothing moves
+MAX_HOURS = 10                   # safety stop for a forgotten poller
+
+# ScoreboardV2 GAME_STATUS_ID -> games.status
+STATUS_BY_ID = {1: "scheduled", 2: "in_progress", 3: "final"}
+SNAPSHOT_COLUMNS = ["game_id", "status", "home_pts", "away_pts"]
+WRITE_COLUMNS = [
+    "game_id", "game_date", "game_date_et", "home_team_id", "away_team_id",
+    "status", "home_pts", "away_pts",
+]
+
+def fetch_snapshot(game_date):
+    """One row per game on game_date: ids, teams, status and current score."""
+    sb = nba_client.fetch(
+        scoreboardv2.ScoreboardV2,
+        cache_ttl=response_cache.NO_CACHE,
+        game_date=game_date.strftime("%m/%d/%Y"),
+    )
+    header = sb.game_header.get_data_frame()
+    if header is None or header.empty:
+        return pd.DataFrame(columns=WRITE_COLUMNS)
+    lines = sb.line_score.get_data_frame()
+
+    header = header.drop_duplicates("GAME_ID")
+    pts = (
+        lines.drop_duplicates(["GAME_ID", "TEAM_ID"]).set_index(["GAME_ID", "TEAM_ID"])["PTS"]
+        if lines is not None and not lines.empty else pd.Series(dtype=float)
+    )
+
+    def score(team_col):
+        keys = pd.MultiIndex.from_arrays([header["GAME_ID"], header[team_col]])
+        return pd.to_numeric(pts.reindex(keys).to_numpy(), errors="coerce")
+
+    snap = pd.DataFrame({
+        "game_id": header["GAME_ID"].astype(str).to_numpy(),
+        "game_date": game_date,
+        "game_date_et": game_date,
+        "home_team_id": header["HOME_TEAM_ID"].astype(int).to_numpy(),
+        "away_team_id": header["VISITOR_TEAM_ID"].astype(int).to_numpy(),
+        "status": header["GAME_STATUS_ID"].astype(int).map(STATUS_BY_ID).fillna("scheduled").to_numpy(),
+        "home_pts": score("HOME_TEAM_ID"),
+        "away_pts": score("VISITOR_TEAM_ID"),
+    })
+    snap[["home_pts", "away_pts"]] = snap[["home_pts", "away_pts"]].astype("Int64")
+    # Scores mean nothing before tip-off
+    snap.loc[snap["status"] == "scheduled", ["home_pts", "away_pts"]] = pd.NA
+    return snap
+
+def load_db_snapshot(conn, game_ids):
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT game_id, lower(status), home_pts, away_pts FROM games WHERE game_id = ANY(%s)",
+            (list(game_ids),),
+        )
+        rows = cur.fetchall()
+    db = pd.DataFrame(rows, columns=SNAPSHOT_COLUMNS)
+    db[["home_pts", "away_pts"]] = db[["home_pts", "away_pts"]].astype("Int64")
+    return db
+
+def diff_snapshot(current, previous):
+    """Rows of `current` whose status or score differs from `previous`."""
+    merged = current.merge(previous, on="game_id", how="left", suffixes=("", "_prev"))
+    changed = merged["status_prev"].isna() | (merged["status"] != merged["status_prev"])
+    for col in ("home_pts", "away_pts"):
+        a, b = merged[col], merged[f"{col}_prev"]
+        changed |= (a.isna() != b.isna()) | (a.notna() & b.notna() & (a != b))
+    # Finals are never reopened by a stale scoreboard
+    changed &= merged["status_prev"].fillna("") != "final"
+    return merged.loc[changed.fillna(False).to_numpy(dtype=bool), current.columns]
+
+def apply_changes(conn, changes):
+    """Write changed rows; emit a change set for games that just went final."""
+    write_games(conn, changes, WRITE_COLUMNS, update_cols=["status", "home_pts", "away_pts"], keep_finals=True)
+    finals = changes[changes["status"] == "final"]
+    change_sets.emit_games(conn, "live_poll", finals)
+    conn.commit()
+    return finals
+
+def run_refresh():
+    subprocess.run([sys.executable, "refresh_features.py"])
+
+def main():
+    parser = argparse.ArgumentParser(description="Poll tonight's scoreboard and write score/status changes as they happen.")
+    parser.add_argument("--date", help="ET game date to watch (YYYY-MM-DD, default: today ET)")
+    parser.add_argument("--interval", type=int, default=POLL_SECONDS, help="seconds between polls while games are live")
+    parser.add_argument("--refresh", action="store_true", help="run refresh_features.py whenever games go final")
+    args = parser.parse_args()
+
+    game_date = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else datetime.now(ET).date()
+    print(f"--- Live polling {game_date} every {args.interval}s ---")
+
+    conn = get_db_conn()
+    change_sets.ensure_table(conn)
+    previous = None
+    deadline = time.monotonic() + MAX_HOURS * 3600
+
+    try:
+        while time.monotonic() < deadline:
+            try:
+                current = fetch_snapshot(game_date)
+            except Exception as e:
+                print(f"{datetime.now(ET):%H:%M:%S} scoreboard error -> {e}")
+                time.sleep(args.interval)
+                continue
+
+            if current.empty:
+                print("No games on this date.")
+                break
+            if previous is None:
+                # First pass diffs against the table, so a restart writes nothing twice
+                previous = load_db_snapshot(conn, current["game_id"])
+
+            changes = diff_snapshot(current, previous)
+            if not changes.empty:
+                try:
+                    finals = apply_changes(conn, changes)
+                except psycopg2.Error as e:
+                    # Keep the old snapshot so the same changes are retried next poll
+                    conn.rollback()
+                    print(f"{datetime.now(ET):%H:%M:%S} write failed -> {e}")
+                    time.sleep(args.interval)
+                    continue
+                for g in changes.itertuples(index=False):
+                    score = "" if pd.isna(g.home_pts) else f" {g.home_pts}-{g.away_pts}"
+                    print(f"{datetime.now(ET):%H:%M:%S} {g.game_id}: {g.status.upper()}{score}")
+                if args.refresh and not finals.empty:
+                    run_refresh()
+            previous = current[SNAPSHOT_COLUMNS]
+
+            statuses = set(current["status"])
+            if statuses == {"final"}:
+                print("All games final.")
+                break
+            time.sleep(args.interval if "in_progress" in statuses else min(IDLE_POLL_SECONDS, args.interval * 10))
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import sys
+import time
+
+from dotenv import load_dotenv
+
+import fetch_player_logs
+from fetch_player_logs import LOG_COLUMNS, ensure_log_partitions, logs_table_ddl, logs_table_kind
+from seasons import season_from_date
+from db import get_db_conn
+
+load_dotenv()
+
+# games keeps its single-column primary key: team_game_stats, features_team_game
+# and predictions reference games(game_id), and every unique key
+# on a partitioned table has to include the partition column. At ~1,300 rows a
+# season it is small enough that indexes on the hot filters do the job.
+GAMES_INDEXES = [
+    # every feature view: WHERE status = 'final' / 'scheduled' [AND game_date_et ...]
+    "CREATE INDEX IF NOT EXISTS idx_{table}_status_date_et ON {table} (status, game_date_et)",
+    # schedule and prediction lookups: WHERE game_date_et = ?
+    "CREATE INDEX IF NOT EXISTS idx_{table}_date_et ON {table} (game_date_et)",
+]
+
+def index_games(cur, table='games'):
+    for ddl in GAMES_INDEXES:
+        cur.execute(ddl.format(table=table))
+
+# -----------------------------
+# Dependent views
+# -----------------------------
+def dependent_views(cur, table):
+    """
+    Every view / materialized view reading `table`, directly or through
+    other views, as (name, relkind, definition, index DDL) in an order
+    they can be created in.
+    """
+    cur.execute("""
+        WITH RECURSIVE deps(oid, depth) AS (
+            SELECT r.ev_class, 1
+            FROM pg_depend d
+            JOIN pg_rewrite r ON r.oid = d.objid
+            WHERE d.classid = 'pg_rewrite'::regclass
+              AND d.refobjid = %s::regclass AND r.ev_class <> d.refobjid
+          UNION
+            SELECT r.ev_class, deps.depth + 1
+            FROM deps
+            JOIN pg_depend d ON d.refobjid = deps.oid
+            JOIN pg_rewrite r ON r.oid = d.objid
+            WHERE d.classid = 'pg_rewrite'::regclass AND r.ev_class <> d.refobjid
+        )
+        SELECT c.oid::regclass::text, c.relkind, pg_get_viewdef(c.oid),
+               ARRAY(SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i WHERE i.indrelid = c.oid)
+        FROM deps
+        JOIN pg_class c ON c.oid = deps.oid
+        GROUP BY c.oid, c.relkind
+        ORDER BY max(deps.depth), c.oid
+    """, (table,))
+    return cur.fetchall()
+
+def view_kind(relkind):
+    return "MATERIALIZED VIEW" if relkind == 'm' else "VIEW"
+
+def drop_views(cur, views):
+    # dependents first; no CASCADE, so nothing we did not capture can go
+    for name, relkind, _, _ in reversed(views):
+        cur.execute(f"DROP {view_kind(relkind)} {name}")
+
+def create_views(cur, views):
+    for name, relkind, definition, indexes in views:
+        cur.execute(f"CREATE {view_kind(relkind)} {name} AS {definition.rstrip().rstrip(';')}")
+        for ddl in indexes:
+            cur.execute(ddl)
+
+# -----------------------------
+# player_logs -> partitioned
+# -----------------------------
+def migrate_player_logs(cur):
+    """Swap a plain player_logs for the season-partitioned layout. Returns rows moved."""
+    kind = logs_table_kind(cur)
+    tracked = [int(s[:4]) for s in fetch_player_logs.SEASONS_TO_TRACK]
+    if kind != 'r':
+        print("player_logs: already partitioned" if kind == 'p' else "player_logs: creating partitioned table")
+        cur.execute(logs_table_ddl())
+        ensure_log_partitions(cur, tracked)
+        return 0
+
+    # Views would follow the rename to player_logs_flat and block its drop.
+    # Their definitions name player_logs, so recreated they read the new table.
+    views = dependent_views(cur, "player_logs")
+    drop_views(cur, views)
+
+    cur.execute("ALTER TABLE player_logs RENAME TO player_logs_flat")
+    # the old primary key keeps its name; free it for the new table's
+    cur.execute("ALTER INDEX IF EXISTS player_logs_pkey RENAME TO player_logs_flat_pkey")
+    cur.execute(logs_table_ddl())
+
+    cur.execute("SELECT MIN(game_date), MAX(game_date) FROM player_logs_flat")
+    first, last = cur.fetchone()
+    years = list(range(season_from_date(first), season_from_date(last) + 1)) if first else []
+    ensure_log_partitions(cur, years + tracked)
+
+    cols = ", ".join(LOG_COLUMNS)
+    cur.execute(f"""
+        INSERT INTO player_logs ({cols})
+        SELECT {cols} FROM player_logs_flat WHERE game_date IS NOT NULL
+        ON CONFLICT DO NOTHING
+    """)
+    moved = cur.rowcount
+    cur.execute("SELECT COUNT(*) FROM player_logs_flat WHERE game_date IS NULL")
+    undated = cur.fetchone()[0]
+    if undated:
+        print(f"player_logs: dropping {undated} rows without a game_date (now part of the key)")
+    create_views(cur, views)
+    if views:
+        print(f"player_logs: recreated {len(views)} dependent views: {', '.join(v[0] for v in views)}")
+    cur.execute("DROP TABLE player_logs_flat")
+    # merge_frame's staging table was cloned from the old layout
+    cur.execute("DROP TABLE IF EXISTS player_logs_stage")
+    print(f"player_logs: {moved} rows moved into {len(set(years + tracked))} season partitions")
+    return moved
+
+def main():
+    print("--- PARTITION player_logs / INDEX games ---")
+    t0 = time.perf_counter()
+    conn = get_db_conn()
+    try:
+        with conn.cursor() as cur:
+            migrate_player_logs(cur)
+            index_games(cur)
+        conn.commit()
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE player_logs")
+            cur.execute("ANALYZE games")
+    except Exception as e:
+        conn.rollback()
+        print(f"Migration failed: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+    print(f"Done in {time.perf_counter() - t0:.1f}s.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from nba_api.stats.library.http import NBAStatsHTTP
+
+import landing_zone
+import nba_replay
+import response_cache
+
+load_dotenv()
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+# stats.nba.com starts throttling somewhere above ~2 req/s from one IP.
+# These are the only knobs the ingest scripts should need.
+RATE_PER_SECOND = float(os.getenv("NBA_API_RATE", "1.5"))
+BURST = int(os.getenv("NBA_API_BURST", "3"))
+MAX_WORKERS = int(os.getenv("NBA_API_WORKERS", "4"))
+MAX_RETRIES = int(os.getenv("NBA_API_RETRIES", "4"))
+DEFAULT_TIMEOUT = int(os.getenv("NBA_API_TIMEOUT", "30"))
+
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_CAP_SECONDS = 30.0
+
+# Timeouts, dropped connections and the HTML error pages stats.nba.com
+# serves when it throttles us (json decode -> ValueError) are all retryable.
+RETRYABLE_ERRORS = (requests.exceptions.RequestException, ValueError)
+
+
+# -----------------------------
+# Rate limiting
+# -----------------------------
+class TokenBucket:
+    """
+    Thread-safe token bucket. Each API request takes one token; tokens refill
+    at `rate` per second up to `capacity`, so short bursts are allowed but the
+    long-run request rate never exceeds `rate`.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# -----------------------------
+# HTTP sessions
+# -----------------------------
+class _ThreadLocalSession:
+    """
+    nba_api keeps a single class-level session. This stands in for it and
+    hands each worker thread its own keep-alive requests.Session.
+    """
+
+    def __init__(self, pool_size: int):
+        self._local = threading.local()
+        self._pool_size = pool_size
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._local.session = session
+        return session
+
+    def get(self, *args, **kwargs):
+        return self._session().get(*args, **kwargs)
+
+
+# -----------------------------
+# Client
+# -----------------------------
+class NBAClient:
+    """
+    Shared entry point for every nba_api call made by the ingest scripts.
+
+    fetch() runs one endpoint request under the rate limiter with jittered
+    exponential backoff; fetch_many() fans a list of parameter sets out over
+    a small worker pool that shares the same limiter. Responses are served
+    from / written to the on-disk response cache (see response_cache.py).
+    Every payload fetched from the network is also landed on disk
+    (see landing_zone.py). NBA_API_REPLAY=record|replay swaps the HTTP
+    layer for fixtures (see nba_replay.py).
+    """
+
+    def __init__(
+        self,
+        rate: float = RATE_PER_SECOND,
+        burst: int = BURST,
+        max_workers: int = MAX_WORKERS,
+        retries: int = MAX_RETRIES,
+        timeout: int = DEFAULT_TIMEOUT,
+        cache: Optional[response_cache.ResponseCache] = None,
+        landing: Optional[landing_zone.LandingZone] = None,
+    ):
+        if cache is None:
+            # Recording or replaying fixtures must not be short-circuited by the cache
+            cache = response_cache.ResponseCache(enabled=not nba_replay.active() and response_cache.CACHE_ENABLED)
+        self.cache = cache
+        if landing is None:
+            landing = landing_zone.LandingZone(enabled=not nba_replay.active() and landing_zone.LANDING_ENABLED)
+        self.landing = landing
+        self.bucket = TokenBucket(rate, burst)
+        self.max_workers = max_workers
+        self.retries = retries
+        self.timeout = timeout
+        NBAStatsHTTP.set_session(nba_replay.wrap_session(_ThreadLocalSession(max_workers)))
+
+    def _backoff(self, attempt: int):
+        time.sleep(random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)))
+
+    def fetch(self, endpoint_cls, cache_ttl=response_cache.USE_POLICY, parse=True, **params):
+        """
+        Build `endpoint_cls(**params)` and load its response. Returns the
+        populated endpoint object, so callers keep using get_data_frames(),
+        get_dict() or the named datasets exactly as before.
+
+        cache_ttl overrides the per-endpoint cache policy: seconds,
+        response_cache.PERMANENT, or response_cache.NO_CACHE.
+        parse=False leaves only endpoint.nba_response set (see fetch_json).
+        """
+        params.setdefault("timeout", self.timeout)
+        endpoint = endpoint_cls(get_request=False, **params)
+        if self.cache.load(endpoint, cache_ttl, parse=parse):
+            return endpoint
+
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                if parse:
+                    endpoint.get_request()
+                else:
+                    endpoint.nba_response = NBAStatsHTTP().send_api_request(
+                        endpoint=endpoint.endpoint,
+                        parameters=endpoint.parameters,
+                        proxy=endpoint.proxy,
+                        headers=endpoint.headers,
+                        timeout=endpoint.timeout,
+                    )
+                    # Throttle pages are not JSON: fail here so they are retried
+                    endpoint.nba_response.get_dict()
+                self.cache.store(endpoint, cache_ttl)
+                self.landing.write(endpoint)
+                return endpoint
+            except RETRYABLE_ERRORS:
+                if attempt == self.retries:
+                    raise
+                self._backoff(attempt)
+
+    def fetch_json(self, endpoint_cls, cache_ttl=response_cache.USE_POLICY, **params) -> dict:
+        """
+        Raw response JSON for one request, without building nba_api's data
+        sets or DataFrames. Pair with nba_parse to pull only the columns
+        you need.
+        """
+        endpoint = self.fetch(endpoint_cls, cache_ttl=cache_ttl, parse=False, **params)
+        return endpoint.nba_response.get_dict()
+
+    def fetch_many(self, endpoint_cls, param_list: Iterable[dict],
+                   cache_ttl=response_cache.USE_POLICY) -> Iterator[tuple]:
+        """
+        Fetch many requests of the same endpoint concurrently.
+        Yields (params, endpoint, error) in completion order; exactly one of
+        endpoint/error is None. cache_ttl applies to every request, as in fetch().
+        """
+        return self._fan_out(self.fetch, endpoint_cls, param_list, cache_ttl)
+
+    def fetch_many_json(self, endpoint_cls, param_list: Iterable[dict],
+                        cache_ttl=response_cache.USE_POLICY) -> Iterator[tuple]:
+        """fetch_many() through fetch_json(): yields (params, payload dict, error)."""
+        return self._fan_out(self.fetch_json, endpoint_cls, param_list, cache_ttl)
+
+    def evict(self, endpoint_cls, **params):
+        """Forget the cached response for one request, so the next fetch goes to the API."""
+        endpoint = endpoint_cls(get_request=False, **params)
+        self.cache.evict(endpoint.endpoint, endpoint.parameters)
+
+    def _fan_out(self, fetch_fn, endpoint_cls, param_list, cache_ttl):
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(fetch_fn, endpoint_cls, cache_ttl=cache_ttl, **dict(p)): p
+                for p in param_list
+            }
+            for fut in as_completed(futures):
+                params = futures[fut]
+                try:
+                    yield params, fut.result(), None
+                except Exception as e:
+                    yield params, None, e
+
+
+_client: Optional[NBAClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> NBAClient:
+    """Process-wide client, so every caller shares one rate limit."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = NBAClient()
+        return _client
+
+
+def configure(**kwargs) -> NBAClient:
+    """
+    Replace the process-wide client, e.g. to give each worker process of a
+    multi-process job its share of the rate limit. Takes NBAClient's arguments.
+    """
+    global _client
+    with _client_lock:
+        _client = NBAClient(**kwargs)
+        return _client
+
+
+def fetch(endpoint_cls, cache_ttl=response_cache.USE_POLICY, **params):
+    return get_client().fetch(endpoint_cls, cache_ttl=cache_ttl, **params)
+
+
+def fetch_json(endpoint_cls, cache_ttl=response_cache.USE_POLICY, **params) -> dict:
+    return get_client().fetch_json(endpoint_cls, cache_ttl=cache_ttl, **params)
+
+
+def fetch_many(endpoint_cls, param_list: Iterable[dict], cache_ttl=response_cache.USE_POLICY) -> Iterator[tuple]:
+    return get_client().fetch_many(endpoint_cls, param_list, cache_ttl=cache_ttl)
+
+
+def fetch_many_json(endpoint_cls, param_list: Iterable[dict], cache_ttl=response_cache.USE_POLICY) -> Iterator[tuple]:
+    return get_client().fetch_many_json(endpoint_cls, param_list, cache_ttl=cache_ttl)
+
+
+def evict(endpoint_cls, **params):
+    get_client().evict(endpoint_cls, **params)
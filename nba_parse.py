@@ -0,0 +1,129 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# Parsers that read stats.nba.com JSON straight into typed column arrays,
+# skipping nba_api's per-result-set DataFrames. Only the requested result
+# set and columns are touched. Output is {column: np.ndarray}, which
+# pd.DataFrame() wraps without copying.
+#
+# dtypes: "int" (int64, missing -> error), "float" (float64, None -> NaN),
+# anything else is kept as an object array.
+
+Columns = Dict[str, np.ndarray]
+
+
+def _typed(values: list, dtype: Optional[str]) -> np.ndarray:
+    if dtype == "float":
+        return np.array(values, dtype=np.float64)       # None -> nan
+    if dtype == "int":
+        return np.array(values, dtype=np.int64)
+    out = np.empty(len(values), dtype=object)
+    out[:] = values
+    return out
+
+
+def clock_minutes(values: list) -> np.ndarray:
+    """
+    Minutes played as float64 from "34:12", ISO "PT34M12.00S", plain
+    numbers or blanks (DNP -> 0.0).
+    """
+    out = np.zeros(len(values), dtype=np.float64)
+    for i, v in enumerate(values):
+        if v is None or v == "":
+            continue
+        if isinstance(v, (int, float)):
+            out[i] = v
+            continue
+        text = str(v)
+        if text.startswith("PT"):
+            text = text[2:].rstrip("S").replace("M", ":")
+        m, _, sec = text.partition(":")
+        out[i] = float(m or 0) + float(sec or 0) / 60
+    return out
+
+
+def _stat(key: str, values: list) -> np.ndarray:
+    # V3 "minutes" is a clock string; every other statistic is numeric
+    return clock_minutes(values) if key == "minutes" else _typed(values, "float")
+
+
+# -----------------------------
+# V2 endpoints: resultSets / headers / rowSet
+# -----------------------------
+def _result_sets(payload: dict) -> List[dict]:
+    sets = payload.get("resultSets", payload.get("resultSet", []))
+    return [sets] if isinstance(sets, dict) else sets
+
+
+def result_set(payload: dict, name: Optional[str] = None, index: int = 0,
+               columns: Optional[List[str]] = None, dtypes: Optional[Dict[str, str]] = None) -> Columns:
+    """
+    Columns of one v2 result set, selected by name (or position).
+    Missing requested columns raise KeyError.
+    """
+    sets = _result_sets(payload)
+    if name is not None:
+        matches = [s for s in sets if s.get("name") == name]
+        if not matches:
+            raise KeyError(f"result set {name!r} not in response")
+        rs = matches[0]
+    else:
+        rs = sets[index]
+
+    headers = rs["headers"]
+    rows = rs["rowSet"]
+    wanted = columns or headers
+    positions = {h: i for i, h in enumerate(headers)}
+    dtypes = dtypes or {}
+
+    out = {}
+    for col in wanted:
+        i = positions[col]
+        out[col] = _typed([row[i] for row in rows], dtypes.get(col))
+    return out
+
+
+# -----------------------------
+# V3 endpoints: nested homeTeam / awayTeam objects
+# -----------------------------
+def v3_teams(payload: dict, root: str, stats: List[str]) -> Columns:
+    """
+    One row per team from a V3 box score (e.g. root="boxScoreAdvanced"):
+    teamId, isHome and the requested keys of each team's "statistics".
+    Missing statistics come back as NaN.
+    """
+    box = payload[root]
+    teams = [(box["homeTeam"], True), (box["awayTeam"], False)]
+    out = {
+        "teamId": _typed([t["teamId"] for t, _ in teams], "int"),
+        "isHome": np.array([home for _, home in teams], dtype=bool),
+    }
+    for key in stats:
+        out[key] = _stat(key, [t.get("statistics", {}).get(key) for t, _ in teams])
+    return out
+
+
+def v3_players(payload: dict, root: str, stats: List[str], fields: Optional[List[str]] = None) -> Columns:
+    """
+    One row per player from a V3 box score: personId, teamId, isHome, any
+    extra player `fields` (e.g. "position") and the requested statistics
+    ("minutes" is converted to float minutes).
+    """
+    box = payload[root]
+    players = []
+    for side, home in (("homeTeam", True), ("awayTeam", False)):
+        team = box[side]
+        players += [(p, team["teamId"], home) for p in team.get("players", [])]
+
+    out = {
+        "personId": _typed([p["personId"] for p, _, _ in players], "int"),
+        "teamId": _typed([team_id for _, team_id, _ in players], "int"),
+        "isHome": np.array([home for _, _, home in players], dtype=bool),
+    }
+    for key in fields or []:
+        out[key] = _typed([p.get(key) for p, _, _ in players], None)
+    for key in stats:
+        out[key] = _stat(key, [p.get("statistics", {}).get(key) for p, _, _ in players])
+    return out
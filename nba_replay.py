@@ -0,0 +1,175 @@
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from typing import Optional
+from urllib.parse import urlparse
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+#   off     - talk to stats.nba.com as usual
+#   record  - talk to stats.nba.com and save every response as a fixture
+#   replay  - never touch the network; serve fixtures with simulated
+#             latency and failures
+MODE = os.getenv("NBA_API_REPLAY", "off").lower()
+FIXTURE_DIR = os.getenv("NBA_API_FIXTURES", os.path.join("fixtures", "nba_api"))
+LATENCY_SECONDS = float(os.getenv("NBA_API_REPLAY_LATENCY", "0.0"))
+ERROR_RATE = float(os.getenv("NBA_API_REPLAY_ERROR_RATE", "0.0"))
+SEED = os.getenv("NBA_API_REPLAY_SEED")
+
+MODES = ("off", "record", "replay")
+
+# What stats.nba.com sends instead of JSON when it throttles us
+THROTTLE_PAGE = "<html><head><title>Access Denied</title></head><body>Access Denied</body></html>"
+
+
+class FixtureMissing(LookupError):
+    """Replay was asked for a request that was never recorded (not retryable)."""
+
+
+# -----------------------------
+# Fixture store
+# -----------------------------
+def endpoint_name(url: str) -> str:
+    return urlparse(url).path.rstrip("/").rsplit("/", 1)[-1].lower()
+
+
+def fixture_key(url: str, params: Optional[dict]) -> str:
+    # nba_api passes sorted (key, value) pairs; requests drops None values,
+    # so neither ordering nor None-valued params may change the key
+    params = {k: v for k, v in dict(params or {}).items() if v is not None}
+    blob = json.dumps({"endpoint": endpoint_name(url), "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def fixture_path(url: str, params: Optional[dict], root: str = FIXTURE_DIR) -> str:
+    return os.path.join(root, endpoint_name(url), f"{fixture_key(url, params)}.json.gz")
+
+
+class ReplayResponse:
+    """The slice of requests.Response that nba_api reads."""
+
+    def __init__(self, url: str, status_code: int, text: str):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+# -----------------------------
+# Sessions
+# -----------------------------
+class _Stats:
+    def __init__(self, label: str):
+        self.label = label
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def report(self):
+        if self.counts:
+            summary = ", ".join(f"{k}={v}" for k, v in sorted(self.counts.items()))
+            print(f"[nba_replay:{self.label}] {summary}")
+
+
+class RecordingSession:
+    """Pass requests through to `inner` and save each successful response."""
+
+    def __init__(self, inner, root: str = FIXTURE_DIR):
+        self.inner = inner
+        self.root = root
+        self.stats = _Stats("record")
+        atexit.register(self.stats.report)
+
+    def get(self, url, params=None, **kwargs):
+        response = self.inner.get(url, params=params, **kwargs)
+        if response.status_code == 200:
+            path = fixture_path(url, params, self.root)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            entry = {"url": response.url, "params": params, "status_code": 200, "text": response.text}
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                json.dump(entry, f, default=str)
+            os.replace(tmp, path)
+            self.stats.incr("recorded")
+        return response
+
+
+class ReplaySession:
+    """
+    Serve recorded fixtures in place of stats.nba.com.
+
+    Each request sleeps for latency * U(0.5, 1.5) seconds, and with
+    probability error_rate fails the way the real API does: either a read
+    timeout or a throttle page that is not JSON. Both go through the
+    client's normal retry path, so rate limiting and backoff are exercised.
+    """
+
+    def __init__(self, root: str = FIXTURE_DIR, latency: float = LATENCY_SECONDS,
+                 error_rate: float = ERROR_RATE, seed: Optional[str] = SEED):
+        self.root = root
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = _Stats("replay")
+        atexit.register(self.stats.report)
+
+    def _roll(self):
+        with self._lock:
+            return self._random.uniform(0.5, 1.5), self._random.random(), self._random.random()
+
+    def get(self, url, params=None, **kwargs):
+        jitter, fail, kind = self._roll()
+        if self.latency:
+            time.sleep(self.latency * jitter)
+
+        if fail < self.error_rate:
+            self.stats.incr("injected_errors")
+            if kind < 0.5:
+                raise requests.exceptions.ReadTimeout(f"simulated timeout: {endpoint_name(url)}")
+            return ReplayResponse(url, 200, THROTTLE_PAGE)
+
+        path = fixture_path(url, params, self.root)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.stats.incr("missing")
+            raise FixtureMissing(f"No fixture for {endpoint_name(url)} {params} ({path})")
+
+        self.stats.incr("served")
+        return ReplayResponse(entry["url"], entry["status_code"], entry["text"])
+
+
+def wrap_session(session, mode: str = MODE):
+    """The HTTP session nba_client should install for the configured mode."""
+    if mode not in MODES:
+        raise ValueError(f"NBA_API_REPLAY must be one of {MODES}, got {mode!r}")
+    if mode == "record":
+        return RecordingSession(session)
+    if mode == "replay":
+        return ReplaySession()
+    return session
+
+
+def active(mode: str = MODE) -> bool:
+    """Record and replay both need every request to reach the session."""
+    return mode != "off"
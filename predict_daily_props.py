@@ -1,13 +1,13 @@
-import sys, os, json, joblib, pytz
+import sys, json, joblib, pytz
 import pandas as pd
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from dotenv import load_dotenv
+from db import get_engine
 
 load_dotenv()
 
-DB_URL = f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}:5432/{os.getenv('DB_NAME')}"
-engine = create_engine(DB_URL)
+engine = get_engine()
 
 TEAM_MAP = {
     1610612737: "ATL", 1610612738: "BOS", 1610612739: "CLE",
@@ -22,7 +22,8 @@ TEAM_MAP = {
     1610612764: "WAS", 1610612765: "DET", 1610612766: "CHA"
 }
 
-FEATURE_COLUMNS = ['pts_l5', 'reb_l5', 'ast_l5', 'min_l5', 'pts_l10', 'reb_l10', 'ast_l10', 'pts_l20']
+FEATURE_COLUMNS = ['pts_l5', 'reb_l5', 'ast_l5', 'min_l5', 'pts_l10', 'reb_l10', 'ast_l10', 'pts_l20',
+                   'usg_l5', 'usg_l10', 'ts_l10']
 
 try:
     pts_m = joblib.load("models/points_model.joblib")
@@ -42,8 +43,14 @@ def get_current_nba_date():
 
 def get_prediction_data(player_id, player_name):
     sql = text("SELECT pts, reb, ast, min FROM player_logs WHERE player_id = :p_id ORDER BY game_date DESC LIMIT 20")
+    sql_adv = text("""
+        SELECT pga.usg_pct, pga.ts_pct FROM player_game_advanced pga
+        JOIN games g ON g.game_id = pga.game_id
+        WHERE pga.player_id = :p_id ORDER BY g.game_date DESC LIMIT 10
+    """)
     with engine.connect() as conn:
         df = pd.read_sql(sql, conn, params={"p_id": int(player_id)})
+        adv = pd.read_sql(sql_adv, conn, params={"p_id": int(player_id)})
     
     if df.empty: return None
 
@@ -54,7 +61,10 @@ def get_prediction_data(player_id, player_name):
         'pts_l5': get_avg(df, 'pts', 5), 'reb_l5': get_avg(df, 'reb', 5),
         'ast_l5': get_avg(df, 'ast', 5), 'min_l5': get_avg(df, 'min', 5),
         'pts_l10': get_avg(df, 'pts', 10), 'reb_l10': get_avg(df, 'reb', 10),
-        'ast_l10': get_avg(df, 'ast', 10), 'pts_l20': float(df['pts'].mean())
+        'ast_l10': get_avg(df, 'ast', 10), 'pts_l20': float(df['pts'].mean()),
+        # NaN when no advanced box scores yet; the model's imputer fills it
+        'usg_l5': float(adv.head(5)['usg_pct'].mean()), 'usg_l10': float(adv['usg_pct'].mean()),
+        'ts_l10': float(adv['ts_pct'].mean())
     }
     
     X = pd.DataFrame([feats])[FEATURE_COLUMNS]
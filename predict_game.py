@@ -1,22 +1,12 @@
-import os
 import sys
 import joblib
 import pandas as pd
-import psycopg2
 from datetime import datetime
 from dotenv import load_dotenv
+from db import get_db_conn
 
 load_dotenv()
 
-# Config
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "nba")
-DB_USER = os.getenv("DB_USER", "nba_user")
-DB_PASS = os.getenv("DB_PASSWORD")
-
-def get_db_conn():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
-
 def get_team_id(conn, abbreviation):
     """Convert 'LAL' to ID using 'team_abbr' column"""
     cur = conn.cursor()
@@ -1,20 +1,11 @@
 import sys
-import os
 import pandas as pd
 import joblib
-import psycopg2
 from dotenv import load_dotenv
+from db import get_db_conn
 
 load_dotenv()
 
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "nba")
-DB_USER = os.getenv("DB_USER", "nba_user")
-DB_PASS = os.getenv("DB_PASSWORD")
-
-def get_db_conn():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
-
 def find_player_id(name_fragment):
     conn = get_db_conn()
     cur = conn.cursor()
@@ -39,6 +30,21 @@ def get_player_recent_stats(player_id):
     conn.close()
     return df
 
+def get_player_advanced_stats(player_id):
+    """Last 10 advanced box scores (usage, true shooting)."""
+    conn = get_db_conn()
+    sql = """
+        SELECT pga.usg_pct, pga.ts_pct
+        FROM player_game_advanced pga
+        JOIN games g ON g.game_id = pga.game_id
+        WHERE pga.player_id = %s
+        ORDER BY g.game_date DESC
+        LIMIT 10
+    """
+    df = pd.read_sql(sql, conn, params=(player_id,))
+    conn.close()
+    return df
+
 def predict_player(player_name_input):
     # 1. Find Player
     pid, full_name = find_player_id(player_name_input)
@@ -74,6 +80,12 @@ def predict_player(player_name_input):
     last_20 = df.head(20)
     current_stats['pts_l20'] = last_20['pts'].mean()
 
+    # Usage / efficiency (NaN without advanced box scores; imputed by the model)
+    adv = get_player_advanced_stats(pid)
+    current_stats['usg_l5'] = adv.head(5)['usg_pct'].mean()
+    current_stats['usg_l10'] = adv['usg_pct'].mean()
+    current_stats['ts_l10'] = adv['ts_pct'].mean()
+
     # Create DataFrame for Model
     X = pd.DataFrame([current_stats])
     
@@ -1,16 +1,11 @@
-import sys, os, joblib, pandas as pd, psycopg2, json
-from psycopg2.extras import RealDictCursor
+import sys, os, joblib, json
 from datetime import datetime
 from dotenv import load_dotenv
+from db import get_db_conn, read_frame_binary
 
 os.environ['PYTHONIOENCODING'] = 'utf-8'
 load_dotenv()
 
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "nba")
-DB_USER = os.getenv("DB_USER", "nba_user")
-DB_PASS = os.getenv("DB_PASSWORD")
-
 MODEL_WIN_PATH = "models/win_model.joblib"
 MODEL_MARGIN_PATH = "models/margin_model.joblib" 
 MODEL_TOTAL_PATH = "models/total_model.joblib"
@@ -28,9 +23,6 @@ TEAM_MAP = {
     1610612764: "WAS", 1610612765: "DET", 1610612766: "CHA"
 }
 
-def get_db_conn():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
-
 def get_crew_bias(game_id, conn):
     """Fetches the aggregate bias metrics for the assigned officiating crew."""
     sql = """
@@ -73,11 +65,10 @@ def get_schedule_for_date(target_date_et):
         LEFT JOIN v_team_advanced_stats aadv ON g.away_team_id = aadv.team_id AND g.game_id = aadv.game_id
         WHERE g.game_date_et = %s
     """
-    with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute(sql, (target_date_et,))
-        rows = cur.fetchall()
+    # binary COPY: NUMERIC features arrive as float64 columns, not Decimals
+    games = read_frame_binary(conn, sql, (target_date_et,))
     conn.close()
-    return rows
+    return games
 
 def main():
     if len(sys.argv) < 2:
@@ -91,7 +82,7 @@ def main():
     total_model = joblib.load(MODEL_TOTAL_PATH)
     
     games = get_schedule_for_date(target_date_et)
-    if not games:
+    if games.empty:
         print(f"No games found for {target_date_et} ET.")
         return
 
@@ -99,13 +90,16 @@ def main():
     feature_cols = ["rolling_pd_5_diff", "rolling_pd_10_diff", "rest_days_diff", "home_back_to_back", "home_advantage", "sos_diff", "day_of_week", "pace_metric", "home_glass_advantage"]
     results_for_json = []
 
-    for g in games:
-        X_df = pd.DataFrame([{k: (float(g[k]) if g[k] is not None else 0.0) for k in feature_cols}])
-        
-        # Base predictions from team data
-        prob_home = float(win_pipe.predict_proba(X_df)[0][1])
-        pred_total = float(total_model.predict(X_df)[0])
-        pred_margin = float(margin_model.predict(X_df)[0])
+    # Base predictions from team data, one call per model for the whole slate
+    X_df = games[feature_cols].astype(float).fillna(0.0)
+    games["prob_home"] = win_pipe.predict_proba(X_df)[:, 1]
+    games["pred_total"] = total_model.predict(X_df)
+    games["pred_margin"] = margin_model.predict(X_df)
+
+    for g in games.to_dict("records"):
+        prob_home = float(g['prob_home'])
+        pred_total = float(g['pred_total'])
+        pred_margin = float(g['pred_margin'])
         
         # APPLY OFFICIATING FACTORS
         ref = get_crew_bias(g['game_id'], conn)
@@ -0,0 +1,174 @@
+import sys
+import time
+import argparse
+
+import pandas as pd
+from dotenv import load_dotenv
+
+import ingest_boxscores
+import fetch_player_logs
+from game_pairing import SEASON_TYPES, pair_home_away
+from bulk_load import merge_frame
+from games_writer import write_games
+from landing_zone import LandingZone
+from db import get_db_conn
+
+load_dotenv()
+
+TABLES = ["games", "player_logs", "team_game_stats", "player_game_advanced"]
+GAME_LOG_COLUMNS = ["GAME_ID", "GAME_DATE", "MATCHUP", "TEAM_ID", "PTS", "WL", "PLAYER_ID"]
+REBUILD_COLUMNS = [
+    "game_id", "game_date", "game_date_et", "season", "home_team_id", "away_team_id",
+    "status", "home_pts", "away_pts", "season_type",
+]
+
+def latest_rows(df, keys):
+    """Keep the most recently fetched row per key across overlapping requests."""
+    return df.sort_values("_fetched_at").drop_duplicates(keys, keep="last")
+
+# -----------------------------
+# Rebuilders
+# -----------------------------
+def rebuild_games(zone, seasons):
+    frames = [
+        zone.read(endpoint, seasons=seasons, columns=GAME_LOG_COLUMNS)
+        for endpoint in ("leaguegamelog", "leaguegamefinder")
+    ]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return 0
+    df = pd.concat(frames, ignore_index=True)
+    if "PLAYER_ID" in df.columns:
+        df = df[df["PLAYER_ID"].isna()]
+    df = latest_rows(df, ["GAME_ID", "TEAM_ID"])
+
+    games = pair_home_away(df)
+    games = games[games["home_pts"].notna() & games["away_pts"].notna()]
+    dates = pd.to_datetime(games["game_date"])
+    games = games.assign(
+        game_date_et=games["game_date"],
+        season=dates.dt.year.where(dates.dt.month >= 10, dates.dt.year - 1),
+        status="final",
+        season_type=games["game_id"].str[2].map(SEASON_TYPES),
+    )
+
+    conn = get_db_conn()
+    try:
+        count = write_games(conn, games, REBUILD_COLUMNS)
+        conn.commit()
+    finally:
+        conn.close()
+    return count
+
+def rebuild_player_logs(zone, seasons):
+    df = zone.read("leaguegamelog", seasons=seasons)
+    if df.empty or "PLAYER_ID" not in df.columns:
+        return 0
+    df = latest_rows(df[df["PLAYER_ID"].notna()], ["GAME_ID", "PLAYER_ID"])
+
+    fetch_player_logs.create_logs_table_if_not_exists()
+    return fetch_player_logs.upsert_logs(df)
+
+def flag_home(conn, df):
+    """is_home for every row in one lookup; landed V3 frames do not say which side a team was."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT game_id, home_team_id FROM games WHERE game_id = ANY(%s)",
+            (df["game_id"].unique().tolist(),),
+        )
+        home = pd.DataFrame(cur.fetchall(), columns=["game_id", "home_team_id"])
+    df = df.merge(home, on="game_id", how="left")
+    return df.assign(is_home=df["team_id"].eq(df["home_team_id"])).drop(columns="home_team_id")
+
+def landed_boxscores(conn, zone, seasons, parse, extract, columns, keys):
+    """
+    Every landed BoxScoreAdvancedV3 response as one frame of `columns`.
+    Raw JSON landings go through the live ingest's parse(); Parquet frames
+    landed before that through extract(), with is_home from games.
+    """
+    parts, frames, skipped = [], [], 0
+    for params, payload in zone.payloads("boxscoreadvancedv3", seasons=seasons):
+        try:
+            parts.append(parse(params["GameID"], payload))
+        except (KeyError, TypeError, ValueError):
+            skipped += 1
+    for params, landed in zone.responses("boxscoreadvancedv3", seasons=seasons):
+        try:
+            frames.append(extract(params["GameID"], landed))
+        except (KeyError, ValueError):
+            skipped += 1
+    if skipped:
+        print(f"  skipped {skipped} unusable box-score payloads")
+
+    out = []
+    if frames:
+        out.append(flag_home(conn, pd.concat(frames, ignore_index=True))[columns])
+    if parts:
+        # Last, so a game landed both ways keeps the raw JSON's rows
+        out.append(ingest_boxscores.concat_columns(parts, columns))
+    if not out:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(out, ignore_index=True).drop_duplicates(keys, keep="last")
+
+def rebuild_team_game_stats(zone, seasons):
+    conn = get_db_conn()
+    try:
+        df = landed_boxscores(conn, zone, seasons, ingest_boxscores.parse_team_columns,
+                              ingest_boxscores.extract_team_frame, ingest_boxscores.STATS_COLUMNS,
+                              ["game_id", "team_id"])
+        count = merge_frame(conn, df, "team_game_stats", ingest_boxscores.STATS_COLUMNS,
+                            key_cols=["game_id", "team_id"], stage="team_game_stats_stage", temp=True,
+                            extra_set=ingest_boxscores.TEAM_EXTRA_SET)
+        conn.commit()
+    finally:
+        conn.close()
+    return count
+
+def rebuild_player_game_advanced(zone, seasons):
+    conn = get_db_conn()
+    try:
+        ingest_boxscores.create_player_table_if_not_exists(conn)
+        df = landed_boxscores(conn, zone, seasons, ingest_boxscores.parse_player_columns,
+                              ingest_boxscores.extract_player_frame, ingest_boxscores.PLAYER_COLUMNS,
+                              ["game_id", "player_id"])
+        count = merge_frame(conn, df, "player_game_advanced", ingest_boxscores.PLAYER_COLUMNS,
+                            key_cols=["game_id", "player_id"], stage="player_game_advanced_stage", temp=True)
+        conn.commit()
+    finally:
+        conn.close()
+    return count
+
+REBUILDERS = {
+    "games": rebuild_games,
+    "player_logs": rebuild_player_logs,
+    "team_game_stats": rebuild_team_game_stats,
+    "player_game_advanced": rebuild_player_game_advanced,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild tables from the landing zone (no API calls).")
+    parser.add_argument("tables", nargs="*", help=f"any of {', '.join(TABLES)} (default: all, in dependency order)")
+    parser.add_argument("--seasons", nargs="+", help="limit to these seasons, e.g. 2023-24 2024-25")
+    parser.add_argument("--root", default=None, help="landing directory (default: data/landing)")
+    args = parser.parse_args()
+
+    unknown = [t for t in args.tables if t not in TABLES]
+    if unknown:
+        parser.error(f"unknown tables: {', '.join(unknown)}")
+    # games first: the box-score tables need home teams from it
+    tables = [t for t in TABLES if t in args.tables] if args.tables else TABLES
+
+    zone = LandingZone(root=args.root) if args.root else LandingZone()
+    print(f"--- Rebuilding {', '.join(tables)} from {zone.root} ---")
+
+    for table in tables:
+        t0 = time.perf_counter()
+        try:
+            count = REBUILDERS[table](zone, args.seasons)
+        except Exception as e:
+            print(f"{table}: rebuild failed -> {e}")
+            sys.exit(1)
+        print(f"{table}: upserted {count} rows in {time.perf_counter() - t0:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import sys
+import argparse
+
+from dotenv import load_dotenv
+
+import change_sets
+from db import get_db_conn
+
+load_dotenv()
+
+MATERIALISE_SQL = [
+    "sql/materialise/rest_days_upsert_incremental.sql",
+    "sql/materialise/rolling_pd_upsert_incremental.sql",
+]
+
+def read_sql(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def materialise(conn, team_ids):
+    """Run the feature upserts for `team_ids` (None = every scheduled team-game)."""
+    with conn.cursor() as cur:
+        for path in MATERIALISE_SQL:
+            cur.execute(read_sql(path), {"team_ids": team_ids})
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialise team-game features from pending change sets.")
+    parser.add_argument("--full", action="store_true", help="refresh every scheduled team-game")
+    args = parser.parse_args()
+
+    conn = get_db_conn()
+    try:
+        change_sets.ensure_table(conn)
+
+        # Claim, recompute and mark consumed in one transaction: a failure
+        # leaves the change sets pending for the next run.
+        pending = change_sets.claim_pending(conn)
+        if args.full:
+            print("Full feature refresh...")
+            materialise(conn, None)
+        elif pending is None:
+            print("No pending change sets. Features are up to date.")
+            return
+        else:
+            print(
+                f"Refreshing features for {len(pending.team_ids)} teams "
+                f"({len(pending.game_ids)} games, {pending.date_from} -> {pending.date_to}) "
+                f"from {len(pending.change_ids)} change sets..."
+            )
+            materialise(conn, pending.team_ids)
+
+        if pending is not None:
+            change_sets.mark_consumed(conn, pending.change_ids)
+        conn.commit()
+        print("Done.")
+    except Exception as e:
+        conn.rollback()
+        print(f"Feature refresh failed: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
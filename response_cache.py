@@ -0,0 +1,142 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from nba_api.stats.library.http import NBAStatsHTTP
+
+load_dotenv()
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+CACHE_DIR = os.getenv("NBA_API_CACHE_DIR", os.path.join(".cache", "nba_api"))
+CACHE_ENABLED = os.getenv("NBA_API_CACHE", "1") != "0"
+
+PERMANENT = None          # never expires
+NO_CACHE = 0              # always hit the API
+USE_POLICY = object()     # sentinel: look the TTL up in ENDPOINT_TTLS
+
+# Advanced box scores and summaries are only requested for finished games,
+# and those never change. Traditional box scores are also how ingest_results
+# finds out whether a scheduled game has finished, so an empty or partial
+# payload must not stick: they fall through to NO_CACHE. Scoreboards move
+# every few minutes while games are live. Season-level logs are immutable for
+# past seasons but grow nightly for the current one.
+ENDPOINT_TTLS = {
+    "boxscoreadvancedv3": PERMANENT,
+    "boxscoresummaryv2": PERMANENT,
+    "boxscoresummaryv3": PERMANENT,
+    "scoreboardv2": 5 * 60,
+    "scheduleleaguev2": 10 * 60,
+    "commonteamroster": 60 * 60,
+}
+SEASON_ENDPOINTS = {"leaguegamelog", "leaguegamefinder"}
+CURRENT_SEASON_TTL = 10 * 60
+
+
+def current_season_str(d: Optional[date] = None) -> str:
+    d = d or date.today()
+    start = d.year if d.month >= 10 else d.year - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def policy_ttl(endpoint_name: str, parameters: dict):
+    """TTL in seconds for one request, PERMANENT, or NO_CACHE."""
+    if endpoint_name in ENDPOINT_TTLS:
+        return ENDPOINT_TTLS[endpoint_name]
+    if endpoint_name in SEASON_ENDPOINTS:
+        season = parameters.get("Season") or parameters.get("SeasonNullable")
+        if season and season < current_season_str():
+            return PERMANENT
+        return CURRENT_SEASON_TTL
+    return NO_CACHE
+
+
+# -----------------------------
+# Cache
+# -----------------------------
+class ResponseCache:
+    """
+    Content-addressed store of raw stats.nba.com payloads.
+
+    Entries are keyed by sha256(endpoint + sorted parameters) and written as
+    gzipped JSON under <root>/<endpoint>/<key[:2]>/<key>.json.gz. Freshness is
+    judged from the file mtime against the TTL in force at read time, so
+    changing a TTL never requires clearing the cache.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, enabled: bool = CACHE_ENABLED):
+        self.root = root
+        self.enabled = enabled
+
+    @staticmethod
+    def key(endpoint_name: str, parameters: dict) -> str:
+        blob = json.dumps({"endpoint": endpoint_name, "params": parameters}, sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def path(self, endpoint_name: str, parameters: dict) -> str:
+        k = self.key(endpoint_name, parameters)
+        return os.path.join(self.root, endpoint_name, k[:2], f"{k}.json.gz")
+
+    def load(self, endpoint, ttl=USE_POLICY, parse: bool = True) -> bool:
+        """
+        Populate `endpoint` (built with get_request=False) from disk.
+        parse=False sets only the raw response and skips nba_api's dataset
+        construction (for callers that read the JSON directly).
+        Returns False on a miss or an expired entry.
+        """
+        if ttl is USE_POLICY:
+            ttl = policy_ttl(endpoint.endpoint, endpoint.parameters)
+        if not self.enabled or ttl == NO_CACHE:
+            return False
+
+        path = self.path(endpoint.endpoint, endpoint.parameters)
+        try:
+            if ttl is not PERMANENT and time.time() - os.path.getmtime(path) > ttl:
+                return False
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        endpoint.nba_response = NBAStatsHTTP.nba_response(
+            response=entry["response"], status_code=200, url=entry.get("url")
+        )
+        if parse:
+            endpoint.load_response()
+        return True
+
+    def store(self, endpoint, ttl=USE_POLICY):
+        if ttl is USE_POLICY:
+            ttl = policy_ttl(endpoint.endpoint, endpoint.parameters)
+        if not self.enabled or ttl == NO_CACHE:
+            return
+
+        path = self.path(endpoint.endpoint, endpoint.parameters)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            "endpoint": endpoint.endpoint,
+            "params": endpoint.parameters,
+            "url": endpoint.nba_response.get_url(),
+            "response": endpoint.nba_response.get_response(),
+        }
+        # Write-then-rename so a concurrent reader never sees half a file
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    def evict(self, endpoint_name: str, parameters: dict):
+        """Drop one entry, e.g. a permanently cached payload that came back incomplete."""
+        try:
+            os.remove(self.path(endpoint_name, parameters))
+        except OSError:
+            pass
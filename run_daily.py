@@ -23,17 +23,15 @@ def main():
     print("\n2) Ingesting results (ET window backfill)...")
     run(["python", "ingest_results_et.py", str(start_et), str(end_et)])
 
-    print("\n3) Materialising rest days...")
+    print("\n3) Refreshing feature views...")
     run(["powershell", "-Command",
          "Get-Content sql/features/rest_days_view.sql | docker exec -i nba_postgres psql -U nba_user -d nba; "
-         "Get-Content sql/materialise/rest_days_upsert.sql | docker exec -i nba_postgres psql -U nba_user -d nba"
+         "Get-Content sql/features/rolling_form_view.sql | docker exec -i nba_postgres psql -U nba_user -d nba"
     ])
 
-    print("\n4) Materialising rolling form...")
-    run(["powershell", "-Command",
-         "Get-Content sql/features/rolling_form_view.sql | docker exec -i nba_postgres psql -U nba_user -d nba; "
-         "Get-Content sql/materialise/rolling_pd_upsert.sql | docker exec -i nba_postgres psql -U nba_user -d nba"
-    ])
+    # Only teams touched by the ingestion steps above (their change sets)
+    print("\n4) Materialising rest days + rolling form for changed teams...")
+    run(["python", "refresh_features.py"])
 
     print("\nDone.")
 
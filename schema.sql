@@ -8,10 +8,12 @@ CREATE TABLE IF NOT EXISTS teams (
 CREATE TABLE IF NOT EXISTS games (
   game_id         TEXT PRIMARY KEY,
   game_date       DATE NOT NULL,
+  game_date_et    DATE,            -- the NBA's (Eastern) calendar day; what the feature views filter on
   season          INTEGER,
   home_team_id    INTEGER NOT NULL,
   away_team_id    INTEGER NOT NULL,
   status          TEXT NOT NULL,   -- scheduled | in_progress | final
+  season_type     TEXT,            -- regular | playoffs
   home_pts        INTEGER,
   away_pts        INTEGER,
   updated_at      TIMESTAMPTZ DEFAULT now()
@@ -20,6 +22,9 @@ CREATE TABLE IF NOT EXISTS games (
 CREATE INDEX IF NOT EXISTS idx_games_date ON games(game_date);
 CREATE INDEX IF NOT EXISTS idx_games_home ON games(home_team_id);
 CREATE INDEX IF NOT EXISTS idx_games_away ON games(away_team_id);
+-- Hot filters of every feature view / schedule lookup (also created by migrate_partitions.py)
+CREATE INDEX IF NOT EXISTS idx_games_status_date_et ON games(status, game_date_et);
+CREATE INDEX IF NOT EXISTS idx_games_date_et ON games(game_date_et);
 
 -- One row per team per game (box-score-derived team stats you compute)
 CREATE TABLE IF NOT EXISTS team_game_stats (
@@ -48,13 +53,27 @@ CREATE TABLE IF NOT EXISTS team_game_stats (
 CREATE INDEX IF NOT EXISTS idx_tgs_team ON team_game_stats(team_id);
 
 -- Model-ready features per team-game (rolling / lagged features)
+-- One typed column per feature (was feature_json; see sql/migrations/001_features_team_game_typed.sql,
+-- which also repoints views such as v_team_features_with_rest at these columns).
+-- Views over this table read the typed columns; there is no feature_json to ->> into.
+-- The feature columns are not indexed and fillfactor leaves room on each page, so refreshes are HOT updates.
 CREATE TABLE IF NOT EXISTS features_team_game (
-  game_id         TEXT NOT NULL REFERENCES games(game_id) ON DELETE CASCADE,
-  team_id         INTEGER NOT NULL,
-  as_of_date      DATE NOT NULL,   -- the date features are valid "as of" (typically game_date)
-  feature_json    JSONB NOT NULL,  -- flexible for v1; can normalize later
+  game_id               TEXT NOT NULL REFERENCES games(game_id) ON DELETE CASCADE,
+  team_id               INTEGER NOT NULL,
+  as_of_date            DATE NOT NULL,   -- the date features are valid "as of" (typically game_date)
+
+  rest_days             INTEGER,
+  rest_days_missing     BOOLEAN,
+
+  rolling_pd_5          REAL,
+  rolling_pd_5_n        SMALLINT,
+  rolling_pd_5_missing  BOOLEAN,
+  rolling_pd_10         REAL,
+  rolling_pd_10_n       SMALLINT,
+  rolling_pd_10_missing BOOLEAN,
+
   PRIMARY KEY (game_id, team_id)
-);
+) WITH (fillfactor = 90);
 
 CREATE INDEX IF NOT EXISTS idx_ftg_asof ON features_team_game(as_of_date);
 
@@ -101,3 +120,116 @@ CREATE TABLE IF NOT EXISTS evaluation_runs (
   avg_width_95    NUMERIC,
   created_at      TIMESTAMPTZ DEFAULT now()
 );
+
+-- Ingestion bookkeeping: high-water mark per ingestor + endpoint (watermarks.py)
+CREATE TABLE IF NOT EXISTS ingestion_watermarks (
+  ingestor        TEXT NOT NULL,
+  endpoint        TEXT NOT NULL,
+  last_game_date  DATE,
+  last_game_id    TEXT,
+  updated_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (ingestor, endpoint)
+);
+
+-- Trade / signing / release feed written by fetch_players.py
+CREATE TABLE IF NOT EXISTS roster_changes (
+  change_id       BIGSERIAL PRIMARY KEY,
+  player_id       INTEGER NOT NULL,
+  player_name     TEXT,
+  change_type     TEXT NOT NULL,   -- signed | traded | released | updated
+  old_team_id     INTEGER,
+  new_team_id     INTEGER,
+  detected_at     TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_roster_changes_detected ON roster_changes(detected_at);
+
+-- Games/teams touched by each ingestion run, consumed by refresh_features.py (change_sets.py)
+CREATE TABLE IF NOT EXISTS ingestion_changes (
+  change_id       BIGSERIAL PRIMARY KEY,
+  source          TEXT NOT NULL,
+  game_ids        TEXT[] NOT NULL,
+  team_ids        INTEGER[] NOT NULL,
+  date_from       DATE,
+  date_to         DATE,
+  created_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+  consumed_at     TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_changes_pending
+  ON ingestion_changes(change_id) WHERE consumed_at IS NULL;
+
+-- Officiating crews per game (ingest_officials.py), read by predict_scores_for_date.get_crew_bias
+CREATE TABLE IF NOT EXISTS game_officials (
+  game_id         TEXT NOT NULL,
+  official_id     INTEGER NOT NULL,
+  first_name      TEXT,
+  last_name       TEXT,
+  jersey_num      TEXT,
+  assignment      TEXT,
+  PRIMARY KEY (game_id, official_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_game_officials_official ON game_officials(official_id);
+
+-- Priority-ordered fetch tasks drained by ingest_worker.py (work_queue.py)
+CREATE TABLE IF NOT EXISTS fetch_tasks (
+  task_id         BIGSERIAL PRIMARY KEY,
+  priority        SMALLINT NOT NULL,           -- lower runs first
+  kind            TEXT NOT NULL,
+  payload         JSONB NOT NULL DEFAULT '{}',
+  status          TEXT NOT NULL DEFAULT 'pending',   -- pending | running | done | failed
+  attempts        INTEGER NOT NULL DEFAULT 0,
+  last_error      TEXT,
+  run_after       TIMESTAMPTZ NOT NULL DEFAULT now(),  -- retry backoff
+  enqueued_at     TIMESTAMPTZ NOT NULL DEFAULT now(),
+  started_at      TIMESTAMPTZ,
+  finished_at     TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_fetch_tasks_next
+  ON fetch_tasks(priority, task_id) WHERE status = 'pending';
+CREATE UNIQUE INDEX IF NOT EXISTS idx_fetch_tasks_open
+  ON fetch_tasks(kind, payload) WHERE status IN ('pending', 'running');
+
+-- Per-game fetch state with retry backoff and dead letters (ingestion_state.py)
+CREATE TABLE IF NOT EXISTS ingestion_state (
+  ingestor        TEXT NOT NULL,
+  game_id         TEXT NOT NULL,
+  game_date       DATE,
+  status          TEXT NOT NULL DEFAULT 'pending',   -- pending | done | failed
+  attempts        INTEGER NOT NULL DEFAULT 0,
+  last_error      TEXT,
+  next_retry_at   TIMESTAMPTZ NOT NULL DEFAULT now(),
+  updated_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (ingestor, game_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_state_pending
+  ON ingestion_state(ingestor, next_retry_at) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_ingestion_state_failed
+  ON ingestion_state(ingestor) WHERE status = 'failed';
+
+-- Player advanced box scores, from the same BoxScoreAdvancedV3 calls (ingest_boxscores.py)
+CREATE TABLE IF NOT EXISTS player_game_advanced (
+  game_id         TEXT NOT NULL,
+  player_id       INTEGER NOT NULL,
+  team_id         INTEGER NOT NULL,
+  is_home         BOOLEAN NOT NULL,
+  minutes         FLOAT,
+  usg_pct         FLOAT,
+  ts_pct          FLOAT,
+  efg_pct         FLOAT,
+  ortg            FLOAT,
+  drtg            FLOAT,
+  net_rtg         FLOAT,
+  ast_pct         FLOAT,
+  reb_pct         FLOAT,
+  tov_ratio       FLOAT,
+  pace            FLOAT,
+  poss            FLOAT,
+  pie             FLOAT,
+  PRIMARY KEY (game_id, player_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_pga_player ON player_game_advanced(player_id);
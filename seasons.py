@@ -0,0 +1,16 @@
+from datetime import date
+
+
+# NBA seasons are labelled by the calendar year they start in (2025-26 -> 2025)
+# and roll over on Oct 1. Every season key in the tables and partitions uses this rule.
+SEASON_START_MONTH = 10
+
+
+def season_from_date(d: date) -> int:
+    # Season label by starting year, e.g., 2025-26 -> 2025
+    return d.year if d.month >= SEASON_START_MONTH else d.year - 1
+
+
+def season_label(d: date) -> str:
+    start = season_from_date(d)
+    return f"{start}-{(start + 1) % 100:02d}"
@@ -0,0 +1,27 @@
+-- Incremental form of rest_days_upsert.sql, run by refresh_features.py.
+-- %(team_ids)s is the int[] of teams touched since the last refresh,
+-- or NULL to refresh every scheduled team-game.
+
+-- 1) Ensure the base feature row exists for every affected scheduled team-game
+INSERT INTO features_team_game (game_id, team_id, as_of_date)
+SELECT
+    v.game_id,
+    v.team_id,
+    v.scheduled_date_et AS as_of_date
+FROM public.v_rest_days_scheduled v
+WHERE (%(team_ids)s::int[] IS NULL OR v.team_id = ANY(%(team_ids)s::int[]))
+ON CONFLICT (game_id, team_id)
+DO UPDATE SET
+    as_of_date = EXCLUDED.as_of_date
+WHERE features_team_game.as_of_date IS DISTINCT FROM EXCLUDED.as_of_date;
+
+-- 2) Update rest day fields
+UPDATE features_team_game f
+SET
+    rest_days = v.rest_days,
+    rest_days_missing = v.rest_days_missing
+FROM public.v_rest_days_scheduled v
+WHERE f.game_id = v.game_id
+  AND f.team_id = v.team_id
+  AND (f.rest_days, f.rest_days_missing) IS DISTINCT FROM (v.rest_days, v.rest_days_missing)
+  AND (%(team_ids)s::int[] IS NULL OR v.team_id = ANY(%(team_ids)s::int[]));
@@ -0,0 +1,46 @@
+-- Incremental form of rolling_pd_upsert.sql, run by refresh_features.py.
+-- %(team_ids)s is the int[] of teams touched since the last refresh,
+-- or NULL to refresh every scheduled team-game.
+
+INSERT INTO features_team_game (
+    game_id,
+    team_id,
+    as_of_date,
+    rolling_pd_5,
+    rolling_pd_5_n,
+    rolling_pd_5_missing,
+    rolling_pd_10,
+    rolling_pd_10_n,
+    rolling_pd_10_missing
+)
+SELECT
+    v.game_id,
+    v.team_id,
+    v.scheduled_date_et AS as_of_date,
+    v.rolling_pd_5,
+    v.rolling_pd_5_n,
+    (v.rolling_pd_5_n < 5) AS rolling_pd_5_missing,
+    v.rolling_pd_10,
+    v.rolling_pd_10_n,
+    (v.rolling_pd_10_n < 10) AS rolling_pd_10_missing
+FROM v_rolling_form_scheduled v
+WHERE (%(team_ids)s::int[] IS NULL OR v.team_id = ANY(%(team_ids)s::int[]))
+ON CONFLICT (game_id, team_id) DO UPDATE
+SET
+    as_of_date = EXCLUDED.as_of_date,
+    rolling_pd_5 = EXCLUDED.rolling_pd_5,
+    rolling_pd_5_n = EXCLUDED.rolling_pd_5_n,
+    rolling_pd_5_missing = EXCLUDED.rolling_pd_5_missing,
+    rolling_pd_10 = EXCLUDED.rolling_pd_10,
+    rolling_pd_10_n = EXCLUDED.rolling_pd_10_n,
+    rolling_pd_10_missing = EXCLUDED.rolling_pd_10_missing
+-- Unchanged rows are left alone instead of leaving a dead tuple behind
+WHERE (
+    features_team_game.as_of_date,
+    features_team_game.rolling_pd_5, features_team_game.rolling_pd_5_n, features_team_game.rolling_pd_5_missing,
+    features_team_game.rolling_pd_10, features_team_game.rolling_pd_10_n, features_team_game.rolling_pd_10_missing
+) IS DISTINCT FROM (
+    EXCLUDED.as_of_date,
+    EXCLUDED.rolling_pd_5, EXCLUDED.rolling_pd_5_n, EXCLUDED.rolling_pd_5_missing,
+    EXCLUDED.rolling_pd_10, EXCLUDED.rolling_pd_10_n, EXCLUDED.rolling_pd_10_missing
+);
@@ -0,0 +1,81 @@
+-- Replace features_team_game.feature_json with typed columns.
+--
+-- The materialise SQL used to merge JSONB with || on every refresh, rewriting
+-- (and bloating) the whole document each time, and training SQL had to cast
+-- each field back out with (feature_json->>'...')::numeric. Safe to re-run.
+--
+--   psql -d nba -f sql/migrations/001_features_team_game_typed.sql
+
+BEGIN;
+
+ALTER TABLE features_team_game
+  ADD COLUMN IF NOT EXISTS rest_days             INTEGER,
+  ADD COLUMN IF NOT EXISTS rest_days_missing     BOOLEAN,
+  ADD COLUMN IF NOT EXISTS rolling_pd_5          REAL,
+  ADD COLUMN IF NOT EXISTS rolling_pd_5_n        SMALLINT,
+  ADD COLUMN IF NOT EXISTS rolling_pd_5_missing  BOOLEAN,
+  ADD COLUMN IF NOT EXISTS rolling_pd_10         REAL,
+  ADD COLUMN IF NOT EXISTS rolling_pd_10_n       SMALLINT,
+  ADD COLUMN IF NOT EXISTS rolling_pd_10_missing BOOLEAN;
+
+-- Copy the JSON fields across, then drop the document
+DO $$
+DECLARE
+  dep record;
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM information_schema.columns
+    WHERE table_name = 'features_team_game' AND column_name = 'feature_json'
+  ) THEN
+    UPDATE features_team_game SET
+      rolling_pd_5          = (feature_json->>'rolling_pd_5')::real,
+      rolling_pd_5_n        = (feature_json->>'rolling_pd_5_n')::smallint,
+      rolling_pd_5_missing  = (feature_json->>'rolling_pd_5_missing')::boolean,
+      rolling_pd_10         = (feature_json->>'rolling_pd_10')::real,
+      rolling_pd_10_n       = (feature_json->>'rolling_pd_10_n')::smallint,
+      rolling_pd_10_missing = (feature_json->>'rolling_pd_10_missing')::boolean
+    WHERE feature_json <> '{}'::jsonb;
+
+    -- Views reading the document (v_team_features_with_rest, ...) would block
+    -- the drop, and CASCADE would delete them. Point them at the typed columns
+    -- instead: every <rel>.feature_json ->> 'key' becomes (<rel>.key)::text, the
+    -- same type ->> returned, so each view keeps its column types and
+    -- CREATE OR REPLACE VIEW accepts it. Any other use of feature_json is left
+    -- in place and makes the DROP below fail, rolling everything back.
+    FOR dep IN
+      SELECT DISTINCT r.ev_class::regclass AS view_name
+      FROM pg_depend d
+      JOIN pg_rewrite r ON r.oid = d.objid
+      JOIN pg_class v ON v.oid = r.ev_class AND v.relkind = 'v'
+      JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+      WHERE d.classid = 'pg_rewrite'::regclass
+        AND d.refobjid = 'features_team_game'::regclass
+        AND a.attname = 'feature_json'
+    LOOP
+      EXECUTE format(
+        'CREATE OR REPLACE VIEW %s AS %s',
+        dep.view_name,
+        regexp_replace(
+          regexp_replace(
+            pg_get_viewdef(dep.view_name),
+            '(([A-Za-z_][A-Za-z0-9_]*\.)?)feature_json ->> ''([A-Za-z0-9_]+)''::text',
+            '(\1\3)::text',
+            'g'
+          ),
+          ';\s*$', ''
+        )
+      );
+      RAISE NOTICE 'rewrote % to read the typed feature columns', dep.view_name;
+    END LOOP;
+
+    ALTER TABLE features_team_game DROP COLUMN feature_json;
+  END IF;
+END $$;
+
+-- Leave free space on each page so refreshes can update rows in place (HOT)
+ALTER TABLE features_team_game SET (fillfactor = 90);
+
+COMMIT;
+
+-- The backfill rewrote every row; compact the table and apply the fillfactor
+VACUUM FULL ANALYZE features_team_game;
@@ -18,8 +18,8 @@ home_features AS (
         f.game_id,
         f.team_id,
         f.rest_days,
-        (f.feature_json->>'rolling_pd_5')::numeric AS rolling_pd_5,
-        (f.feature_json->>'rolling_pd_10')::numeric AS rolling_pd_10
+        f.rolling_pd_5,
+        f.rolling_pd_10
     FROM features_team_game f
 ),
 away_features AS (
@@ -27,8 +27,8 @@ away_features AS (
         f.game_id,
         f.team_id,
         f.rest_days,
-        (f.feature_json->>'rolling_pd_5')::numeric AS rolling_pd_5,
-        (f.feature_json->>'rolling_pd_10')::numeric AS rolling_pd_10
+        f.rolling_pd_5,
+        f.rolling_pd_10
     FROM features_team_game f
 )
 SELECT
@@ -1,8 +1,6 @@
 import os
 import sys
 import joblib
-import pandas as pd
-import psycopg2
 from dotenv import load_dotenv
 from sklearn.linear_model import Ridge
 from sklearn.model_selection import train_test_split
@@ -10,22 +8,11 @@ from sklearn.metrics import mean_absolute_error
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
+from db import get_db_conn, read_frame_binary
 
 # Load Environment Variables
 load_dotenv()
 
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "nba")
-DB_USER = os.getenv("DB_USER", "nba_user")
-DB_PASS = os.getenv("DB_PASSWORD")
-
-if not DB_PASS:
-    print("Error: DB_PASSWORD not found.")
-    sys.exit(1)
-
-def get_db_conn():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
-
 def train():
     conn = get_db_conn()
     
@@ -57,7 +44,7 @@ def train():
     """
     
     try:
-        df = pd.read_sql(sql, conn)
+        df = read_frame_binary(conn, sql)
     except Exception as e:
         print(f"Error fetching data: {e}")
         sys.exit(1)
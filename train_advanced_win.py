@@ -1,8 +1,5 @@
 import os
-import sys
 import joblib
-import pandas as pd
-import psycopg2
 from dotenv import load_dotenv
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
@@ -10,21 +7,10 @@ from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
+from db import get_db_conn, read_frame_binary
 
 load_dotenv()
 
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "nba")
-DB_USER = os.getenv("DB_USER", "nba_user")
-DB_PASS = os.getenv("DB_PASSWORD")
-
-if not DB_PASS:
-    print("Error: DB_PASSWORD not found.")
-    sys.exit(1)
-
-def get_db_conn():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
-
 def fetch_training_data():
     conn = get_db_conn()
     
@@ -64,7 +50,7 @@ def fetch_training_data():
         
         WHERE g.status = 'Final'
     """
-    df = pd.read_sql(sql, conn)
+    df = read_frame_binary(conn, sql)
     conn.close()
     return df
 
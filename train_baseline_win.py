@@ -1,42 +1,17 @@
 import os
 import sys
 import joblib
-import pandas as pd
-import psycopg2
 from dotenv import load_dotenv
 from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
+from db import get_db_conn, read_frame_binary
 
 # 1. Load Environment Variables
 load_dotenv()
 
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "nba")
-DB_USER = os.getenv("DB_USER", "nba_user")
-DB_PASS = os.getenv("DB_PASSWORD")
-
-# Safety Check
-if not DB_PASS:
-    print("Error: DB_PASSWORD not found. Please check your .env file.")
-    sys.exit(1)
-
-def get_db_conn():
-    """Establish connection to PostgreSQL"""
-    try:
-        conn = psycopg2.connect(
-            host=DB_HOST, 
-            dbname=DB_NAME, 
-            user=DB_USER, 
-            password=DB_PASS
-        )
-        return conn
-    except Exception as e:
-        print(f"Database connection failed: {e}")
-        sys.exit(1)
-
 def fetch_training_data():
     """Fetch feature-engineered data from SQL Views"""
     conn = get_db_conn()
@@ -76,7 +51,7 @@ def fetch_training_data():
     """
     
     try:
-        df = pd.read_sql(sql, conn)
+        df = read_frame_binary(conn, sql)
     except Exception as e:
         print(f"SQL Query Failed: {e}")
         sys.exit(1)
@@ -1,8 +1,6 @@
 import os
 import sys
 import joblib
-import pandas as pd
-import psycopg2
 from dotenv import load_dotenv
 from sklearn.linear_model import Ridge
 from sklearn.model_selection import train_test_split
@@ -10,31 +8,45 @@ from sklearn.metrics import mean_absolute_error
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
+from db import get_db_conn, read_frame_binary
 
 load_dotenv()
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_NAME = os.getenv("DB_NAME", "nba")
-DB_USER = os.getenv("DB_USER", "nba_user")
-DB_PASS = os.getenv("DB_PASSWORD")
 
 def train_prop_model(target_col, model_name):
     print(f"\n--- Training {model_name} Model ---")
-    conn = psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
+    conn = get_db_conn()
     
     # We select specific columns. 
     # Note: Postgres returns these as lowercase (pts_l5, etc.)
+    # Usage / efficiency come from player_game_advanced (harvested from the
+    # box scores ingest_boxscores.py already fetches), averaged over the
+    # games *before* each row so nothing leaks from the game being predicted.
     sql = f"""
+        WITH adv AS (
+            SELECT
+                pga.player_id, pga.game_id,
+                AVG(pga.usg_pct) OVER w5 AS usg_l5,
+                AVG(pga.usg_pct) OVER w10 AS usg_l10,
+                AVG(pga.ts_pct) OVER w10 AS ts_l10
+            FROM player_game_advanced pga
+            JOIN games g ON g.game_id = pga.game_id
+            WINDOW
+                w5 AS (PARTITION BY pga.player_id ORDER BY g.game_date ROWS BETWEEN 5 PRECEDING AND 1 PRECEDING),
+                w10 AS (PARTITION BY pga.player_id ORDER BY g.game_date ROWS BETWEEN 10 PRECEDING AND 1 PRECEDING)
+        )
         SELECT 
-            pts_l5, reb_l5, ast_l5, min_l5,
-            pts_l10, reb_l10, ast_l10,
-            pts_l20,
-            {target_col} as target
-        FROM v_player_rolling_stats
-        WHERE pts_l10 IS NOT NULL -- Ensure we have enough history
+            r.pts_l5, r.reb_l5, r.ast_l5, r.min_l5,
+            r.pts_l10, r.reb_l10, r.ast_l10,
+            r.pts_l20,
+            adv.usg_l5, adv.usg_l10, adv.ts_l10,
+            r.{target_col} as target
+        FROM v_player_rolling_stats r
+        LEFT JOIN adv ON adv.player_id = r.player_id AND adv.game_id = r.game_id
+        WHERE r.pts_l10 IS NOT NULL -- Ensure we have enough history
     """
     
     try:
-        df = pd.read_sql(sql, conn)
+        df = read_frame_binary(conn, sql)
     except Exception as e:
         print(f"Error fetching data: {e}")
         return
@@ -44,7 +56,8 @@ def train_prop_model(target_col, model_name):
     # FIXED: Feature list must be all lowercase to match Postgres output
     features = [
         "pts_l5", "reb_l5", "ast_l5", "min_l5",
-        "pts_l10", "reb_l10", "ast_l10", "pts_l20"
+        "pts_l10", "reb_l10", "ast_l10", "pts_l20",
+        "usg_l5", "usg_l10", "ts_l10",   # NaN without advanced rows; imputed below
     ]
     
     # Check if data exists
@@ -1,20 +1,10 @@
 import sys
 import os
 import joblib
-import pandas as pd
-import psycopg2
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, r2_score
-
-# Config
-DB_HOST = "localhost"
-DB_NAME = "nba"
-DB_USER = "nba_user"
-DB_PASS = "nba_pass"
-
-def get_db_conn():
-    return psycopg2.connect(host=DB_HOST, dbname=DB_NAME, user=DB_USER, password=DB_PASS)
+from db import get_db_conn, read_frame_binary
 
 def fetch_data():
     conn = get_db_conn()
@@ -50,7 +40,7 @@ def fetch_data():
         
         WHERE g.status = 'Final'
     """
-    df = pd.read_sql(sql, conn)
+    df = read_frame_binary(conn, sql)
     conn.close()
     return df
 
@@ -0,0 +1,97 @@
+from datetime import date
+from typing import List, NamedTuple, Optional
+
+import pandas as pd
+
+from response_cache import current_season_str
+
+
+# -----------------------------
+# Schema
+# -----------------------------
+CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS ingestion_watermarks (
+        ingestor        TEXT NOT NULL,
+        endpoint        TEXT NOT NULL,
+        last_game_date  DATE,
+        last_game_id    TEXT,
+        updated_at      TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (ingestor, endpoint)
+    );
+"""
+
+
+class Watermark(NamedTuple):
+    last_game_date: Optional[date]
+    last_game_id: Optional[str]
+    updated_at: object
+
+
+def ensure_table(conn):
+    with conn.cursor() as cur:
+        cur.execute(CREATE_SQL)
+    conn.commit()
+
+
+# -----------------------------
+# Read / advance
+# -----------------------------
+def get_watermark(conn, ingestor: str, endpoint: str) -> Optional[Watermark]:
+    """High-water mark recorded by the last successful run, or None."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT last_game_date, last_game_id, updated_at
+            FROM ingestion_watermarks
+            WHERE ingestor = %s AND endpoint = %s
+            """,
+            (ingestor, endpoint),
+        )
+        row = cur.fetchone()
+    return Watermark(*row) if row else None
+
+
+def set_watermark(conn, ingestor: str, endpoint: str, last_game_date: date, last_game_id: Optional[str] = None):
+    """
+    Advance the watermark. It never moves backwards, so re-running an old
+    window cannot make the next run re-fetch history. Caller commits, ideally
+    in the same transaction as the rows the watermark describes.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO ingestion_watermarks (ingestor, endpoint, last_game_date, last_game_id, updated_at)
+            VALUES (%s, %s, %s, %s, now())
+            ON CONFLICT (ingestor, endpoint) DO UPDATE
+            SET last_game_id = CASE
+                    WHEN ingestion_watermarks.last_game_date IS NULL
+                      OR EXCLUDED.last_game_date >= ingestion_watermarks.last_game_date
+                    THEN EXCLUDED.last_game_id
+                    ELSE ingestion_watermarks.last_game_id
+                END,
+                last_game_date = GREATEST(ingestion_watermarks.last_game_date, EXCLUDED.last_game_date),
+                updated_at = now();
+            """,
+            (ingestor, endpoint, last_game_date, last_game_id),
+        )
+
+
+def advance_from_frame(conn, ingestor: str, endpoint: str, df: pd.DataFrame, date_col: str, id_col: str):
+    """set_watermark() from the latest (date, id) in a frame of ingested rows."""
+    if df.empty:
+        return
+    dates = pd.to_datetime(df[date_col])
+    latest = df.loc[dates == dates.max()]
+    set_watermark(conn, ingestor, endpoint, dates.max().date(), str(latest[id_col].max()))
+
+
+# -----------------------------
+# Delta helpers
+# -----------------------------
+def seasons_since(d: date, seasons: List[str]) -> List[str]:
+    """Seasons from `seasons` that can still contain rows on or after d."""
+    return [s for s in seasons if s >= current_season_str(d)]
+
+
+def api_date(d: date) -> str:
+    return d.strftime("%m/%d/%Y")
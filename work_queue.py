@@ -0,0 +1,186 @@
+import json
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+
+# -----------------------------
+# Priorities (lower runs first)
+# -----------------------------
+PRIORITY_FINALS = 0        # last night's results
+PRIORITY_SCHEDULE = 10     # today / tomorrow's schedule
+PRIORITY_ROSTERS = 20      # roster moves
+PRIORITY_LOGS = 30         # player game logs
+PRIORITY_BACKFILL = 90     # historical box scores / seasons
+
+MAX_ATTEMPTS = 5
+
+# A running task is held by its worker's session-level advisory lock
+# (LOCK_CLASS, task id). The lock lasts exactly as long as the task: it is
+# released on complete/fail, or by the server when the worker's connection
+# dies. A running task whose lock is free has therefore been abandoned,
+# however long it has been running.
+LOCK_CLASS = 7316
+LOCK_KEY = "(%s, (task_id & 2147483647)::int)" % LOCK_CLASS
+
+
+# -----------------------------
+# Schema
+# -----------------------------
+CREATE_SQL = """
+    CREATE TABLE IF NOT EXISTS fetch_tasks (
+        task_id      BIGSERIAL PRIMARY KEY,
+        priority     SMALLINT NOT NULL,
+        kind         TEXT NOT NULL,
+        payload      JSONB NOT NULL DEFAULT '{}',
+        status       TEXT NOT NULL DEFAULT 'pending',   -- pending | running | done | failed
+        attempts     INTEGER NOT NULL DEFAULT 0,
+        last_error   TEXT,
+        run_after    TIMESTAMPTZ NOT NULL DEFAULT now(),  -- retry backoff
+        enqueued_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+        started_at   TIMESTAMPTZ,
+        finished_at  TIMESTAMPTZ
+    );
+    ALTER TABLE fetch_tasks ADD COLUMN IF NOT EXISTS run_after TIMESTAMPTZ NOT NULL DEFAULT now();
+    CREATE INDEX IF NOT EXISTS idx_fetch_tasks_next
+        ON fetch_tasks(priority, task_id) WHERE status = 'pending';
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_fetch_tasks_open
+        ON fetch_tasks(kind, payload) WHERE status IN ('pending', 'running');
+"""
+
+
+class Task(NamedTuple):
+    task_id: int
+    priority: int
+    kind: str
+    payload: dict
+    attempts: int
+
+
+def ensure_table(conn):
+    with conn.cursor() as cur:
+        cur.execute(CREATE_SQL)
+    conn.commit()
+
+
+# -----------------------------
+# Producers
+# -----------------------------
+def enqueue(conn, kind: str, payload: Optional[dict] = None, priority: int = PRIORITY_BACKFILL) -> bool:
+    """
+    Add a task unless the same (kind, payload) is already queued or running.
+    If it is queued at a lower priority it is promoted. Caller commits.
+    Returns True if a new task was added.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO fetch_tasks (priority, kind, payload)
+            VALUES (%s, %s, %s::jsonb)
+            ON CONFLICT (kind, payload) WHERE status IN ('pending', 'running')
+            DO UPDATE SET priority = LEAST(fetch_tasks.priority, EXCLUDED.priority)
+            RETURNING (xmax = 0)
+            """,
+            (priority, kind, json.dumps(payload or {}, sort_keys=True)),
+        )
+        return cur.fetchone()[0]
+
+
+def enqueue_many(conn, kind: str, payloads: List[dict], priority: int = PRIORITY_BACKFILL) -> int:
+    return sum(enqueue(conn, kind, p, priority) for p in payloads)
+
+
+# -----------------------------
+# Consumers
+# -----------------------------
+def claim(conn) -> Optional[Task]:
+    """
+    Take the most urgent pending task that is not backing off, mark it
+    running and take its lock on this connection (both committed together,
+    so other workers skip it and requeue_stale leaves it alone). Returns
+    None when nothing is due.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            UPDATE fetch_tasks
+            SET status = 'running', started_at = now(), attempts = attempts + 1
+            WHERE task_id = (
+                SELECT task_id FROM fetch_tasks
+                WHERE status = 'pending' AND run_after <= now()
+                ORDER BY priority, task_id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING task_id, priority, kind, payload, attempts, pg_advisory_lock{LOCK_KEY}
+            """
+        )
+        row = cur.fetchone()
+    conn.commit()
+    return Task(*row[:5]) if row else None
+
+
+def _unlock(cur, task: Task):
+    cur.execute(f"SELECT pg_advisory_unlock{LOCK_KEY} FROM (SELECT %s::bigint AS task_id) t", (task.task_id,))
+
+
+def release_locks(conn):
+    """Drop every task lock this connection holds, e.g. before it goes back to the pool."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_unlock_all()")
+    conn.commit()
+
+
+def complete(conn, task: Task):
+    with conn.cursor() as cur:
+        cur.execute(
+            "UPDATE fetch_tasks SET status = 'done', finished_at = now(), last_error = NULL WHERE task_id = %s",
+            (task.task_id,),
+        )
+        _unlock(cur, task)
+    conn.commit()
+
+
+def fail(conn, task: Task, error: str, retry_at: Optional[datetime] = None, give_up: bool = False):
+    """
+    Back to pending for another try (not before retry_at, default now), or
+    failed after MAX_ATTEMPTS or when the caller gives up on it.
+    """
+    status = "failed" if give_up or task.attempts >= MAX_ATTEMPTS else "pending"
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE fetch_tasks
+            SET status = %s, last_error = %s, run_after = COALESCE(%s, now()),
+                finished_at = CASE WHEN %s = 'failed' THEN now() END
+            WHERE task_id = %s
+            """,
+            (status, error[:2000], retry_at, status, task.task_id),
+        )
+        _unlock(cur, task)
+    conn.commit()
+
+
+def requeue_stale(conn) -> int:
+    """
+    Return tasks left running by a crashed worker to the queue: those whose
+    lock is free. Tasks a live worker is still running, however long, keep
+    their lock and are left alone. The probe lock is transaction-scoped.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            UPDATE fetch_tasks SET status = 'pending'
+            WHERE status = 'running' AND pg_try_advisory_xact_lock{LOCK_KEY}
+            """
+        )
+        count = cur.rowcount
+    conn.commit()
+    return count
+
+
+def pending_counts(conn) -> dict:
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT kind, count(*) FROM fetch_tasks WHERE status = 'pending' GROUP BY kind ORDER BY min(priority)"
+        )
+        return dict(cur.fetchall())